@@ -0,0 +1,250 @@
+"""
+Benchmark — MarketCache._merge_markets (cross-venue merge + dedup)
+Run: python bench/bench_merge.py
+
+Checks that the hash-indexed merge of parsed records (with fuzzy matching
+off) produces output identical to the previous scan-based merge of dicts
+(kept below as `legacy_merge`), then times the merge — with and without the
+fuzzy MarketMatcher — on synthetic feeds scaled up to tens of thousands of markets.
+"""
+
+import copy
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import MarketCache, _assign_keys, _encode_json  # noqa: E402
+
+WORDS = ('fed', 'rate', 'cut', 'bitcoin', 'above', 'election', 'senate', 'trump', 'nvidia',
+         'march', 'april', 'price', 'win', 'champion', 'inflation', 'tariff', 'china', 'gdp')
+END_DATE = '2030-01-01T00:00:00Z'   # far future — keeps _classify_tf stable between runs
+
+
+def _name(rng, i):
+    return f"Will {' '.join(rng.choice(WORDS) for _ in range(4))} {i}?"
+
+
+def make_feeds(n, seed=7):
+    """Synthetic feeds: n poly events, 2n poly markets, n kalshi events, 2n kalshi markets.
+
+    About a third of Kalshi names collide with Polymarket names (after
+    normalization) so the merge path is exercised, including sub-markets.
+    """
+    rng = random.Random(seed)
+    poly_names = [_name(rng, i) for i in range(3 * n)]
+    poly_events, poly_markets, kalshi_events, kalshi_markets = [], [], [], []
+    for i in range(n):
+        subs = [{'name': f'Option {j}', 'price': rng.randint(1, 99), 'vol': '$1K', '_volNum': 1000.0,
+                 'bestBid': 40, 'bestAsk': 42, 'source': 'polymarket', 'conditionId': f'c{i}-{j}',
+                 'clobTokenId': f't{i}-{j}'} for j in range(rng.randint(1, 6))]
+        poly_events.append({'name': poly_names[i], 'price': rng.randint(1, 99), 'volume24h': rng.random() * 1e6,
+                            'endDate': END_DATE, 'slug': f'ev-{i}', 'id': str(i), 'bestBid': 40, 'bestAsk': 42,
+                            'liquidity': 1000.0, 'conditionId': f'c{i}', 'clobTokenId': f't{i}',
+                            'isEvent': len(subs) > 1, 'subCount': len(subs), 'subMarkets': subs,
+                            'source': 'polymarket'})
+    for i in range(n, 3 * n):
+        poly_markets.append({'name': poly_names[i], 'price': rng.randint(1, 99), 'volume24h': rng.random() * 1e5,
+                             'endDate': END_DATE, 'slug': f'm-{i}', 'id': str(i), 'bestBid': 40, 'bestAsk': 42,
+                             'liquidity': 500.0, 'conditionId': f'c{i}', 'clobTokenId': f't{i}',
+                             'source': 'polymarket'})
+
+    def kname(i):
+        # Re-case / re-punctuate a Polymarket name so only normalization makes it match
+        return poly_names[rng.randrange(3 * n)].upper().replace(' ', '  ') if rng.random() < 0.33 else _name(rng, 10 * n + i)
+
+    for i in range(n):
+        subs = [{'name': f'OPTION {j}', 'ticker': f'K{i}-{j}', 'price': rng.randint(1, 99), 'vol': '$900',
+                 '_volNum': 900, 'yesBid': 39, 'yesAsk': 43, 'source': 'kalshi'} for j in range(rng.randint(1, 8))]
+        kalshi_events.append({'name': kname(i), 'price': rng.randint(1, 99), 'volume24h': rng.randint(0, 10 ** 6),
+                              'closeTime': END_DATE, 'eventTicker': f'KE{i}', 'yesBid': 39, 'yesAsk': 43,
+                              'liquidity': 800, 'isEvent': len(subs) > 1, 'subCount': len(subs),
+                              'subMarkets': subs, 'source': 'kalshi'})
+    for i in range(2 * n):
+        kalshi_markets.append({'name': kname(n + i), 'price': rng.randint(1, 99), 'volume24h': rng.randint(0, 10 ** 5),
+                               'closeTime': END_DATE, 'ticker': f'KM{i}', 'yesBid': 39, 'yesAsk': 43,
+                               'liquidity': 300, 'source': 'kalshi'})
+    return poly_events, poly_markets, kalshi_events, kalshi_markets
+
+
+def to_records(cache, feeds):
+    """The same feeds as parsed records — what the _parse_* methods hand the merge."""
+    poly_events, poly_markets, kalshi_events, kalshi_markets = feeds
+
+    def subs(ev):
+        return _assign_keys([
+            cache._sub_market(sm['source'], sm['name'], sm['price'], sm['_volNum'],
+                              sm.get('bestBid', sm.get('yesBid')), sm.get('bestAsk', sm.get('yesAsk')),
+                              ticker=sm.get('ticker'), condition_id=sm.get('conditionId'),
+                              clob_token_id=sm.get('clobTokenId'))
+            for sm in ev['subMarkets']], fresh=True)
+
+    def poly(m, **extra):
+        return cache._market('polymarket', m['id'], m['name'], m['price'], m['volume24h'], m['endDate'],
+                             m['bestBid'], m['bestAsk'], m['liquidity'], slug=m['slug'],
+                             condition_id=m['conditionId'], clob_token_id=m['clobTokenId'], **extra)
+
+    def kalshi(m, uid, **extra):
+        return cache._market('kalshi', uid, m['name'], m['price'], m['volume24h'], m['closeTime'],
+                             m['yesBid'], m['yesAsk'], m['liquidity'], **extra)
+
+    return (
+        [poly(ev, is_event=ev['isEvent'], sub_count=ev['subCount'], subs=subs(ev)) for ev in poly_events],
+        [poly(m) for m in poly_markets],
+        [kalshi(ev, ev['eventTicker'], is_event=ev['isEvent'], sub_count=ev['subCount'], subs=subs(ev),
+                kalshi_ticker=ev['subMarkets'][0]['ticker'] or ev['eventTicker']) for ev in kalshi_events],
+        [kalshi(m, m['ticker'], kalshi_ticker=m['ticker']) for m in kalshi_markets],
+    )
+
+
+def legacy_merge(self, poly_events, poly_markets, kalshi_events, kalshi_markets):
+    """The pre-index merge (linear scan of `combined` per Kalshi record), for equivalence checks."""
+    combined = []
+    seen = set()
+    for ev in poly_events:
+        norm = self._normalize(ev['name'])
+        seen.add(norm)
+        for sm in (ev.get('subMarkets') or []):
+            seen.add(self._normalize(sm['name']))
+        combined.append({
+            'name': ev['name'], 'short': self._short_name(ev['name']), 'price': ev['price'],
+            'vol': self._fmt_vol(ev['volume24h']), '_volNum': ev['volume24h'], 'polyPrice': ev['price'],
+            'kalshiPrice': None, 'polyBid': ev.get('bestBid'), 'polyAsk': ev.get('bestAsk'),
+            'tf': self._classify_tf(ev.get('endDate')), '_endDate': ev.get('endDate'), 'source': 'polymarket',
+            'slug': ev.get('slug'), '_polyId': ev.get('id'), '_conditionId': ev.get('conditionId'),
+            '_clobTokenId': ev.get('clobTokenId'), 'liquidity': ev.get('liquidity', 0),
+            'isEvent': ev.get('isEvent', False), 'subCount': ev.get('subCount', 0),
+            'subMarkets': ev.get('subMarkets'),
+        })
+    for m in poly_markets:
+        norm = self._normalize(m['name'])
+        if norm in seen:
+            continue
+        seen.add(norm)
+        combined.append({
+            'name': m['name'], 'short': self._short_name(m['name']), 'price': m['price'],
+            'vol': self._fmt_vol(m['volume24h']), '_volNum': m['volume24h'], 'polyPrice': m['price'],
+            'kalshiPrice': None, 'polyBid': m.get('bestBid'), 'polyAsk': m.get('bestAsk'),
+            'tf': self._classify_tf(m.get('endDate')), '_endDate': m.get('endDate'), 'source': 'polymarket',
+            'slug': m.get('slug'), '_polyId': m.get('id'), '_conditionId': m.get('conditionId'),
+            '_clobTokenId': m.get('clobTokenId'), 'liquidity': m.get('liquidity', 0),
+            'isEvent': False, 'subCount': 0, 'subMarkets': None,
+        })
+    for ev in kalshi_events:
+        norm = self._normalize(ev['name'])
+        existing = next((c for c in combined if self._normalize(c['name']) == norm), None)
+        if existing:
+            existing['kalshiPrice'] = ev['price']
+            existing['kalshiBid'] = ev.get('yesBid')
+            existing['kalshiAsk'] = ev.get('yesAsk')
+            existing['_kalshiTicker'] = (ev.get('subMarkets', [{}])[0].get('ticker') or ev.get('eventTicker'))
+            if ev.get('isEvent') and ev.get('subMarkets'):
+                if not existing.get('isEvent'):
+                    existing['isEvent'] = True
+                    existing['subMarkets'] = existing.get('subMarkets') or []
+                for ksm in ev['subMarkets']:
+                    kn = self._normalize(ksm['name'])
+                    esub = next((s for s in (existing['subMarkets'] or []) if self._normalize(s['name']) == kn), None)
+                    if esub:
+                        esub['kalshiPrice'] = ksm['price']
+                    else:
+                        existing['subMarkets'] = existing.get('subMarkets') or []
+                        existing['subMarkets'].append(ksm)
+                existing['subCount'] = len(existing['subMarkets'] or [])
+        else:
+            for sm in (ev.get('subMarkets') or []):
+                seen.add(self._normalize(sm['name']))
+            seen.add(norm)
+            combined.append({
+                'name': ev['name'], 'short': self._short_name(ev['name']), 'price': ev['price'],
+                'vol': self._fmt_vol(ev['volume24h']), '_volNum': ev['volume24h'], 'polyPrice': None,
+                'kalshiPrice': ev['price'], 'kalshiBid': ev.get('yesBid'), 'kalshiAsk': ev.get('yesAsk'),
+                'tf': self._classify_tf(ev.get('closeTime')), '_endDate': ev.get('closeTime'), 'source': 'kalshi',
+                '_kalshiTicker': (ev.get('subMarkets', [{}])[0].get('ticker') or ev.get('eventTicker')),
+                'liquidity': ev.get('liquidity', 0), 'isEvent': ev.get('isEvent', False),
+                'subCount': ev.get('subCount', 0), 'subMarkets': ev.get('subMarkets'),
+            })
+    for m in kalshi_markets:
+        norm = self._normalize(m['name'])
+        existing = next((c for c in combined if self._normalize(c['name']) == norm), None)
+        if existing:
+            if existing.get('kalshiPrice') is None:
+                existing['kalshiPrice'] = m['price']
+                existing['kalshiBid'] = m.get('yesBid')
+                existing['kalshiAsk'] = m.get('yesAsk')
+                existing['_kalshiTicker'] = m.get('ticker')
+        elif norm not in seen:
+            seen.add(norm)
+            combined.append({
+                'name': m['name'], 'short': self._short_name(m['name']), 'price': m['price'],
+                'vol': self._fmt_vol(m['volume24h']), '_volNum': m['volume24h'], 'polyPrice': None,
+                'kalshiPrice': m['price'], 'kalshiBid': m.get('yesBid'), 'kalshiAsk': m.get('yesAsk'),
+                'tf': self._classify_tf(m.get('closeTime')), '_endDate': m.get('closeTime'), 'source': 'kalshi',
+                '_kalshiTicker': m.get('ticker'), 'liquidity': m.get('liquidity', 0),
+                'isEvent': False, 'subCount': 0, 'subMarkets': None,
+            })
+    for m in combined:
+        m['_chartScore'] = self._chart_score(m.get('price', 50), m.get('_volNum', 0))
+    combined.sort(key=lambda x: x.get('_chartScore', 0), reverse=True)
+    return combined
+
+
+def _time(fn, feeds, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        args = copy.deepcopy(feeds) if isinstance(feeds[0][0], dict) else feeds   # legacy mutates its input
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _comparable(records):
+    """Wire dicts without what the legacy merge never produced (keys, match confidence)."""
+    out = json.loads(_encode_json(records))
+    for r in out:
+        r.pop('matchConfidence', None)
+        r.pop('_key', None)
+        for sm in r.get('subMarkets') or []:
+            sm.pop('_key', None)
+    return out
+
+
+def main():
+    exact = MarketCache()
+    exact.FUZZY_MATCH = False
+    sizes = [int(x) for x in sys.argv[1:]] or [100, 1000, 5000, 10000, 20000]
+
+    print('equivalence (indexed vs legacy, exact matching only):')
+    for n in (50, 100, 400):
+        feeds = make_feeds(n)
+        legacy_s, expected = _time(lambda *a: legacy_merge(exact, *a), feeds, repeat=1)
+        indexed_s, actual = _time(exact._merge_markets, to_records(exact, feeds), repeat=1)
+        expected, actual = _comparable(expected), _comparable(actual)
+        status = 'identical' if actual == expected else 'MISMATCH'
+        print(f'  n={n:<6} {len(actual):>7} merged  legacy {legacy_s * 1e3:9.1f} ms  '
+              f'indexed {indexed_s * 1e3:8.1f} ms  {status}')
+        if actual != expected:
+            sys.exit(1)
+
+    for label, fuzzy in (('exact', False), ('fuzzy, cold', True), ('fuzzy, warm', True)):
+        print(f'\nscaling (indexed merge, {label}):')
+        for n in sizes:
+            cache = MarketCache()
+            cache.FUZZY_MATCH = fuzzy
+            feeds = to_records(cache, make_feeds(n))
+            if label.endswith('warm'):
+                cache._merge_markets(*feeds)   # prime cached pair decisions
+            records = sum(len(f) for f in feeds)
+            secs, out = _time(cache._merge_markets, feeds, repeat=1)
+            paired = sum(1 for m in out if m.get('polyPrice') is not None and m.get('kalshiPrice') is not None)
+            print(f'  n={n:<6} {records:>7} input records  {len(out):>7} merged  {paired:>6} paired  '
+                  f'{secs * 1e3:9.1f} ms  {secs / records * 1e6:6.2f} µs/record')
+
+
+if __name__ == '__main__':
+    main()
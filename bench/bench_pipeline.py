@@ -0,0 +1,440 @@
+"""
+Benchmark — offline data pipeline (parse → merge → encode, news → keywords → spikes)
+Run: python bench/bench_pipeline.py [--scales 1,10,100] [--save | --compare] [--record]
+
+Replays upstream payloads instead of hitting Polymarket, Kalshi and Google News:
+
+  - bench/fixtures/*.json|*.xml — recorded with --record (raw upstream pages,
+    exactly as the poller receives them). Used when present.
+  - otherwise deterministic synthetic payloads in the same upstream shape,
+    sized to what one poll fetches today (PAGE_DEPTH pages per source, seven
+    news feeds of 30 items).
+
+Each scale multiplies the record counts (1× = today, 10×, 100×; recorded
+fixtures are cloned with renamed records). The default is 1,10 — 100× takes a
+few minutes. Every case reports ops/sec, mean
+time, and peak/retained allocations from tracemalloc; each scale also reports
+the memory market records hold per 10k markets. --save writes the
+results to a baseline file; --compare re-runs and exits non-zero if any case
+got slower or allocates more than --tolerance relative to the baseline, or if
+there is no baseline to compare against. Timings are machine-specific, so no
+baseline is committed: --save one on the machine that will run --compare.
+"""
+
+import argparse
+import contextlib
+import copy
+import gzip
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server  # noqa: E402
+from server import EncodedSnapshot, MarketCache, SpreadIndex, TrendingCache, UpstreamResponse, _assign_keys  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, 'fixtures')
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+
+SOURCES = {
+    # name: (fixture file, records per page, pages per poll)
+    'poly_events': ('poly_events.json', 100, server.PAGE_DEPTH['poly_events']),
+    'poly_markets': ('poly_markets.json', 200, server.PAGE_DEPTH['poly_markets']),
+    'kalshi_events': ('kalshi_events.json', 100, server.PAGE_DEPTH['kalshi_events']),
+    'kalshi_markets': ('kalshi_markets.json', 200, server.PAGE_DEPTH['kalshi_markets']),
+}
+NEWS_FIXTURE = 'news.xml'
+NEWS_FEEDS = 7            # queries per trending cycle (see TrendingCache._fetch_and_analyze)
+NEWS_ITEMS = 30
+
+WORDS = ('fed', 'rate', 'cut', 'bitcoin', 'above', 'election', 'senate', 'trump', 'nvidia', 'march',
+         'april', 'price', 'win', 'champion', 'inflation', 'tariff', 'china', 'gdp', 'ukraine', 'openai')
+END_DATE = '2030-01-01T00:00:00Z'
+
+
+# ─── Fixtures ──────────────────────────────────────────────────
+
+def _question(rng, i):
+    return f"Will {' '.join(rng.choice(WORDS) for _ in range(4))} by {2026 + i % 4}? #{i}"
+
+
+def _poly_market(rng, i, question):
+    p = rng.randint(1, 99) / 100
+    return {
+        'id': str(i), 'question': question, 'groupItemTitle': question.split(' by ')[0][5:],
+        'slug': f'm-{i}', 'active': True, 'closed': False, 'endDate': END_DATE,
+        'outcomePrices': json.dumps([p, round(1 - p, 2)]),
+        'clobTokenIds': json.dumps([f'{i}1{i}', f'{i}2{i}']),
+        'volume24hr': rng.random() * 1e5, 'bestBid': max(p - 0.01, 0), 'bestAsk': min(p + 0.01, 1),
+        'liquidity': str(rng.random() * 1e4), 'conditionId': f'0x{i:08x}',
+    }
+
+
+def _kalshi_market(rng, i, title):
+    return {
+        'ticker': f'KX-{i}', 'title': title, 'subtitle': '', 'status': 'active',
+        'yes_price': rng.randint(1, 99) / 100, 'yes_bid': rng.randint(1, 98), 'yes_ask': rng.randint(2, 99),
+        'volume_24h': rng.randint(0, 10 ** 5), 'liquidity': rng.randint(0, 10 ** 6),
+        'close_time': END_DATE,
+    }
+
+
+def synth_pages(n_counts, seed=11):
+    """Upstream-shaped pages for each source; about a third of Kalshi titles reuse Polymarket ones."""
+    rng = random.Random(seed)
+    questions = [_question(rng, i) for i in range(n_counts['poly_events'] + n_counts['poly_markets'])]
+    poly_events = []
+    for i in range(n_counts['poly_events']):
+        markets = [_poly_market(rng, i * 100 + j, f'{questions[i]} ({j})') for j in range(rng.randint(1, 6))]
+        poly_events.append({'id': str(i), 'title': questions[i], 'slug': f'ev-{i}',
+                            'endDate': END_DATE, 'markets': markets})
+    poly_markets = [_poly_market(rng, 10 ** 7 + i, questions[n_counts['poly_events'] + i])
+                    for i in range(n_counts['poly_markets'])]
+
+    def title(i):
+        return rng.choice(questions).upper() if rng.random() < 0.33 else _question(rng, 10 ** 8 + i)
+
+    kalshi_events = []
+    for i in range(n_counts['kalshi_events']):
+        markets = [_kalshi_market(rng, i * 100 + j, f'OPTION {j}') for j in range(rng.randint(1, 8))]
+        kalshi_events.append({'event_ticker': f'KE-{i}', 'title': title(i), 'close_date': END_DATE,
+                              'markets': markets})
+    kalshi_markets = [_kalshi_market(rng, 10 ** 7 + i, title(n_counts['kalshi_events'] + i))
+                      for i in range(n_counts['kalshi_markets'])]
+    return {'poly_events': poly_events, 'poly_markets': poly_markets,
+            'kalshi_events': kalshi_events, 'kalshi_markets': kalshi_markets}
+
+
+def synth_rss(items, seed=13):
+    """Google News-shaped RSS with `items` headlines drawn from a skewed vocabulary."""
+    rng = random.Random(seed)
+    vocab = WORDS + tuple(f'topic{i}' for i in range(200))
+    weights = [1 / (i + 1) for i in range(len(vocab))]   # Zipf-ish: a few words dominate
+    out = ['<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>News</title>']
+    for i in range(items):
+        words = ' '.join(rng.choices(vocab, weights, k=rng.randint(6, 12)))
+        out.append(f'<item><title>{words.title()} - Source {i % 17}</title>'
+                   f'<link>https://news.example/{i}</link><pubDate>Mon, 01 Jan 2029 00:00:00 GMT</pubDate>'
+                   f'<source url="https://news.example">Source {i % 17}</source></item>')
+    out.append('</channel></rss>')
+    return ''.join(out).encode()
+
+
+def _clone(records, copies, rename):
+    """Scale recorded records by cloning them under new names/ids."""
+    out = list(records)
+    for k in range(1, copies):
+        for r in records:
+            c = copy.deepcopy(r)
+            rename(c, k)
+            out.append(c)
+    return out
+
+
+def _rename_poly(r, k):
+    for field in ('title', 'question'):
+        if r.get(field):
+            r[field] = f'{r[field]} [{k}]'
+    r['id'] = f"{r.get('id')}-{k}"
+    for m in r.get('markets') or []:
+        _rename_poly(m, k)
+
+
+def _rename_kalshi(r, k):
+    if r.get('title'):
+        r['title'] = f"{r['title']} [{k}]"
+    for field in ('ticker', 'event_ticker'):
+        if r.get(field):
+            r[field] = f'{r[field]}-{k}'
+
+
+def load_fixtures(scale):
+    """(raw page bodies per source, raw RSS bodies, origin) at `scale`× today's volume."""
+    recorded = all(os.path.exists(os.path.join(FIXTURE_DIR, f)) for f, _, _ in SOURCES.values())
+    if recorded:
+        records = {}
+        for name, (fname, _, _) in SOURCES.items():
+            with open(os.path.join(FIXTURE_DIR, fname)) as f:
+                data = json.load(f)
+            rename = _rename_poly if name.startswith('poly') else _rename_kalshi
+            records[name] = _clone(data, scale, rename)
+        origin = 'recorded'
+    else:
+        counts = {name: size * depth * scale for name, (_, size, depth) in SOURCES.items()}
+        records = synth_pages(counts)
+        origin = 'synthetic'
+    pages = {}
+    for name, (_, size, _) in SOURCES.items():
+        recs = records[name]
+        if name.startswith('kalshi'):
+            key = name.split('_')[1]
+            pages[name] = [json.dumps({key: recs[i:i + size], 'cursor': ''}).encode()
+                           for i in range(0, len(recs), size)]
+        else:
+            pages[name] = [json.dumps(recs[i:i + size]).encode() for i in range(0, len(recs), size)]
+
+    news_path = os.path.join(FIXTURE_DIR, NEWS_FIXTURE)
+    if os.path.exists(news_path):
+        with open(news_path, 'rb') as f:
+            base = f.read()
+        feeds = [base] * (NEWS_FEEDS * scale)
+    else:
+        feeds = [synth_rss(NEWS_ITEMS, seed=13 + i) for i in range(NEWS_FEEDS * scale)]
+    return pages, feeds, origin
+
+
+def record_fixtures():
+    """Save one poll's worth of raw upstream pages + a news feed into bench/fixtures/."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    cache = MarketCache()
+    records = {name: [] for name in SOURCES}
+    for name, (fname, size, depth) in SOURCES.items():
+        for page in range(depth):
+            if name == 'poly_events':
+                url = f'https://gamma-api.polymarket.com/events?limit=100&active=true&closed=false&order=volume24hr&ascending=false&offset={page * size}'
+            elif name == 'poly_markets':
+                url = f'https://gamma-api.polymarket.com/markets?limit=200&active=true&closed=false&order=volume24hr&ascending=false&offset={page * size}'
+            else:
+                continue
+            records[name].extend(cache._fetch_json(url, 15) or [])
+    for name, kind, url in (
+            ('kalshi_events', 'events', 'https://api.elections.kalshi.com/trade-api/v2/events?limit=100&with_nested_markets=true&status=open'),
+            ('kalshi_markets', 'markets', 'https://api.elections.kalshi.com/trade-api/v2/markets?limit=200&status=open')):
+        cursor = ''
+        for _ in range(SOURCES[name][2]):
+            data = cache._fetch_json(url + (f'&cursor={cursor}' if cursor else ''), 15) or {}
+            records[name].extend(data.get(kind) or [])
+            cursor = data.get('cursor')
+            if not cursor:
+                break
+    for name, (fname, _, _) in SOURCES.items():
+        with open(os.path.join(FIXTURE_DIR, fname), 'w') as f:
+            json.dump(records[name], f)
+        print(f'  recorded {len(records[name]):>6} {name}')
+    body = server.upstream_pool.get('https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en', timeout=10).body
+    with open(os.path.join(FIXTURE_DIR, NEWS_FIXTURE), 'wb') as f:
+        f.write(body)
+    print(f'  recorded {len(body):>6} bytes of news RSS')
+
+
+# ─── Cases ─────────────────────────────────────────────────────
+
+class _ReplayPool:
+    """Stands in for server.upstream_pool: serves RSS bodies round-robin."""
+
+    def __init__(self, bodies):
+        self.bodies, self.i = bodies, 0
+
+    def get(self, url, headers=None, timeout=None):
+        body = self.bodies[self.i % len(self.bodies)]
+        self.i += 1
+        return UpstreamResponse(200, {}, body)
+
+
+def _parse_source(cache, name, pages):
+    """What _fetch_<name> does with each page after the network: decode, parse, dedup."""
+    parse = getattr(cache, '_parse_' + name)
+    out = []
+    for body in pages:
+        data = json.loads(body)
+        out.extend(parse(data[name.split('_')[1]] if name.startswith('kalshi') else data))
+    return cache._dedup(out)
+
+
+def build_cases(scale):
+    """[(name, setup() → state, run(state))] for one scale."""
+    pages, feeds, origin = load_fixtures(scale)
+    cache = MarketCache()
+    parsed = {name: _parse_source(cache, name, pages[name]) for name in SOURCES}
+    merged = _assign_keys(cache._merge_markets(*[parsed[n] for n in SOURCES]))
+    payload = {'markets': merged, 'version': 1, 'status': 'live', 'lastUpdate': 0,
+               'polyCount': 0, 'kalshiCount': 0, 'error': None}
+
+    trending = TrendingCache()
+    trending._save_snapshot = lambda: None
+    headlines = [h for feed in _replay_rss(feeds) for h in feed]
+    _prime_trending(trending, headlines)
+    # One trending poll = NEWS_FEEDS queries, each answered with its share of the replayed headlines
+    chunks = itertools.cycle([headlines[i::NEWS_FEEDS] for i in range(NEWS_FEEDS)])
+    trending._fetch_news_headlines = lambda q: next(chunks)
+
+    cases = [(f'parse_{name}', lambda n=name: None, lambda _, n=name: _parse_source(cache, n, pages[n]))
+             for name in SOURCES]
+    cases += [
+        ('parse_merge', lambda: None, lambda _: _parse_and_merge(cache, pages)),
+        ('merge', lambda: [parsed[n] for n in SOURCES], lambda feeds_: _assign_keys(cache._merge_markets(*feeds_))),
+        ('spread_index', lambda: None, lambda _: SpreadIndex().updated(merged)),
+        ('rss_parse', lambda: None, lambda _: _replay_rss(feeds)),
+        ('extract_keywords', lambda: None, lambda _: trending._extract_keywords(headlines)),
+        ('trending_cycle', lambda: None, lambda _: trending._fetch_and_analyze()),
+        ('encode_json', lambda: None, lambda _: server._encode_json(payload)),
+        ('encode_snapshot', lambda: None, lambda _: EncodedSnapshot(payload)),
+        ('encode_columnar', lambda: None, lambda _: EncodedSnapshot(server._columnar_payload(payload))),
+    ]
+    sizes = {name: len(parsed[name]) for name in SOURCES}
+    sizes.update(merged=len(merged), headlines=len(headlines))
+    return cases, sizes, origin
+
+
+def _parse_and_merge(cache, pages):
+    """One full poll's worth of market work: parse every source, merge, key."""
+    return _assign_keys(cache._merge_markets(*[_parse_source(cache, n, pages[n]) for n in SOURCES]))
+
+
+def market_footprint(scale):
+    """KB per 10k merged markets held by one poll's parsed + merged records, and by
+    each further snapshot version merged from the same parsed records (what every
+    entry of the delta ring costs while markets don't change)."""
+    pages, _, _ = load_fixtures(scale)
+    cache = MarketCache()
+    tracemalloc.start()
+    t0, _ = tracemalloc.get_traced_memory()
+    parsed = [_parse_source(cache, n, pages[n]) for n in SOURCES]
+    merged = _assign_keys(cache._merge_markets(*parsed))
+    t1, _ = tracemalloc.get_traced_memory()
+    again = _assign_keys(cache._merge_markets(*parsed))
+    t2, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_10k = 1e4 / len(merged) / 1024
+    del parsed, again
+    return (t1 - t0) * per_10k, (t2 - t1) * per_10k
+
+
+def _replay_rss(feeds):
+    """Headlines per feed via the real RSS path (TrendingCache._fetch_news_headlines)."""
+    reader = TrendingCache()
+    real_pool, server.upstream_pool = server.upstream_pool, _ReplayPool(feeds)
+    try:
+        return [reader._fetch_news_headlines('bench') for _ in feeds]
+    finally:
+        server.upstream_pool = real_pool
+
+
+def _prime_trending(trending, headlines):
+    """Load a full day of keyword history through the warm-start path (format-stable)."""
+    rng = random.Random(5)
+    counts = trending._extract_keywords(headlines)
+    history = {kw: [max(0, c + rng.randint(-2, 2)) for _ in range(TrendingCache.HISTORY_LEN)]
+               for kw, c in counts.items()}
+    real_dir = server.SNAPSHOT_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        server.SNAPSHOT_DIR = tmp
+        try:
+            body = json.dumps({'history': history, 'keywords': [], 'lastUpdate': 0}).encode()
+            with open(os.path.join(tmp, TrendingCache.SNAPSHOT_FILE), 'wb') as f:
+                f.write(gzip.compress(body))
+            trending._load_snapshot()
+        finally:
+            server.SNAPSHOT_DIR = real_dir
+
+
+def measure(setup, run, min_time=0.5, min_ops=1):
+    """ops/sec (from the median op, robust to noisy neighbours) + mean ms, then one
+    traced run for allocations."""
+    times = []
+    while sum(times) < min_time or len(times) < min_ops:
+        state = setup()
+        t0 = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - t0)
+    median = statistics.median(times)
+    state = setup()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = run(state)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'opsPerSec': round(1 / median, 3), 'meanMs': round(statistics.fmean(times) * 1e3, 3),
+            'peakKB': round((peak - before) / 1024, 1), 'retainedKB': round((after - before) / 1024, 1)}
+
+
+# ─── Baseline ──────────────────────────────────────────────────
+
+def compare(results, baseline, tolerance):
+    """Print per-case deltas; return the list of regressions."""
+    failures = []
+    print(f'\ncomparison against baseline (tolerance {tolerance:.0%}):')
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            print(f'  {key:<34} new case')
+            continue
+        speed = cur['opsPerSec'] / base['opsPerSec'] - 1 if base['opsPerSec'] else 0.0
+        alloc = cur['peakKB'] / base['peakKB'] - 1 if base['peakKB'] > 64 else 0.0
+        bad = speed < -tolerance or alloc > tolerance
+        print(f'  {key:<34} speed {speed:+7.1%}  peak alloc {alloc:+7.1%}  {"REGRESSION" if bad else "ok"}')
+        if bad:
+            failures.append(key)
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('--scales', default='1,10', help='comma-separated multiples of today\'s volume')
+    ap.add_argument('--cases', default='', help='comma-separated case names (default: all)')
+    ap.add_argument('--min-time', type=float, default=0.5, help='seconds of timing per case')
+    ap.add_argument('--baseline', default=DEFAULT_BASELINE)
+    ap.add_argument('--save', action='store_true', help='write results as the new baseline')
+    ap.add_argument('--compare', action='store_true', help='fail if slower/larger than the baseline')
+    ap.add_argument('--tolerance', type=float, default=0.25)
+    ap.add_argument('--record', action='store_true', help='record live upstream fixtures and exit')
+    args = ap.parse_args()
+
+    if args.record:
+        record_fixtures()
+        return
+    if args.compare and not os.path.exists(args.baseline):
+        # Timings are machine-specific, so no baseline ships with the repo — save one here first
+        ap.error(f'no baseline at {args.baseline}; run with --save on this machine first')
+
+    only = {c for c in args.cases.split(',') if c}
+    results = {}
+    quiet = contextlib.redirect_stderr(open(os.devnull, 'w'))   # server log lines from warm start/trending
+    for scale in [int(s) for s in args.scales.split(',') if s]:
+        with quiet:
+            cases, sizes, origin = build_cases(scale)
+        print(f'\n{scale}× ({origin}): ' + ', '.join(f'{k}={v}' for k, v in sizes.items()))
+        print(f'  {"case":<22} {"ops/sec":>10} {"mean ms":>10} {"peak KB":>10} {"retained KB":>12}')
+        for name, setup, run in cases:
+            if only and name not in only:
+                continue
+            with quiet:
+                r = measure(setup, run, min_time=args.min_time)
+            results[f'{name}@{scale}x'] = r
+            print(f'  {name:<22} {r["opsPerSec"]:>10.2f} {r["meanMs"]:>10.2f} '
+                  f'{r["peakKB"]:>10.0f} {r["retainedKB"]:>12.0f}')
+        with quiet:
+            poll_kb, version_kb = market_footprint(scale)
+        print(f'  market records per 10k markets: {poll_kb:,.0f} KB per poll, '
+              f'{version_kb:,.0f} KB per further snapshot version')
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        failures = compare(results, baseline, args.tolerance)
+        if not any(key in baseline for key in results):
+            print('\nno case in this run has a baseline entry — nothing was compared')
+            sys.exit(1)
+        if failures:
+            print(f'\n{len(failures)} regression(s): {", ".join(failures)}')
+            sys.exit(1)
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'savedAt': int(time.time()), 'results': results}, f, indent=1)
+        print(f'\nbaseline saved to {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,417 @@
+"""
+Load test — end-to-end MercuryHandler latency under open-loop traffic
+Run: python bench/loadgen.py [--rate 200] [--concurrency 64] [--duration 30] [--out report.json]
+
+Starts three processes, none of which touch the network:
+
+  1. a stand-in upstream serving synthetic Gamma / CLOB / Kalshi / Google News
+     payloads (same shapes as bench/bench_pipeline.py fixtures), with an
+     optional artificial latency;
+  2. server.py with every upstream URL rewritten to the stand-in (the real
+     HTTPPool, caches and pollers all run unchanged), on the --engine of
+     choice, optionally in pre-fork mode with --workers N;
+  3. this load generator.
+
+Traffic is open-loop: requests are scheduled at --rate per second (Poisson
+arrivals) regardless of how fast the server answers, and latency is measured
+from the scheduled start, so queueing inside the generator when all
+--concurrency connections are busy counts against the server (no coordinated
+omission). The route mix covers /api/markets (full, gzip, conditional and
+?since= deltas), /api/trending, /proxy/* chart history and static assets.
+
+The JSON report has throughput, error rate and p50/p95/p99/p999 latency per
+route; --compare prints the change against a previous report.
+"""
+
+import argparse
+import collections
+import gzip
+import http.client
+import http.server
+import json
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+
+# route=weight pairs; each route name is built into a request by Workload.build
+DEFAULT_MIX = 'markets=30,markets_gzip=15,markets_304=10,markets_since=10,trending=10,poly_history=8,kalshi_candles=5,static=12'
+STATIC_ASSETS = ('/', '/index.html', '/scripts/data-bridge.js', '/scripts/charting.js', '/styles/main.css',
+                 '/styles/charting.css', '/favicon.svg')
+PERCENTILES = (('p50', 50), ('p95', 95), ('p99', 99), ('p999', 99.9))
+LATE_WARN_MS = 50   # p99 start lateness past this means every connection was busy — the rate exceeds capacity
+
+
+# ─── Stand-in upstream ─────────────────────────────────────────
+
+def _upstream_payloads(scale):
+    from bench_pipeline import SOURCES, synth_pages, synth_rss
+    counts = {name: size * depth * scale for name, (_, size, depth) in SOURCES.items()}
+    return synth_pages(counts), [synth_rss(30, seed=13 + i) for i in range(7)]
+
+
+class _UpstreamHandler(http.server.BaseHTTPRequestHandler):
+    """Paths arrive as /<original host>/<original path>?<query>."""
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real upstreams
+    pages = None
+    feeds = None
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(random.expovariate(1 / self.latency))
+        parts = urllib.parse.urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        params = urllib.parse.parse_qs(parts.query)
+        status, ctype, body = 200, 'application/json', None
+        offset = int(params.get('offset', [0])[0] or 0)
+        limit = int(params.get('limit', [100])[0] or 100)
+        if host == 'gamma-api.polymarket.com' and path in ('events', 'markets'):
+            recs = self.pages['poly_' + path]
+            body = json.dumps(recs[offset:offset + limit])
+        elif host == 'api.elections.kalshi.com' and path.endswith(('/events', '/markets')):
+            kind = path.rsplit('/', 1)[1]
+            recs = self.pages['kalshi_' + kind]
+            start = int(params.get('cursor', [0])[0] or 0)
+            nxt = start + limit
+            body = json.dumps({kind: recs[start:nxt], 'cursor': str(nxt) if nxt < len(recs) else ''})
+        elif host == 'clob.polymarket.com' and path == 'prices-history':
+            now = int(time.time())
+            seed = hash(params.get('market', [''])[0]) & 0xffff
+            rng = random.Random(seed)
+            p, history = 0.5, []
+            for i in range(300):
+                p = min(0.99, max(0.01, p + rng.uniform(-0.02, 0.02)))
+                history.append({'t': now - (300 - i) * 300, 'p': round(p, 4)})
+            body = json.dumps({'history': history})
+        elif host == 'api.elections.kalshi.com' and path.endswith('/candlesticks'):
+            now = int(time.time())
+            body = json.dumps({'candlesticks': [
+                {'end_period_ts': now - i * 3600, 'volume': i * 10,
+                 'yes_price': {'open': 40, 'high': 45, 'low': 38, 'close': 42}} for i in range(200)]})
+        elif host == 'news.google.com':
+            ctype, body = 'application/xml', self.feeds[hash(parts.query) % len(self.feeds)]
+        else:
+            status, body = 404, json.dumps({'error': 'unknown stand-in route'})
+        body = body if isinstance(body, bytes) else body.encode()
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            body = gzip.compress(body, compresslevel=1)
+            encoded = True
+        else:
+            encoded = False
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        if encoded:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_upstream(port, latency_ms, scale):
+    _UpstreamHandler.pages, _UpstreamHandler.feeds = _upstream_payloads(scale)
+    _UpstreamHandler.latency = latency_ms / 1000
+    srv = http.server.ThreadingHTTPServer(('127.0.0.1', port), _UpstreamHandler)
+    srv.daemon_threads = True
+    print(f'ready {srv.server_address[1]}', flush=True)
+    srv.serve_forever()
+
+
+# ─── Server under test ─────────────────────────────────────────
+
+def run_server(port, upstream, workers=1):
+    """server.py's own startup, with upstream hosts rewritten to the stand-in."""
+    import server
+
+    class RewritingPool(server.HTTPPool):
+        def request(self, url, **kwargs):
+            parts = urllib.parse.urlsplit(url)
+            url = f'{upstream}/{parts.hostname}{parts.path}' + (f'?{parts.query}' if parts.query else '')
+            return super().request(url, **kwargs)
+
+    server.upstream_pool = RewritingPool()
+    server.MercuryHandler.log_message = lambda *a: None   # stderr logging would dominate
+    server.static_cache.load_all()
+    if workers > 1:
+        if not port:
+            with socket.create_server(('127.0.0.1', 0)) as probe:   # workers must share one port
+                port = probe.getsockname()[1]
+        print(f'ready {port}', flush=True)
+        return server.serve_prefork(workers, '127.0.0.1', port)
+    server.market_cache.start()
+    server.trending_cache.start()
+    server.sse_broadcaster.start()
+    srv = server.make_server(('127.0.0.1', port), server.MercuryHandler)
+    print(f'ready {srv.server_address[1]}', flush=True)
+    srv.serve_forever()
+
+
+def _spawn(args, env=None):
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)] + args, stdout=subprocess.PIPE,
+                            env=env, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith('ready'):
+        proc.kill()
+        raise RuntimeError(f'child {args[0]} failed to start')
+    return proc, int(line.split()[1])
+
+
+def _wait_live(port, timeout=60):
+    """Block until the first poll has published markets."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/api/markets?limit=1')
+            data = json.loads(conn.getresponse().read())
+            conn.close()
+            if data.get('status') == 'live':
+                return data
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.25)
+    raise RuntimeError('server never went live')
+
+
+# ─── Load generator ────────────────────────────────────────────
+
+class Workload:
+    """Builds requests for each route name from live server state."""
+
+    def __init__(self, port):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.request('GET', '/api/markets')
+        resp = conn.getresponse()
+        data = json.loads(resp.read())
+        self.etag = resp.getheader('ETag')
+        self.version = data.get('version')
+        conn.close()
+        markets = data.get('markets') or []
+        self.tokens = [m['_clobTokenId'] for m in markets if m.get('_clobTokenId')][:500] or ['0']
+        self.tickers = [m['_kalshiTicker'] for m in markets if m.get('_kalshiTicker')][:500] or ['KX-0']
+
+    def build(self, route, rng):
+        if route == 'markets':
+            return '/api/markets', {}
+        if route == 'markets_gzip':
+            return '/api/markets', {'Accept-Encoding': 'gzip'}
+        if route == 'markets_304':
+            return '/api/markets', {'Accept-Encoding': 'gzip', 'If-None-Match': self.etag or '"none"'}
+        if route == 'markets_since':
+            return f'/api/markets?since={self.version}', {'Accept-Encoding': 'gzip'}
+        if route == 'trending':
+            return '/api/trending', {'Accept-Encoding': 'gzip'}
+        if route == 'poly_history':
+            # A small hot set — many dashboards open the same few charts
+            token = self.tokens[min(int(rng.paretovariate(1.2)) - 1, len(self.tokens) - 1)]
+            return f'/proxy/polymarket-clob/prices-history?market={token}&interval=1d&fidelity=5', {}
+        if route == 'kalshi_candles':
+            ticker = self.tickers[min(int(rng.paretovariate(1.2)) - 1, len(self.tickers) - 1)]
+            return f'/proxy/kalshi/series/X/markets/{ticker}/candlesticks?period_interval=60', {}
+        if route == 'static':
+            return rng.choice(STATIC_ASSETS), {'Accept-Encoding': 'gzip'}
+        raise ValueError(f'unknown route {route!r}')
+
+
+def _percentile(sorted_vals, pct):
+    if not sorted_vals:
+        return None
+    idx = min(len(sorted_vals) - 1, max(0, int(round(pct / 100 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[idx]
+
+
+def run_load(port, mix, rate, concurrency, duration, warmup, seed=1):
+    """Open-loop load; returns {route: [(latency_s, status, bytes)]} and the sorted start lateness
+    (seconds a request waited past its scheduled time for a free connection) for the measured window."""
+    workload = Workload(port)
+    routes, weights = zip(*mix.items())
+    rng = random.Random(seed)
+    pending = queue.Queue()
+    results = collections.defaultdict(list)
+    lateness = []
+    lock = threading.Lock()
+    measure_from = time.perf_counter() + warmup
+
+    def worker():
+        conn = None
+        wrng = random.Random(rng.random())
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            scheduled, route = item
+            late = time.perf_counter() - scheduled
+            path, headers = workload.build(route, wrng)
+            status, size = 0, 0
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+                size = len(resp.read())
+                status = resp.status
+                if resp.will_close:
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException):
+                if conn is not None:
+                    conn.close()
+                conn = None
+            latency = time.perf_counter() - scheduled
+            if scheduled >= measure_from:
+                with lock:
+                    results[route].append((latency, status, size))
+                    lateness.append(late)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    # Poisson arrivals at `rate`; each request's clock starts at its scheduled time
+    start = time.perf_counter()
+    end = start + warmup + duration
+    next_at = start
+    while next_at < end:
+        now = time.perf_counter()
+        if next_at > now:
+            time.sleep(next_at - now)
+        pending.put((next_at, rng.choices(routes, weights)[0]))
+        next_at += rng.expovariate(rate)
+    for _ in threads:
+        pending.put(None)
+    for t in threads:
+        t.join(timeout=60)
+    return results, sorted(lateness)
+
+
+def summarize(results, duration):
+    def stats(samples):
+        lat = sorted(s[0] for s in samples)
+        errors = sum(1 for s in samples if not 200 <= s[1] < 400)
+        out = {
+            'requests': len(samples),
+            'throughput': round(len(samples) / duration, 2),
+            'errors': errors,
+            'errorRate': round(errors / len(samples), 5) if samples else 0.0,
+            'status': dict(collections.Counter(str(s[1]) for s in samples)),
+            'bytesPerSec': round(sum(s[2] for s in samples) / duration),
+            'meanMs': round(sum(lat) / len(lat) * 1e3, 3) if lat else None,
+            'maxMs': round(lat[-1] * 1e3, 3) if lat else None,
+        }
+        for name, pct in PERCENTILES:
+            v = _percentile(lat, pct)
+            out[name + 'Ms'] = round(v * 1e3, 3) if v is not None else None
+        return out
+
+    routes = {route: stats(samples) for route, samples in sorted(results.items())}
+    total = stats([s for samples in results.values() for s in samples])
+    return routes, total
+
+
+def compare(report, previous):
+    print(f'\nchange vs previous report:')
+    for route, cur in list(report['routes'].items()) + [('TOTAL', report['total'])]:
+        prev = previous['total'] if route == 'TOTAL' else previous['routes'].get(route)
+        if not prev:
+            continue
+        cells = []
+        for key in ('throughput', 'p50Ms', 'p99Ms', 'p999Ms', 'errorRate'):
+            a, b = prev.get(key), cur.get(key)
+            if a and b is not None:
+                cells.append(f'{key} {b / a - 1:+7.1%}')
+            else:
+                cells.append(f'{key} {"n/a":>7}')
+        print(f'  {route:<16} ' + '  '.join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('--rate', type=float, default=200, help='requests per second (open loop)')
+    ap.add_argument('--concurrency', type=int, default=64, help='client connections / worker threads')
+    ap.add_argument('--duration', type=float, default=30, help='measured seconds')
+    ap.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before the window')
+    ap.add_argument('--mix', default=DEFAULT_MIX, help='route=weight,... (routes: %(default)s)')
+    ap.add_argument('--scale', type=int, default=1, help='stand-in market volume (× today)')
+    ap.add_argument('--upstream-latency', type=float, default=50, help='mean stand-in latency, ms')
+    ap.add_argument('--engine', choices=('threaded', 'pool'), default='threaded',
+                    help='server engine (SERVER_ENGINE): thread per connection or HTTP/1.1 worker pool')
+    ap.add_argument('--workers', type=int, default=1, help='server worker processes (pre-fork mode when > 1)')
+    ap.add_argument('--server', help='load an already-running server at host:port instead')
+    ap.add_argument('--out', help='write the JSON report here')
+    ap.add_argument('--compare', help='previous JSON report to diff against')
+    ap.add_argument('--serve-upstream', type=int, help=argparse.SUPPRESS)
+    ap.add_argument('--serve-mercury', type=int, help=argparse.SUPPRESS)
+    ap.add_argument('--upstream', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve_upstream is not None:
+        return run_upstream(args.serve_upstream, args.upstream_latency, args.scale)
+    if args.serve_mercury is not None:
+        return run_server(args.serve_mercury, args.upstream, args.workers)
+
+    mix = {k: float(v) for k, v in (p.split('=') for p in args.mix.split(',') if p)}
+    children = []
+    try:
+        if args.server:
+            port = int(args.server.rsplit(':', 1)[1])
+        else:
+            upstream, up_port = _spawn(['--serve-upstream', '0', '--upstream-latency', str(args.upstream_latency),
+                                        '--scale', str(args.scale)])
+            children.append(upstream)
+            scratch = tempfile.mkdtemp(prefix='mercury-load-')
+            env = dict(os.environ, SNAPSHOT_DIR=scratch, SHARED_DIR=os.path.join(scratch, 'shared'),
+                       SERVER_ENGINE=args.engine)
+            mercury, port = _spawn(['--serve-mercury', '0', '--upstream', f'http://127.0.0.1:{up_port}',
+                                    '--workers', str(args.workers)], env=env)
+            children.append(mercury)
+        live = _wait_live(port)
+        print(f'server live on :{port} ({live.get("polyCount")} poly / {live.get("kalshiCount")} kalshi records); '
+              f'{args.rate:g} req/s × {args.duration:g}s, {args.concurrency} connections')
+        results, lateness = run_load(port, mix, args.rate, args.concurrency, args.duration, args.warmup)
+    finally:
+        for proc in children:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    routes, total = summarize(results, args.duration)
+    report = {
+        'config': {'rate': args.rate, 'concurrency': args.concurrency, 'duration': args.duration,
+                   'warmup': args.warmup, 'mix': mix, 'scale': args.scale,
+                   'upstreamLatencyMs': args.upstream_latency, 'engine': args.engine, 'workers': args.workers, 'python': sys.version.split()[0]},
+        # How long requests waited past their scheduled start for a free connection
+        'startLateness': {name + 'Ms': round((_percentile(lateness, pct) or 0) * 1e3, 3) for name, pct in PERCENTILES},
+        'routes': routes,
+        'total': total,
+    }
+    print(f'\n  {"route":<16} {"req/s":>8} {"err%":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"p999 ms":>8}')
+    for route, r in list(routes.items()) + [('TOTAL', total)]:
+        print(f'  {route:<16} {r["throughput"]:>8.1f} {r["errorRate"] * 100:>6.2f} {r["p50Ms"]:>8.1f} '
+              f'{r["p95Ms"]:>8.1f} {r["p99Ms"]:>8.1f} {r["p999Ms"]:>8.1f}')
+    late_p99 = report['startLateness']['p99Ms']
+    if late_p99 > LATE_WARN_MS:
+        print(f'\n  warning: p99 request start {late_p99:.0f} ms behind schedule — offered rate exceeds capacity')
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f'\nreport written to {args.out}')
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
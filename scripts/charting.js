@@ -2788,9 +2788,9 @@ async function fetchBondingMarkets() {
   // Sort by endDate ascending + end_date_min=today to skip expired unresolved markets.
   const todayStr = new Date().toISOString().slice(0, 10);
   const polyQs = `markets?limit=500&active=true&closed=false&order=endDate&ascending=true&end_date_min=${todayStr}`;
+  // Issued in the same tick, so both go out as one /api/batch request
   const [polyRaw, kalshiMarkets] = await Promise.all([
-    LM._fetchWithFallback(`${LM._polyBase}${polyQs}`, `${LM._polyDirect}${polyQs}`)
-      .then(r => r.ok ? r.json() : []).catch(() => []),
+    LM._proxyJSON(`${LM._polyBase}${polyQs}`, `${LM._polyDirect}${polyQs}`).catch(() => []),
     LM.fetchKalshiMarkets(200).catch(() => []),
   ]);
 
@@ -3836,6 +3836,15 @@ async function _fetchAndRenderPriceChart(market, plat, price, changeNum, chartCo
     console.warn('[Mercury] Historical price fetch error:', e.message);
   }
 
+  // Fallback: server-side candles from the poller's history store
+  if (priceHistory.length < 5 && LM && market._key) {
+    const candles = await LM.fetchServerOHLC(market._key, _mdChartTf, cutoff);
+    if (candles.length >= 3) {
+      candleData = candles;
+      priceHistory = candles.map(c => ({ x: c.t, y: c.price }));
+    }
+  }
+
   // Fallback: in-memory live snapshots
   if (priceHistory.length < 5 && LM) {
     const liveHist = LM.getPriceHistory(market.short);
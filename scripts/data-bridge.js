@@ -242,7 +242,12 @@ function _parseNoTokenId(clobTokenIds) {
 const MercuryLiveMarkets = {
   _cache: new Map(),
   _priceHistory: new Map(),  // short -> [{t, price}]
+  _serverMarkets: null,      // Last /api/markets list — base for ?since= deltas
+  _serverVersion: null,      // Snapshot version of _serverMarkets
   _proxyFailed: false,       // True after first proxy failure — skip proxy on subsequent calls
+  _batchQueue: null,         // Proxy calls waiting for the next /api/batch flush
+  _batchFailed: false,       // True once /api/batch turns out not to exist — one request per call again
+  _batchMax: 50,             // Server's BATCH_MAX_PATHS
 
   // Use local proxy when running on localhost (avoids CORS), direct URLs otherwise
   // Always use nginx proxy paths — works on both localhost (server.py) and VPS (nginx)
@@ -273,6 +278,79 @@ const MercuryLiveMarkets = {
     return fetch(directUrl, { signal: AbortSignal.timeout(timeout) });
   },
 
+  async _fetchJSON(proxyUrl, directUrl, opts = {}) {
+    const resp = await this._fetchWithFallback(proxyUrl, directUrl, opts);
+    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    return resp.json();
+  },
+
+  // Proxy GET → parsed JSON. Calls made in the same tick share one /api/batch request,
+  // which streams a line per call as its upstream answers, so the fastest resolve first
+  _proxyJSON(proxyUrl, directUrl, opts = {}) {
+    if (this._batchFailed || this._proxyFailed) return this._fetchJSON(proxyUrl, directUrl, opts);
+    return new Promise((resolve, reject) => {
+      if (!this._batchQueue) {
+        this._batchQueue = [];
+        setTimeout(() => this._flushBatch(), 0);
+      }
+      this._batchQueue.push({ proxyUrl, directUrl, opts, resolve, reject });
+    });
+  },
+
+  _flushBatch() {
+    const queue = this._batchQueue;
+    this._batchQueue = null;
+    for (let i = 0; i < queue.length; i += this._batchMax) this._sendBatch(queue.slice(i, i + this._batchMax));
+  },
+
+  async _sendBatch(calls) {
+    const single = (c) => this._fetchJSON(c.proxyUrl, c.directUrl, c.opts).then(c.resolve, c.reject);
+    if (calls.length === 1) return single(calls[0]);
+    const pending = new Set(calls);
+    const timeout = Math.max(...calls.map(c => c.opts.timeout || 8000));
+    let resp;
+    try {
+      const qs = calls.map(c => `path=${encodeURIComponent(c.proxyUrl)}`).join('&');
+      resp = await fetch(`/api/batch?${qs}`, { signal: AbortSignal.timeout(timeout) });
+    } catch (_) {
+      resp = null;
+    }
+    if (!resp || !resp.ok) {
+      // Only a missing endpoint (e.g. a proxy that doesn't route it) turns batching off;
+      // a timeout or server error just sends this batch's calls one by one
+      if (resp && (resp.status === 404 || resp.status === 405)) {
+        this._batchFailed = true;
+        console.log('[LiveMarkets] /api/batch unavailable — sending proxy calls one by one');
+      }
+      return calls.forEach(single);
+    }
+    try {
+      const reader = resp.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines) {
+          let result;
+          try { result = JSON.parse(line); } catch (_) { continue; }  // unanswered calls go out alone below
+          const call = calls[result.i];
+          if (!pending.delete(call)) continue;
+          if (result.status < 400 && 'body' in result) call.resolve(result.body);
+          else call.reject(new Error(result.error || `HTTP ${result.status}`));
+        }
+      }
+    } catch (e) {
+      for (const call of pending) call.reject(e);
+      return;
+    }
+    // Stream ended early — whatever it didn't answer goes out on its own
+    pending.forEach(single);
+  },
+
   // ═══════════════════════════════════════════
   // POLYMARKET — Gamma API (Events + Markets)
   // ═══════════════════════════════════════════
@@ -402,9 +480,7 @@ const MercuryLiveMarkets = {
 
     try {
       const qs = `markets?limit=${limit}&status=open`;
-      const resp = await this._fetchWithFallback(`${this._kalshiBase}${qs}`, `${this._kalshiDirect}${qs}`);
-      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-      const json = await resp.json();
+      const json = await this._proxyJSON(`${this._kalshiBase}${qs}`, `${this._kalshiDirect}${qs}`);
       const markets = (json.markets || [])
         .filter(m => m.title && m.last_price > 0 && m.last_price < 100)
         .map(m => ({
@@ -512,9 +588,7 @@ const MercuryLiveMarkets = {
 
     try {
       const qs = `markets/trades?ticker=${encodeURIComponent(ticker)}&limit=${limit}`;
-      const resp = await this._fetchWithFallback(`${this._kalshiBase}${qs}`, `${this._kalshiDirect}${qs}`, { timeout: 6000 });
-      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-      const json = await resp.json();
+      const json = await this._proxyJSON(`${this._kalshiBase}${qs}`, `${this._kalshiDirect}${qs}`, { timeout: 6000 });
       const trades = (json.trades || []).map(t => ({
         price: t.yes_price || t.no_price || 0,
         count: t.count || 1,
@@ -536,9 +610,16 @@ const MercuryLiveMarkets = {
   async fetchAllMarkets() {
     // Fast path: use server-side cached /api/markets if available
     try {
-      const resp = await fetch('/api/markets', { signal: AbortSignal.timeout(5000) });
+      const since = this._serverMarkets && this._serverVersion != null ? `&since=${this._serverVersion}` : '';
+      const resp = await fetch(`/api/markets?format=columnar${since}`, { signal: AbortSignal.timeout(5000) });
       if (resp.ok) {
-        const data = await resp.json();
+        let data = await resp.json();
+        // Full lists arrive column-per-field; ?since= deltas stay row objects
+        if (data.format === 'columnar') data = this._decodeColumnar(data);
+        // Delta response: patch the previous list instead of re-downloading everything
+        if (data.delta) data.markets = this._applyMarketDelta(this._serverMarkets || [], data);
+        this._serverMarkets = data.markets || null;
+        this._serverVersion = data.version ?? null;
         if (data.markets && data.markets.length > 0) {
           console.log(`[LiveMarkets] Server cache: ${data.markets.length} markets (${data.status})`);
           // Record price snapshots for history
@@ -783,9 +864,7 @@ const MercuryLiveMarkets = {
 
     try {
       const qs = `prices-history?market=${encodeURIComponent(clobTokenId)}&interval=${interval}&fidelity=${fidelity}`;
-      const resp = await this._fetchWithFallback(`${this._clobBase}${qs}`, `${this._clobDirect}${qs}`, { timeout: 3000 });
-      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-      const json = await resp.json();
+      const json = await this._proxyJSON(`${this._clobBase}${qs}`, `${this._clobDirect}${qs}`, { timeout: 3000 });
       // CLOB returns { history: [{ t: unix_seconds, p: float_0_to_1 }] }
       const history = (json.history || []).map(h => ({
         t: (h.t || 0) * 1000, // convert seconds to ms
@@ -808,9 +887,7 @@ const MercuryLiveMarkets = {
 
     try {
       const qs = `markets/${encodeURIComponent(ticker)}/candlesticks?period_interval=${periodInterval}`;
-      const resp = await this._fetchWithFallback(`${this._kalshiBase}${qs}`, `${this._kalshiDirect}${qs}`, { timeout: 3000 });
-      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-      const json = await resp.json();
+      const json = await this._proxyJSON(`${this._kalshiBase}${qs}`, `${this._kalshiDirect}${qs}`, { timeout: 3000 });
       // Kalshi returns { candlesticks: [{ end_period_ts, yes_price: {open,high,low,close}, volume, ... }] }
       const candles = (json.candlesticks || []).map(c => ({
         t: new Date(c.end_period_ts || c.period_end || 0).getTime(),
@@ -859,10 +936,123 @@ const MercuryLiveMarkets = {
     }
   },
 
+  // Server-side 24h history for many markets in one call (ids are market `_key`s,
+  // sub-markets are `${marketKey}/${subKey}`). Returns {id: {t, price, bid, ask, vol}}.
+  async fetchServerHistory(ids, fromMs = 0, resSec = 60) {
+    if (!ids || ids.length === 0) return {};
+    try {
+      const qs = `ids=${encodeURIComponent(ids.join(','))}&from=${fromMs}&res=${resSec}`;
+      const resp = await fetch(`/api/history?${qs}`, { signal: AbortSignal.timeout(5000) });
+      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+      return (await resp.json()).series || {};
+    } catch (e) {
+      console.warn('[LiveMarkets] Server history fetch failed:', e.message);
+      return {};
+    }
+  },
+
+  // Server-built candles (1m bars rolled up to res) — same shape as fetchKalshiCandlesticks,
+  // but without volume (the server only samples 24h volume), so volume is 0 like lineToOHLC's
+  async fetchServerOHLC(id, res = '5m', fromMs = 0) {
+    if (!id) return [];
+    try {
+      const qs = `id=${encodeURIComponent(id)}&res=${res}&from=${fromMs}`;
+      const resp = await fetch(`/api/ohlc?${qs}`, { signal: AbortSignal.timeout(3000) });
+      if (!resp.ok) return [];
+      const { bars } = await resp.json();
+      return bars.t.map((t, i) => ({
+        t: t * 1000,
+        open: bars.o[i],
+        high: bars.h[i],
+        low: bars.l[i],
+        close: bars.c[i],
+        price: bars.c[i],
+        volume: 0,
+      }));
+    } catch (e) {
+      console.warn('[LiveMarkets] Server OHLC fetch failed:', e.message);
+      return [];
+    }
+  },
+
+  // Push updates from /api/markets/stream (SSE) — EventSource resumes via Last-Event-ID.
+  // Returns the EventSource so callers can close() it; onUpdate(markets, version).
+  subscribeMarkets(onUpdate) {
+    if (typeof EventSource === 'undefined') return null;
+    const es = new EventSource('/api/markets/stream');
+    const handle = (e) => {
+      const data = JSON.parse(e.data);
+      data.markets = data.delta ? this._applyMarketDelta(this._serverMarkets || [], data) : data.markets;
+      this._serverMarkets = data.markets || null;
+      this._serverVersion = data.version ?? null;
+      if (data.markets) onUpdate(data.markets, data.version);
+    };
+    es.addEventListener('snapshot', handle);
+    es.addEventListener('delta', handle);
+    return es;
+  },
+
   // ═══════════════════════════════════════════
   // HELPERS
   // ═══════════════════════════════════════════
 
+  // Apply a /api/markets?since= delta ({added, removed, changed, order}) to a keyed list
+  _applyMarketDelta(list, delta) {
+    const byKey = new Map(list.map(r => [r._key, r]));
+    for (const key of delta.removed || []) byKey.delete(key);
+    for (const r of delta.added || []) byKey.set(r._key, r);
+    for (const patch of delta.changed || []) {
+      const prev = byKey.get(patch.key);
+      if (!prev) continue;
+      const next = Object.assign({}, prev, patch.set || {});
+      for (const f of patch.unset || []) delete next[f];
+      if (patch.subs) next.subMarkets = this._applyMarketDelta(prev.subMarkets || [], patch.subs);
+      byKey.set(patch.key, next);
+    }
+    const order = delta.order || list.map(r => r._key);
+    return order.map(k => byKey.get(k)).filter(Boolean);
+  },
+
+  // Rebuild the market list from a /api/markets?format=columnar payload: one array per
+  // field ({dict, codes} for dictionary-coded strings); each market's subMarkets column
+  // is how many rows to take, in order, from the shared subMarkets table
+  _decodeColumnar(data) {
+    const { format, subMarkets, markets, ...meta } = data;
+    const subs = this._decodeColumnarTable(subMarkets);
+    const rows = this._decodeColumnarTable(markets);
+    let next = 0;
+    for (const m of rows) {
+      if (m.subMarkets != null) m.subMarkets = subs.slice(next, next += m.subMarkets);
+    }
+    meta.markets = rows;
+    return meta;
+  },
+
+  // Decoded a row at a time, assigning fields in column order so rows with the same
+  // fields share a shape. A null in one of table.optional's columns means the row lacks
+  // that field, so it is left off the row rather than set (deleting it later is slow).
+  _decodeColumnarTable(table) {
+    const { length, columns } = table;
+    const optional = new Set(table.optional || []);
+    const fields = Object.keys(columns).map((field) => {
+      const col = columns[field];
+      return Array.isArray(col)
+        ? { field, values: col, dict: null, optional: optional.has(field) }
+        : { field, values: col.codes, dict: col.dict, optional: optional.has(field) };
+    });
+    const rows = new Array(length);
+    for (let i = 0; i < length; i++) {
+      const row = {};
+      for (const { field, values, dict, optional } of fields) {
+        let v = values[i];
+        if (dict !== null && v !== null) v = dict[v];
+        if (v !== null || !optional) row[field] = v;
+      }
+      rows[i] = row;
+    }
+    return rows;
+  },
+
   _shortName(question) {
     if (!question) return '???';
     let q = question
@@ -4,43 +4,1629 @@ Run: python server.py
 Then open http://localhost:8080
 
 Architecture:
-  - Background thread polls Polymarket + Kalshi every 15s
+  - Background thread polls Polymarket + Kalshi per source (adaptive 5–60s, conditional GETs)
   - Caches combined market data in memory
-  - Frontend hits /api/markets (instant, no external calls)
-  - Proxy routes kept for chart history / candlestick endpoints
+  - Frontend hits /api/markets (instant, no external calls; ?format=columnar for a
+    column-per-field encoding of the full list; /api/spreads for the widest
+    executable cross-venue spreads)
+  - Proxy routes kept for chart history / candlestick endpoints; /api/batch resolves
+    many of them in one request and streams the results back as NDJSON
   - News proxy for Google News RSS → JSON
+  - SERVER_ENGINE=pool: HTTP/1.1 keep-alive on a bounded worker pool, 503 when saturated
+  - WORKERS=N: a poller process owns the caches and shares encoded snapshots
+    (mmap'd files) with N SO_REUSEPORT worker processes, restarted if they die
 """
 
+import array
+import bisect
+import collections
+import concurrent.futures
+import http.client
 import http.server
 import socketserver
-import urllib.request
+import ssl
+import struct
 import urllib.parse
+import email.utils
+import functools
+import gzip
+import hashlib
+import itertools
 import json
+import math
+import mimetypes
+import mmap
+import operator
 import os
+import random
 import sys
 import xml.etree.ElementTree as ET
 import re
 import html
+import selectors
+import socket
 import threading
 import time
 import traceback
 import signal
+import stat
+import tempfile
+
+try:
+    import brotli  # Optional — enables Content-Encoding: br
+except ImportError:
+    brotli = None
 
 PORT = int(os.environ.get('PORT', 8080))
 STATIC_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# How often to poll external APIs (seconds)
+# How often to poll external APIs (seconds) — the base per-source interval
 POLL_INTERVAL = 15
 
+# Adaptive polling: per-source interval bounds and error backoff ceiling (seconds)
+POLL_MIN_INTERVAL = float(os.environ.get('POLL_MIN_INTERVAL', 5))
+POLL_MAX_INTERVAL = float(os.environ.get('POLL_MAX_INTERVAL', 60))
+POLL_MAX_BACKOFF = float(os.environ.get('POLL_MAX_BACKOFF', 300))
+
+# Versions kept for /api/markets?since= deltas (~10 min at POLL_INTERVAL)
+DELTA_HISTORY = 40
+
+# Warm-start snapshots written after each update and loaded on startup
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(tempfile.gettempdir(), 'mercury-snapshots'))
+
+# Upstream pagination: pages per source, page-fetch workers, per-poll time budget
+PAGE_DEPTH = {
+    'poly_events': int(os.environ.get('POLY_EVENT_PAGES', 3)),      # 100 events/page
+    'poly_markets': int(os.environ.get('POLY_MARKET_PAGES', 3)),    # 200 markets/page
+    'kalshi_events': int(os.environ.get('KALSHI_EVENT_PAGES', 3)),  # 100 events/page
+    'kalshi_markets': int(os.environ.get('KALSHI_MARKET_PAGES', 3)),  # 200 markets/page
+}
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', 8))
+FETCH_BUDGET = float(os.environ.get('FETCH_BUDGET', 12))   # seconds per poll cycle
+
+# Server-side price history: fixed-size rings, SERIES × SLOTS × 10 bytes (~65MB default).
+# A poll yields ~2.2 series (markets + sub-markets) per upstream record (bench 1× fixture:
+# 1800 records → 3894 series), so the default tracks 2.5× what PAGE_DEPTH fetches
+_POLL_RECORDS = (100 * (PAGE_DEPTH['poly_events'] + PAGE_DEPTH['kalshi_events'])
+                 + 200 * (PAGE_DEPTH['poly_markets'] + PAGE_DEPTH['kalshi_markets']))
+HISTORY_SERIES = int(os.environ.get('HISTORY_SERIES', max(4096, _POLL_RECORDS * 5 // 2)))
+HISTORY_RESOLUTION = 60                                        # seconds per slot
+HISTORY_SLOTS = 24 * 3600 // HISTORY_RESOLUTION                # 24h of slots
+
+# Upstream keep-alive pool (Polymarket, Kalshi, Google News)
+UPSTREAM_MAX_PER_HOST = int(os.environ.get('UPSTREAM_MAX_PER_HOST', 8))
+UPSTREAM_IDLE_TIMEOUT = float(os.environ.get('UPSTREAM_IDLE_TIMEOUT', 30))  # seconds
+
+# Server engine: 'threaded' (thread per connection, HTTP/1.0) or 'pool' (HTTP/1.1
+# keep-alive on a bounded worker pool; requests beyond workers + queue get a 503)
+SERVER_ENGINE = os.environ.get('SERVER_ENGINE', 'threaded')
+ENGINE_WORKERS = int(os.environ.get('ENGINE_WORKERS', 32))
+ENGINE_QUEUE = int(os.environ.get('ENGINE_QUEUE', 256))              # requests waiting for a worker
+ENGINE_QUEUE_TIMEOUT = float(os.environ.get('ENGINE_QUEUE_TIMEOUT', 5))  # ...for at most this long
+ENGINE_MAX_CONNECTIONS = int(os.environ.get('ENGINE_MAX_CONNECTIONS', 2048))
+KEEPALIVE_TIMEOUT = float(os.environ.get('KEEPALIVE_TIMEOUT', 15))    # idle keep-alive seconds
+
+# Upstream calls made for /proxy/* misses at once; more wait briefly, then get a 503
+PROXY_MAX_IN_FLIGHT = int(os.environ.get('PROXY_MAX_IN_FLIGHT', 16))
+PROXY_QUEUE_TIMEOUT = 2.0   # seconds
+PROXY_UPSTREAM_TIMEOUT = 8  # seconds per upstream load
+
+# /api/batch: proxy paths resolved at once across all batch requests
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 16))
+
+# Pre-fork serving: WORKERS > 1 runs one poller process + N SO_REUSEPORT workers
+# that read market/trending snapshots from memory-mapped files in SHARED_DIR
+WORKERS = int(os.environ.get('WORKERS', 1))
+SHARED_DIR = os.environ.get('SHARED_DIR', os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), f'mercury-{PORT}'))
+SHARED_POLL_INTERVAL = 0.25   # seconds between workers' checks for a newer snapshot
+
+# ═══════════════════════════════════════════════════════════════
+# METRICS — Prometheus text exposition at /metrics
+# Hot paths only bump per-series counters under a per-metric lock;
+# gauges for cache sizes/ages are read from callbacks at scrape time.
+# ═══════════════════════════════════════════════════════════════
+
+# Histogram buckets (seconds / bytes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+POLL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 12, 15, 20, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _label_str(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for n, v in zip(names, values):
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{n}="{v}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter keyed by a label-value tuple."""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, n=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + n
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _label_str(self.labels, k), v) for k, v in sorted(items)]
+
+
+class Gauge(Counter):
+    """Settable gauge; inc() with a negative n decrements."""
+    kind = 'gauge'
+
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram; the bucket index is found outside the lock."""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}   # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *label_values):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._series.get(label_values)
+            if row is None:
+                row = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    def time(self, *label_values):
+        """Context manager observing elapsed seconds."""
+        return _Timer(self, label_values)
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        out = []
+        for key, row in sorted(items):
+            running = 0
+            for le, count in zip(self.buckets + ('+Inf',), row):
+                running += count
+                out.append((self.name + '_bucket', _label_str(self.labels + ('le',), key + (le,)), running))
+            out.append((self.name + '_sum', _label_str(self.labels, key), round(row[-1], 6)))
+            out.append((self.name + '_count', _label_str(self.labels, key), running))
+        return out
+
+
+class _Timer:
+    __slots__ = ('hist', 'labels', 't0')
+
+    def __init__(self, hist, labels):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, *self.labels)
+
+
+class _Collected:
+    """Metric whose samples come from fn() at scrape time → number or {label values: number}."""
+
+    def __init__(self, name, help_text, kind, fn, labels=()):
+        self.name, self.help, self.kind, self.fn, self.labels = name, help_text, kind, fn, tuple(labels)
+
+    def samples(self):
+        value = self.fn()
+        if isinstance(value, dict):
+            return [(self.name, _label_str(self.labels, k if isinstance(k, tuple) else (k,)), v)
+                    for k, v in sorted(value.items())]
+        return [(self.name, '', value)]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labels=()):
+        return self._add(Histogram(name, help_text, buckets, labels))
+
+    def collect(self, name, help_text, fn, kind='gauge', labels=()):
+        return self._add(_Collected(name, help_text, kind, fn, labels))
+
+    def render(self, match=None):
+        """Prometheus text format (version 0.0.4), optionally only names passing match()."""
+        with self._lock:
+            metrics = [m for m in self._metrics if match is None or match(m.name)]
+        lines = []
+        for m in metrics:
+            try:
+                samples = m.samples()
+            except Exception as e:
+                sys.stderr.write(f"\033[33m[metrics]\033[0m {m.name} collect failed: {e}\n")
+                continue
+            lines.append(f'# HELP {m.name} {m.help}')
+            lines.append(f'# TYPE {m.name} {m.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{labels} {value}')
+        return ('\n'.join(lines) + '\n').encode()
+
+
+metrics = MetricsRegistry()
+
+
+# ═══════════════════════════════════════════════════════════════
+# UPSTREAM HTTP POOL — persistent keep-alive connections per host
+# ═══════════════════════════════════════════════════════════════
+
+class UpstreamError(Exception):
+    """Upstream answered with an HTTP error status."""
+
+    def __init__(self, status, url, retry_after=None):
+        super().__init__(f'HTTP {status} from {url}')
+        self.status = status
+        self.retry_after = retry_after   # seconds, from a 429/503 Retry-After header
+
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+UpstreamResponse = collections.namedtuple('UpstreamResponse', 'status headers body')
+
+
+class HTTPPool:
+    """Thread-safe keep-alive connection pool shared by every upstream fetch."""
+
+    REDIRECTS = (301, 302, 303, 307, 308)
+
+    def __init__(self, max_per_host=UPSTREAM_MAX_PER_HOST, idle_timeout=UPSTREAM_IDLE_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._idle = {}        # (scheme, host, port) -> [(conn, returned_at)], most recent last
+        self._open = {}        # (scheme, host, port) -> open connections (idle + in use)
+        self._ssl = ssl.create_default_context()
+        self._requests = 0
+        self._reused = 0
+        self._connects = 0
+        self._errors = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def get(self, url, headers=None, timeout=15):
+        """GET `url`, following redirects; raises UpstreamError on 4xx/5xx."""
+        resp = self.request(url, headers=headers, timeout=timeout)
+        if resp.status >= 400:
+            raise UpstreamError(resp.status, url, _retry_after(resp.headers.get('Retry-After')))
+        return resp
+
+    def request(self, url, headers=None, timeout=15, method='GET', max_redirects=3):
+        for _ in range(max_redirects + 1):
+            resp = self._request_once(url, headers or {}, timeout, method)
+            location = resp.headers.get('Location')
+            if resp.status not in self.REDIRECTS or not location:
+                return resp
+            url = urllib.parse.urljoin(url, location)
+        return resp
+
+    def stats(self):
+        with self._cond:
+            return {
+                'requests': self._requests,
+                'connects': self._connects,
+                'reused': self._reused,
+                'reuseRate': round(self._reused / self._requests, 3) if self._requests else 0.0,
+                'errors': self._errors,
+                'waitMsTotal': round(self._wait_total * 1000, 1),
+                'waitMsMax': round(self._wait_max * 1000, 1),
+                'open': sum(self._open.values()),
+                'idle': sum(len(v) for v in self._idle.values()),
+            }
+
+    def close(self):
+        with self._cond:
+            for key, idle in self._idle.items():
+                for conn, _ in idle:
+                    conn.close()
+                self._open[key] -= len(idle)
+            self._idle = {}
+
+    def _request_once(self, url, headers, timeout, method):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {'Accept-Encoding': 'gzip', **headers}
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout, retry=attempt > 0)
+            try:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                conn.request(method, path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (ConnectionError, http.client.BadStatusLine) as e:
+                self._release(key, conn, reusable=False)
+                if reused and attempt == 0:
+                    continue  # Server closed an idle keep-alive socket — retry on a fresh one
+                self._count_error()
+                raise
+            except BaseException:
+                self._release(key, conn, reusable=False)
+                self._count_error()
+                raise
+            self._release(key, conn, reusable=not resp.will_close)
+            if resp.getheader('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            return UpstreamResponse(resp.status, resp.headers, body)
+
+    def _acquire(self, key, timeout, retry=False):
+        """A connection for `key` → (conn, reused). A retry (after a stale keep-alive
+        socket) is the same logical request, so it isn't counted again, and it always
+        gets a fresh connection — the other idle sockets may be just as stale."""
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        with self._cond:
+            if not retry:
+                self._requests += 1
+            while True:
+                idle = self._idle.get(key)
+                if retry and idle and self._open.get(key, 0) >= self.max_per_host:
+                    # Make room for the fresh connection by dropping the oldest idle one
+                    conn, _ = idle.pop(0)
+                    conn.close()
+                    self._open[key] -= 1
+                while idle and not retry:
+                    conn, returned_at = idle.pop()
+                    if time.monotonic() - returned_at < self.idle_timeout:
+                        self._reused += 1
+                        self._record_wait(time.monotonic() - t0)
+                        return conn, True
+                    conn.close()
+                    self._open[key] -= 1
+                if self._open.get(key, 0) < self.max_per_host:
+                    self._open[key] = self._open.get(key, 0) + 1
+                    self._connects += 1
+                    self._record_wait(time.monotonic() - t0)
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._errors += 1
+                    raise TimeoutError(f'upstream pool for {key[1]} exhausted')
+                self._cond.wait(remaining)
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _release(self, key, conn, reusable):
+        with self._cond:
+            if reusable:
+                self._idle.setdefault(key, []).append((conn, time.monotonic()))
+            else:
+                conn.close()
+                self._open[key] -= 1
+            self._cond.notify()
+
+    def _record_wait(self, waited):
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    def _count_error(self):
+        with self._cond:
+            self._errors += 1
+
+
+upstream_pool = HTTPPool()
+
+# ═══════════════════════════════════════════════════════════════
+# ENCODED SNAPSHOTS — serialize + compress once, serve many times
+# ═══════════════════════════════════════════════════════════════
+
+class EncodedSnapshot:
+    """Immutable pre-encoded JSON payload with compressed variants and validators."""
+
+    __slots__ = ('body', 'gzip', 'br', 'etag', 'last_modified', 'mtime')
+
+    def __init__(self, data, mtime=None):
+        self.body = _encode_json(data)
+        self.gzip = gzip.compress(self.body, compresslevel=6, mtime=0)
+        self.br = brotli.compress(self.body, quality=5) if brotli else None
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+        self.mtime = int(mtime if mtime is not None else time.time())
+        self.last_modified = email.utils.formatdate(self.mtime, usegmt=True)
+
+    def variant(self, accept_encoding):
+        """Pick the best (encoding, bytes) pair for an Accept-Encoding header."""
+        accepted = _parse_accept_encoding(accept_encoding)
+        if self.br is not None and accepted.get('br', 0) > 0:
+            return 'br', self.br
+        if self.gzip is not None and accepted.get('gzip', 0) > 0:
+            return 'gzip', self.gzip
+        return None, self.body
+
+    def is_current(self, if_none_match, if_modified_since):
+        """True when the client's cached copy matches this snapshot (→ 304)."""
+        if if_none_match:
+            # If-None-Match takes precedence over If-Modified-Since (RFC 9110 §13.2.2)
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or any(t.removeprefix('W/') == self.etag for t in tags)
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.mtime <= since
+        return False
+
+
+def _write_atomic(path, data):
+    """Write bytes via temp file + rename so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_snapshot(path):
+    """Decode a gzip'd JSON snapshot file (memory-mapped); None if missing/corrupt."""
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return json.loads(gzip.decompress(mm))
+    except (OSError, ValueError, EOFError):
+        return None
+
+
+def _parse_accept_encoding(header):
+    """Parse Accept-Encoding into {coding: q}. Missing q means 1.0."""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    if '*' in accepted:
+        for coding in ('br', 'gzip'):
+            accepted.setdefault(coding, accepted['*'])
+    return accepted
+
+# ═══════════════════════════════════════════════════════════════
+# MARKET RECORDS — slotted rows shared from parse to snapshot
+# Built once when a source is parsed, then passed by reference through
+# merge → snapshot → delta ring. A stage that needs a different value
+# copies the record instead of mutating it.
+# ═══════════════════════════════════════════════════════════════
+
+class Record:
+    """Base for slotted market records; reads like the wire dict it encodes to."""
+
+    __slots__ = ()
+    _internal = ()   # slots kept off the wire
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._values = operator.attrgetter(*cls.__slots__)
+        cls._wire_keys = frozenset(cls.__slots__) - frozenset(cls._internal)
+        cls._wire_slots = tuple(name for name in cls.__slots__ if name in cls._wire_keys)
+
+    def wire(self):
+        """The JSON object clients receive for this record, in wire key order: every
+        non-internal slot, in slot order. Market and SubMarket override it, since which
+        keys they send depends on the venue."""
+        return {name: getattr(self, name) for name in self._wire_slots}
+
+    def copy(self):
+        new = object.__new__(type(self))
+        for name, value in zip(self.__slots__, self._values(self)):
+            setattr(new, name, value)
+        return new
+
+    def replace(self, **changes):
+        new = self.copy()
+        for name, value in changes.items():
+            setattr(new, name, value)
+        return new
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values(self) == other._values(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.wire()!r})'
+
+    # Dict-style reads, so code written against the wire dicts (query projection,
+    # history, warm-started snapshots) handles records and dicts alike. Slots
+    # that are None may be absent on the wire, so only those consult wire().
+
+    def __contains__(self, key):
+        return key in self._wire_keys and (getattr(self, key) is not None or key in self.wire())
+
+    def __getitem__(self, key):
+        if key in self._wire_keys:
+            value = getattr(self, key)
+            if value is not None or key in self.wire():
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key not in self._wire_keys:
+            return default
+        value = getattr(self, key)
+        if value is None and default is not None and key not in self.wire():
+            return default
+        return value
+
+    def keys(self):
+        return self.wire().keys()
+
+    def items(self):
+        return self.wire().items()
+
+    def __iter__(self):
+        return iter(self.wire())
+
+    def __len__(self):
+        return len(self.wire())
+
+
+class Market(Record):
+    """One /api/markets row: a Polymarket or Kalshi market/event, maybe paired across venues."""
+
+    __slots__ = ('name', 'short', 'price', 'vol', '_volNum', 'polyPrice', 'kalshiPrice',
+                 'polyBid', 'polyAsk', 'kalshiBid', 'kalshiAsk', 'tf', '_endDate', 'source',
+                 'slug', '_polyId', '_conditionId', '_clobTokenId', '_kalshiTicker', 'liquidity',
+                 'isEvent', 'subCount', 'subMarkets', 'matchConfidence', '_chartScore', '_key',
+                 'uid', 'norm', 'end_ts')
+    _internal = ('uid', 'norm', 'end_ts')   # upstream id, normalized name, parsed end date
+
+    def __init__(self, source, uid, name, norm, short, price, volume, vol, end_date, end_ts, tf,
+                 bid, ask, liquidity, chart_score, key, is_event=False, sub_count=0, subs=None,
+                 slug=None, condition_id=None, clob_token_id=None, kalshi_ticker=None):
+        poly = source == 'polymarket'
+        self.source = source
+        self.uid = uid
+        self.name = name
+        self.norm = norm
+        self.short = short
+        self.price = price
+        self._volNum = volume
+        self.vol = vol
+        self._endDate = end_date
+        self.end_ts = end_ts
+        self.tf = tf
+        self.polyPrice, self.kalshiPrice = (price, None) if poly else (None, price)
+        self.polyBid, self.polyAsk = (bid, ask) if poly else (None, None)
+        self.kalshiBid, self.kalshiAsk = (None, None) if poly else (bid, ask)
+        self.liquidity = liquidity
+        self.isEvent = is_event
+        self.subCount = sub_count
+        self.subMarkets = subs
+        self.slug = slug
+        self._polyId = uid if poly else None
+        self._conditionId = condition_id
+        self._clobTokenId = clob_token_id
+        self._kalshiTicker = kalshi_ticker
+        self.matchConfidence = None
+        self._chartScore = chart_score
+        self._key = key
+
+    def wire(self):
+        if self.source == 'polymarket':
+            d = {'name': self.name, 'short': self.short, 'price': self.price, 'vol': self.vol,
+                 '_volNum': self._volNum, 'polyPrice': self.polyPrice, 'kalshiPrice': self.kalshiPrice,
+                 'polyBid': self.polyBid, 'polyAsk': self.polyAsk, 'tf': self.tf, '_endDate': self._endDate,
+                 'source': self.source, 'slug': self.slug, '_polyId': self._polyId,
+                 '_conditionId': self._conditionId, '_clobTokenId': self._clobTokenId,
+                 'liquidity': self.liquidity, 'isEvent': self.isEvent, 'subCount': self.subCount,
+                 'subMarkets': self.subMarkets}
+            if self.kalshiPrice is not None:
+                # Kalshi side picked up in the merge
+                d['matchConfidence'] = self.matchConfidence
+                d['kalshiBid'] = self.kalshiBid
+                d['kalshiAsk'] = self.kalshiAsk
+                d['_kalshiTicker'] = self._kalshiTicker
+        else:
+            d = {'name': self.name, 'short': self.short, 'price': self.price, 'vol': self.vol,
+                 '_volNum': self._volNum, 'polyPrice': self.polyPrice, 'kalshiPrice': self.kalshiPrice,
+                 'kalshiBid': self.kalshiBid, 'kalshiAsk': self.kalshiAsk, 'tf': self.tf,
+                 '_endDate': self._endDate, 'source': self.source, '_kalshiTicker': self._kalshiTicker,
+                 'liquidity': self.liquidity, 'isEvent': self.isEvent, 'subCount': self.subCount,
+                 'subMarkets': self.subMarkets}
+        d['_chartScore'] = self._chartScore
+        d['_key'] = self._key
+        return d
+
+
+class SubMarket(Record):
+    """One outcome of a multi-market event."""
+
+    __slots__ = ('name', 'ticker', 'price', 'vol', '_volNum', 'bestBid', 'bestAsk', 'yesBid', 'yesAsk',
+                 'source', 'conditionId', 'clobTokenId', 'kalshiPrice', '_key', 'norm')
+    _internal = ('norm',)
+
+    def __init__(self, source, name, norm, price, volume, vol, bid, ask, key,
+                 ticker=None, condition_id=None, clob_token_id=None):
+        poly = source == 'polymarket'
+        self.source = source
+        self.name = name
+        self.norm = norm
+        self.ticker = ticker
+        self.price = price
+        self._volNum = volume
+        self.vol = vol
+        self.bestBid, self.bestAsk = (bid, ask) if poly else (None, None)
+        self.yesBid, self.yesAsk = (None, None) if poly else (bid, ask)
+        self.conditionId = condition_id
+        self.clobTokenId = clob_token_id
+        self.kalshiPrice = None
+        self._key = key
+
+    def wire(self):
+        if self.source == 'polymarket':
+            d = {'name': self.name, 'price': self.price, 'vol': self.vol, '_volNum': self._volNum,
+                 'bestBid': self.bestBid, 'bestAsk': self.bestAsk, 'source': self.source,
+                 'conditionId': self.conditionId, 'clobTokenId': self.clobTokenId}
+        else:
+            d = {'name': self.name, 'ticker': self.ticker, 'price': self.price, 'vol': self.vol,
+                 '_volNum': self._volNum, 'yesBid': self.yesBid, 'yesAsk': self.yesAsk, 'source': self.source}
+        if self.kalshiPrice is not None:
+            d['kalshiPrice'] = self.kalshiPrice
+        d['_key'] = self._key
+        return d
+
+
+def _wire(record):
+    return record.wire() if isinstance(record, Record) else record
+
+
+def _json_default(obj):
+    if isinstance(obj, Record):
+        return obj.wire()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+_json_encoder = json.JSONEncoder(default=_json_default)
+
+
+def _encode_json(data):
+    """UTF-8 JSON for a payload that may hold records — the same bytes json.dumps
+    gives for the equivalent wire dicts."""
+    return _json_encoder.encode(data).encode()
+
+
+# ═══════════════════════════════════════════════════════════════
+# MARKET DELTAS — field-level patches between snapshot versions
+# ═══════════════════════════════════════════════════════════════
+
+def _record_key(name):
+    """Stable short key for a market/sub-market, derived from its normalized name."""
+    return _norm_key(re.sub(r'[^a-z0-9]', '', (name or '').lower()))
+
+
+def _norm_key(norm):
+    return hashlib.blake2b(norm.encode(), digest_size=8).hexdigest()
+
+
+def _record_identity(r):
+    """Upstream identity of a record — unlike its list position, stable across polls."""
+    ident = getattr(r, 'uid', None) or getattr(r, 'conditionId', None) or getattr(r, 'ticker', None)
+    return r.source, str(ident or ''), r.name or ''
+
+
+def _assign_keys(records, fresh=False):
+    """Make each record's `_key` unique in the list, suffixing collisions (-2, -3, ...).
+
+    Colliding records get their suffixes in upstream-identity order, not list
+    order, so a market keeps its key when chart-score ranks swap between polls.
+    Records come keyed from parsing; one whose key has to change here is
+    swapped for a copy, since parsed records are shared between versions —
+    unless `fresh` says the records were just built and nothing else holds them.
+    """
+    groups = collections.defaultdict(list)
+    for i, r in enumerate(records):
+        groups[r._key.partition('-')[0]].append(i)
+    for base, positions in groups.items():
+        if len(positions) > 1:
+            positions.sort(key=lambda i: _record_identity(records[i]))
+        for n, i in enumerate(positions, 1):
+            key = base if n == 1 else f'{base}-{n}'
+            r = records[i]
+            if key == r._key:
+                continue
+            if fresh:
+                r._key = key
+            else:
+                records[i] = r.replace(_key=key)
+    return records
+
+
+def _diff_fields(old, new, skip=('_key', 'subMarkets')):
+    """Return ({field: new_value}, [removed_fields]) between two flat records."""
+    changed = {k: v for k, v in new.items() if k not in skip and (k not in old or old[k] != v)}
+    removed = [k for k in old if k not in skip and k not in new]
+    return changed, removed
+
+
+def _diff_records(old_list, new_list):
+    """Diff two keyed record lists → {'added', 'removed', 'changed', 'order'?}."""
+    old_by_key = {r['_key']: r for r in (old_list or [])}
+    new_keys = [r['_key'] for r in (new_list or [])]
+    added, changed = [], []
+    for r in (new_list or []):
+        prev = old_by_key.get(r['_key'])
+        if prev is None:
+            added.append(r)
+            continue
+        if prev is r:
+            continue   # Same record object carried over between versions
+        prev, r = _wire(prev), _wire(r)
+        fields, unset = _diff_fields(prev, r)
+        patch = {'key': r['_key']}
+        if fields:
+            patch['set'] = fields
+        if unset:
+            patch['unset'] = unset
+        prev_subs, subs = prev.get('subMarkets'), r.get('subMarkets')
+        if (prev_subs or subs) and prev_subs is not subs:
+            if not subs:
+                patch['set'] = dict(patch.get('set', {}), subMarkets=subs)
+            else:
+                subs = _diff_records(prev_subs, subs)
+                if subs:
+                    patch['subs'] = subs
+        if len(patch) > 1:
+            changed.append(patch)
+    new_key_set = set(new_keys)
+    removed = [k for k in old_by_key if k not in new_key_set]
+    delta = {}
+    if added:
+        delta['added'] = added
+    if removed:
+        delta['removed'] = removed
+    if changed:
+        delta['changed'] = changed
+    if new_keys != [r['_key'] for r in (old_list or [])]:
+        delta['order'] = new_keys
+    return delta
+
+
+# ═══════════════════════════════════════════════════════════════
+# COLUMNAR WIRE FORMAT — /api/markets?format=columnar
+# One array per field instead of one object per market, so field names
+# are sent once; repetitive string columns (source, tf, vol, end dates)
+# become a small dictionary plus integer codes.
+# ═══════════════════════════════════════════════════════════════
+
+# Dictionary-code a string column when its distinct values are at most this share of its values
+COLUMNAR_DICT_MAX = 0.5
+
+
+def _dictionary_code(values):
+    """{'dict': [distinct strings], 'codes': [index|null]} for a repetitive string column,
+    else the values unchanged."""
+    strings, count = {}, 0
+    for v in values:
+        if v is None:
+            continue
+        if type(v) is not str:
+            return values
+        strings.setdefault(v, len(strings))
+        count += 1
+    if not strings or len(strings) > count * COLUMNAR_DICT_MAX:
+        return values
+    return {'dict': list(strings), 'codes': [None if v is None else strings[v] for v in values]}
+
+
+def _columnar_table(rows):
+    """Column-oriented form of a list of wire dicts.
+
+    {'length': n, 'columns': {field: [values] | {'dict', 'codes'}}, 'optional': [fields]}.
+    `optional` lists fields some rows lack (a null there decodes as absent);
+    the subMarkets column holds each row's sub-market count (null for none).
+    """
+    present = {}
+    for r in rows:
+        for k in r:
+            present[k] = present.get(k, 0) + 1
+    columns = {}
+    for field in present:
+        values = [r.get(field) for r in rows]
+        if field == 'subMarkets':
+            columns[field] = [None if v is None else len(v) for v in values]
+        else:
+            columns[field] = _dictionary_code(values)
+    return {'length': len(rows), 'columns': columns,
+            'optional': [f for f, n in present.items() if n < len(rows)]}
+
+
+def _columnar_payload(data):
+    """An /api/markets payload (MarketCache.get_data() shape) in the columnar format.
+
+    Sub-markets of every market are concatenated, in order, into one
+    `subMarkets` table; each market's subMarkets count says how many to take.
+    """
+    markets = [_wire(m) for m in data['markets']]
+    subs = [_wire(sm) for m in markets for sm in (m.get('subMarkets') or ())]
+    meta = {k: v for k, v in data.items() if k != 'markets'}
+    return {'format': 'columnar', **meta,
+            'markets': _columnar_table(markets), 'subMarkets': _columnar_table(subs)}
+
+
+# ═══════════════════════════════════════════════════════════════
+# CROSS-VENUE MATCHING — fuzzy Polymarket ↔ Kalshi pairing
+# Inverted token index for candidates, weighted token overlap +
+# character trigrams for scoring, decisions cached across polls.
+# ═══════════════════════════════════════════════════════════════
+
+# Filler words that differ between venues' phrasing of the same question
+_MATCH_STOP_WORDS = frozenset(
+    'will the a an be in on of by to for and or is are at does do this that with which who what'.split()
+)
+_YEAR_RE = re.compile(r'^(19|20)\d\d$')
+
+
+def _match_tokens(name):
+    """Lowercased, lightly stemmed content tokens of a market title."""
+    tokens = set()
+    for w in re.findall(r'[a-z0-9]+', (name or '').lower()):
+        if w in _MATCH_STOP_WORDS:
+            continue
+        if len(w) > 3 and w.endswith('s') and not w.endswith('ss') and not w.isdigit():
+            w = w[:-1]
+        tokens.add(w)
+    return frozenset(tokens)
+
+
+def _trigrams(name):
+    norm = re.sub(r'[^a-z0-9]', '', (name or '').lower())
+    return {norm[i:i + 3] for i in range(len(norm) - 2)} or {norm}
+
+
+class MarketMatcher:
+    """Pairs Kalshi records with Polymarket records whose titles mean the same thing."""
+
+    THRESHOLD = 0.6        # minimum similarity to pair two markets
+    MAX_CANDIDATES = 8     # top candidates (by shared-token weight) that get fully scored
+    MAX_POSTINGS = 200     # tokens shared by more records than this don't generate candidates
+
+    def __init__(self):
+        self._decisions = {}      # kalshi key -> (poly key or None, score)
+        self._token_cache = {}    # poly key -> (name, tokens), reused across polls
+        self._known_poly = set()  # poly keys indexed in the previous poll
+        self._records = {}        # poly key -> merged record (current poll)
+        self._postings = {}       # token -> [poly key]
+        self._idf = {}
+        self._new_poly = set()
+        self._seen_kalshi = set()
+        self.stats = {'cached': 0, 'scored': 0, 'matched': 0}
+
+    @staticmethod
+    def poly_key(rec):
+        return rec.get('_conditionId') or rec.get('_polyId') or rec.get('name')
+
+    def begin_poll(self, poly_records):
+        """Index this poll's Polymarket records (tokens reused for unchanged titles)."""
+        self._records = {}
+        self._postings = {}
+        token_cache = {}
+        for rec in poly_records:
+            key = self.poly_key(rec)
+            if key in self._records:
+                continue
+            self._records[key] = rec
+            cached = self._token_cache.get(key)
+            tokens = cached[1] if cached and cached[0] == rec['name'] else _match_tokens(rec['name'])
+            token_cache[key] = (rec['name'], tokens)
+            for t in tokens:
+                self._postings.setdefault(t, []).append(key)
+        self._token_cache = token_cache
+        n = max(len(self._records), 1)
+        self._idf = {t: math.log(1 + n / len(keys)) for t, keys in self._postings.items()}
+        self._new_poly = set(self._records) - self._known_poly
+        self._seen_kalshi = set()
+        self.stats = {'cached': 0, 'scored': 0, 'matched': 0}
+
+    def end_poll(self):
+        """Forget decisions for Kalshi records that weren't seen this poll."""
+        self._decisions = {k: v for k, v in self._decisions.items() if k in self._seen_kalshi}
+        self._known_poly = set(self._records)
+
+    def match(self, kalshi_key, name):
+        """Best Polymarket record for a Kalshi title → (record or None, confidence)."""
+        self._seen_kalshi.add(kalshi_key)
+        only_new = False
+        cached = self._decisions.get(kalshi_key)
+        if cached is not None:
+            poly_key, score = cached
+            if poly_key is not None and poly_key in self._records:
+                self.stats['cached'] += 1
+                return self._records[poly_key], score
+            if poly_key is None:
+                if not self._new_poly:
+                    self.stats['cached'] += 1
+                    return None, 0.0
+                # Previously unmatched — only newly listed Polymarket records can change that
+                only_new = True
+
+        tokens = _match_tokens(name)
+        best_key, best_score = None, 0.0
+        if tokens:
+            grams = _trigrams(name)
+            for key in self._candidates(tokens, only_new):
+                score = self._similarity(tokens, grams, key)
+                if score > best_score:
+                    best_key, best_score = key, score
+        self.stats['scored'] += 1
+        if best_score < self.THRESHOLD:
+            best_key, best_score = None, 0.0
+        else:
+            self.stats['matched'] += 1
+        self._decisions[kalshi_key] = (best_key, round(best_score, 3))
+        return (self._records[best_key] if best_key else None), round(best_score, 3)
+
+    def _candidates(self, tokens, only_new):
+        weights = {}
+        for t in tokens:
+            keys = self._postings.get(t)
+            if not keys or len(keys) > self.MAX_POSTINGS:
+                continue
+            w = self._idf[t]
+            for key in keys:
+                if only_new and key not in self._new_poly:
+                    continue
+                weights[key] = weights.get(key, 0.0) + w
+        return sorted(weights, key=weights.get, reverse=True)[:self.MAX_CANDIDATES]
+
+    def _similarity(self, tokens, grams, key):
+        rec = self._records[key]
+        other = self._token_cache[key][1]
+        # Different thresholds/strikes ("above 100k" vs "above 110k") are different markets
+        nums = {t for t in tokens if t.isdigit() and not _YEAR_RE.match(t)}
+        other_nums = {t for t in other if t.isdigit() and not _YEAR_RE.match(t)}
+        if nums != other_nums:
+            return 0.0
+        # IDF-weighted Jaccard; years are down-weighted since venues often omit them
+        idf = self._idf
+        default = math.log(1 + max(len(self._records), 1))
+
+        def weight(t):
+            return idf.get(t, default) * (0.25 if _YEAR_RE.match(t) else 1.0)
+
+        shared = sum(weight(t) for t in tokens & other)
+        union = sum(weight(t) for t in tokens | other)
+        token_score = shared / union if union else 0.0
+        other_grams = _trigrams(rec['name'])
+        gram_score = len(grams & other_grams) / len(grams | other_grams)
+        return 0.7 * token_score + 0.3 * gram_score
+
+
+# ═══════════════════════════════════════════════════════════════
+# MARKET QUERY INDEX — filter/sort/paginate without scanning per request
+# ═══════════════════════════════════════════════════════════════
+
+def _end_timestamp(m, field='_endDate'):
+    """Market end date as a Unix timestamp (inf when missing/unparseable)."""
+    if isinstance(m, Market):
+        return m.end_ts   # Parsed once when the record was built
+    return _parse_end_date(m.get(field))
+
+
+@functools.lru_cache(maxsize=8192)   # End dates repeat across many markets of a poll
+def _parse_end_date(date_str):
+    """ISO-8601 end date → Unix timestamp; naive times are UTC, inf when missing/unparseable."""
+    if not date_str:
+        return float('inf')
+    try:
+        from datetime import datetime, timezone
+        dt = datetime.fromisoformat(str(date_str).replace('Z', '+00:00'))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except ValueError:
+        return float('inf')
+
+
+def _timeframe(end_ts, now=None):
+    """Timeframe bucket ('15M' … '1Y') for a market ending at `end_ts`."""
+    if end_ts == float('inf'):
+        return '1M'
+    diff = (end_ts - (now if now is not None else time.time())) / 3600
+    if diff < 0.5:
+        return '15M'
+    if diff < 3:
+        return '1H'
+    if diff < 168:
+        return '1W'
+    if diff < 720:
+        return '1M'
+    return '1Y'
+
+
+class MarketIndex:
+    """Secondary indexes over one snapshot's market list, built once per poll.
+
+    For every sort order there is a pre-sorted position list per
+    (tf, source, hasBothVenues) bucket, including "any" buckets, so a query
+    is a slice of one list. Each bucket also keeps its volumes in ascending
+    order, so a minVol total is one bisect; the page under minVol is a slice
+    of the volume list when sorting by volume, otherwise a walk that stops
+    once the page is full.
+    """
+
+    SORTS = {
+        # name -> (key function, descending)
+        'chartScore': (lambda m: m.get('_chartScore', 0) or 0, True),
+        'volume': (lambda m: m.get('_volNum', 0) or 0, True),
+        'liquidity': (lambda m: m.get('liquidity', 0) or 0, True),
+        'endDate': (_end_timestamp, False),
+    }
+
+    def __init__(self, markets):
+        self.markets = markets
+        self._vol = [m.get('_volNum', 0) or 0 for m in markets]
+        self._lists = {}   # (sort, tf|None, source|None, bothOnly) -> [positions]
+        self._vols = {}    # (tf|None, source|None, bothOnly) -> [volumes], ascending
+        both = [m.get('polyPrice') is not None and m.get('kalshiPrice') is not None for m in markets]
+        for sort, (key, desc) in self.SORTS.items():
+            keys = [key(m) for m in markets]
+            for i in sorted(range(len(markets)), key=keys.__getitem__, reverse=desc):
+                m = markets[i]
+                for tf in (None, m.get('tf')):
+                    for src in (None, m.get('source')):
+                        for both_only in ((False, True) if both[i] else (False,)):
+                            self._lists.setdefault((sort, tf, src, both_only), []).append(i)
+        for (sort, *bucket), positions in self._lists.items():
+            if sort == 'volume':
+                self._vols[tuple(bucket)] = [self._vol[i] for i in reversed(positions)]
+
+    def query(self, sort='chartScore', tf=None, source=None, both_only=False,
+              min_vol=None, offset=0, limit=None):
+        """Return (total matches, markets for the requested page)."""
+        positions = self._lists.get((sort, tf, source, both_only), [])
+        end = None if limit is None else offset + limit
+        if min_vol is None:
+            return len(positions), [self.markets[i] for i in positions[offset:end]]
+        vols = self._vols.get((tf, source, both_only), [])
+        total = len(vols) - bisect.bisect_left(vols, min_vol)
+        if sort == 'volume':
+            page = positions[:total][offset:end]   # highest volumes first: the matches are a prefix
+        else:
+            vol = self._vol
+            page = itertools.islice((i for i in positions if vol[i] >= min_vol), offset, end)
+        return total, [self.markets[i] for i in page]
+
+
+# ═══════════════════════════════════════════════════════════════
+# SPREAD INDEX — executable cross-venue spreads for /api/spreads
+# ═══════════════════════════════════════════════════════════════
+
+SPREADS_DEFAULT_LIMIT = 50
+SPREADS_MAX_LIMIT = 500
+SPREADS_REBUILD_FRACTION = 0.25   # more churn than this per poll re-sorts instead of patching
+
+
+def _quoted(bid, ask):
+    """True when both sides of a book (in cents) are actually quoted."""
+    return bid is not None and ask is not None and 0 < bid < 100 and 0 < ask < 100
+
+
+class SpreadIndex:
+    """Executable cross-venue spreads, sorted widest first.
+
+    Every market priced on both venues, and every sub-market of a merged
+    event, gives one entry per direction: buy YES at one venue's ask and
+    sell it at the other's bid, edge = bid - ask in cents. Events take
+    their entries from their sub-markets, since event-level quotes are
+    just each venue's first outcome.
+
+    An index is never modified once built (handler threads read it without
+    the lock); updated() derives the next poll's index. Records the merge
+    passed through untouched are recognized by identity and keep their
+    entries, and only entries whose edge changed move in the sort order.
+    """
+
+    DIRECTIONS = ('buyPoly', 'buyKalshi')
+
+    def __init__(self, order=(), rows=None, sources=None):
+        self._order = list(order)      # (-edge, market key, sub key, direction), ascending
+        self._rows = rows or {}        # (market key, sub key, direction) -> wire row
+        self._sources = sources or {}  # market key -> (record, its entries)
+
+    def __len__(self):
+        return len(self._order)
+
+    def positive(self):
+        """Entries with a positive edge (they sort before any -edge >= 0)."""
+        return bisect.bisect_left(self._order, (0,))
+
+    @staticmethod
+    def _entries(m):
+        """(ident, row) for each executable spread in one market record or dict."""
+        key = m.get('_key')
+        if m.get('isEvent'):
+            quotes = [(sm.get('_key') or '', sm.get('name'), sm.get('price'), sm.get('kalshiPrice'),
+                       sm.get('bestBid'), sm.get('bestAsk'), sm.get('yesBid'), sm.get('yesAsk'),
+                       sm.get('_volNum'))
+                      for sm in m.get('subMarkets') or ()
+                      if sm.get('source') == 'polymarket' and sm.get('kalshiPrice') is not None]
+        elif m.get('polyPrice') is not None and m.get('kalshiPrice') is not None:
+            quotes = [('', None, m.get('polyPrice'), m.get('kalshiPrice'), m.get('polyBid'),
+                       m.get('polyAsk'), m.get('kalshiBid'), m.get('kalshiAsk'), m.get('_volNum'))]
+        else:
+            return
+        for sub_key, sub, poly, kalshi, poly_bid, poly_ask, kalshi_bid, kalshi_ask, volume in quotes:
+            if not (_quoted(poly_bid, poly_ask) and _quoted(kalshi_bid, kalshi_ask)):
+                continue
+            for direction, buy, sell in (('buyPoly', poly_ask, kalshi_bid), ('buyKalshi', kalshi_ask, poly_bid)):
+                yield (key, sub_key, direction), {
+                    '_key': key, '_subKey': sub_key or None, 'name': m.get('name'), 'sub': sub,
+                    'direction': direction, 'buyAt': buy, 'sellAt': sell, 'edge': sell - buy,
+                    'polyPrice': poly, 'kalshiPrice': kalshi, '_volNum': volume or 0,
+                    'tf': m.get('tf'), 'matchConfidence': m.get('matchConfidence'),
+                }
+
+    def updated(self, markets):
+        """The index for a new market list, patched from this one."""
+        rows, sources, known = {}, {}, self._sources
+        for m in markets:
+            key = m.get('_key')
+            prev = known.get(key)
+            entries = prev[1] if prev is not None and (prev[0] is m or prev[0] == m) else tuple(self._entries(m))
+            sources[key] = (m, entries)
+            rows.update(entries)
+        old = self._rows
+        gone = [ident for ident in old if ident not in rows]
+        moved = [ident for ident, row in rows.items()
+                 if ident not in old or old[ident]['edge'] != row['edge']]
+        if len(gone) + len(moved) > len(self._order) * SPREADS_REBUILD_FRACTION:
+            return SpreadIndex(sorted((-row['edge'],) + ident for ident, row in rows.items()), rows, sources)
+        order = self._order.copy()
+        for ident in gone + [i for i in moved if i in old]:
+            del order[bisect.bisect_left(order, (-old[ident]['edge'],) + ident)]
+        for ident in moved:
+            bisect.insort(order, (-rows[ident]['edge'],) + ident)
+        return SpreadIndex(order, rows, sources)
+
+    def query(self, min_edge=None, min_vol=None, direction=None, limit=SPREADS_DEFAULT_LIMIT):
+        """Widest spreads first: walks from the top and stops at `limit` hits or min_edge."""
+        rows, out = self._rows, []
+        for neg_edge, key, sub_key, d in self._order:
+            if len(out) >= limit or (min_edge is not None and -neg_edge < min_edge):
+                break
+            if direction is not None and d != direction:
+                continue
+            row = rows[key, sub_key, d]
+            if min_vol is not None and row['_volNum'] < min_vol:
+                continue
+            out.append(row)
+        return out
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRICE HISTORY STORE — fixed-memory per-market ring buffers
+# ═══════════════════════════════════════════════════════════════
+
+def _lttb(xs, ys, threshold):
+    """Largest-Triangle-Three-Buckets: indices of at most `threshold` points
+    that preserve the visual shape of the (xs, ys) line."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    keep = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        span = nxt_end - nxt_start
+        avg_x = sum(xs[nxt_start:nxt_end]) / span
+        avg_y = sum(ys[nxt_start:nxt_end]) / span
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+
+history_dropped = metrics.counter(
+    'mercury_history_dropped_total', 'Series samples dropped because every history row was in use this bucket')
+
+
+class PriceHistoryStore:
+    """Per-market price/bid/ask/volume history in preallocated flat arrays.
+
+    Every series shares one time ring of `slots` columns, each covering
+    `resolution` seconds. Each column is a 1-minute OHLC bar updated in place
+    as polls arrive (close/bid/ask/volume from the latest sample). Rows are
+    assigned to stable market IDs and recycled least-recently-written first,
+    but never one written in the current bucket: when every row is that
+    fresh, new series are dropped (and counted) rather than evicting each
+    other within a poll. Memory is fixed at series × slots × 10 bytes.
+    Coarser candles are rolled up from the 1-minute bars on read.
+    """
+
+    MISSING = 255   # uint8 sentinel for price/bid/ask (valid range 0–100)
+
+    def __init__(self, series=HISTORY_SERIES, slots=HISTORY_SLOTS, resolution=HISTORY_RESOLUTION):
+        self.series = series
+        self.slots = slots
+        self.resolution = resolution
+        self.lock = threading.Lock()
+        size = series * slots
+        self._price = bytearray([self.MISSING]) * size   # close
+        self._open = bytearray([self.MISSING]) * size
+        self._high = bytearray([self.MISSING]) * size
+        self._low = bytearray([self.MISSING]) * size
+        self._bid = bytearray([self.MISSING]) * size
+        self._ask = bytearray([self.MISSING]) * size
+        self._vol = array.array('f', bytes(4 * size))
+        self._col_bucket = array.array('q', [-1]) * slots   # bucket number held by each column
+        self._rows = collections.OrderedDict()               # market id -> row, least recently written first
+        self._row_seen = array.array('q', [-1]) * series     # last bucket each row was written
+        self._free = list(range(series - 1, -1, -1))
+        self._last_bucket = -1                               # bucket of the latest record()
+
+    def due(self, ts=None):
+        """True when nothing has been recorded in the current bucket yet."""
+        return int((ts if ts is not None else time.time()) // self.resolution) != self._last_bucket
+
+    def memory_bytes(self):
+        return len(self._price) * 6 + self._vol.itemsize * len(self._vol)
+
+    def record(self, markets, ts=None):
+        """Append one poll's values for every market and sub-market."""
+        bucket = int((ts if ts is not None else time.time()) // self.resolution)
+        col = bucket % self.slots
+        with self.lock:
+            self._last_bucket = bucket
+            if self._col_bucket[col] != bucket:
+                self._clear_column(col)
+                self._col_bucket[col] = bucket
+            for m in markets:
+                key = m.get('_key')
+                if not key:
+                    continue
+                bid = m.get('polyBid') if m.get('polyBid') is not None else m.get('kalshiBid')
+                ask = m.get('polyAsk') if m.get('polyAsk') is not None else m.get('kalshiAsk')
+                self._write(key, bucket, col, m.get('price'), bid, ask, m.get('_volNum'))
+                for sm in (m.get('subMarkets') or []):
+                    if not sm.get('_key'):
+                        continue
+                    sbid = sm.get('bestBid') if sm.get('bestBid') is not None else sm.get('yesBid')
+                    sask = sm.get('bestAsk') if sm.get('bestAsk') is not None else sm.get('yesAsk')
+                    self._write(f"{key}/{sm['_key']}", bucket, col, sm.get('price'), sbid, sask, sm.get('_volNum'))
+
+    def step_for(self, res):
+        """Seconds per point actually served for a requested `res`: a whole multiple of
+        the store resolution, never finer than it."""
+        return max(1, int((res or self.resolution) // self.resolution)) * self.resolution
+
+    def query(self, ids, since=None, res=None, points=None):
+        """{id: {'t', 'price', 'bid', 'ask', 'vol'}} for known ids, oldest first.
+
+        `res` (seconds, rounded to a multiple of the store resolution) keeps the
+        last sample of each coarser bucket; `points` then caps each series with
+        LTTB downsampling.
+        """
+        step = self.step_for(res) // self.resolution
+        out = {}
+        with self.lock:
+            cols = self._columns(since)
+            for market_id in ids:
+                row = self._rows.get(market_id)
+                if row is None:
+                    continue
+                base = row * self.slots
+                picked = {}
+                for b, c in cols:
+                    i = base + c
+                    if self._price[i] != self.MISSING:
+                        picked[b // step] = (b, i)   # later buckets overwrite → last per step
+                series = {'t': [], 'price': [], 'bid': [], 'ask': [], 'vol': []}
+                for b, i in picked.values():
+                    series['t'].append(b * self.resolution)
+                    series['price'].append(self._price[i])
+                    series['bid'].append(None if self._bid[i] == self.MISSING else self._bid[i])
+                    series['ask'].append(None if self._ask[i] == self.MISSING else self._ask[i])
+                    series['vol'].append(round(self._vol[i], 2))
+                out[market_id] = series
+        if points:
+            for market_id, series in out.items():
+                keep = _lttb(series['t'], series['price'], points)
+                if len(keep) < len(series['t']):
+                    out[market_id] = {k: [v[j] for j in keep] for k, v in series.items()}
+        return out
+
+    def ohlc(self, market_id, res, since=None, limit=None):
+        """Candles {'t', 'o', 'h', 'l', 'c'} at `res` seconds rolled up from 1m bars.
+
+        No volume: the store only samples the market's rolling 24h volume, and
+        differences of that are not what traded during a bar.
+        """
+        step = self.step_for(res) // self.resolution
+        bars = {}
+        with self.lock:
+            row = self._rows.get(market_id)
+            if row is None:
+                return None
+            base = row * self.slots
+            for b, c in self._columns(since):
+                i = base + c
+                if self._price[i] == self.MISSING:
+                    continue
+                key = b // step
+                bar = bars.get(key)
+                if bar is None:
+                    bars[key] = [key * step * self.resolution, self._open[i], self._high[i],
+                                 self._low[i], self._price[i]]
+                else:
+                    bar[2] = max(bar[2], self._high[i])
+                    bar[3] = min(bar[3], self._low[i])
+                    bar[4] = self._price[i]
+        rows = list(bars.values())
+        if limit:
+            rows = rows[-max(limit, 1):]
+        return {k: [r[j] for r in rows] for j, k in enumerate(('t', 'o', 'h', 'l', 'c'))}
+
+    def _columns(self, since=None):
+        """(bucket, column) pairs holding data, oldest first. Caller holds the lock."""
+        since_bucket = int(since // self.resolution) if since else None
+        return sorted((b, c) for c, b in enumerate(self._col_bucket)
+                      if b >= 0 and (since_bucket is None or b >= since_bucket))
+
+    def _write(self, market_id, bucket, col, price, bid, ask, vol):
+        row = self._rows.get(market_id)
+        if row is None:
+            row = self._allocate(market_id, bucket)
+            if row is None:
+                history_dropped.inc()
+                return
+        else:
+            self._rows.move_to_end(market_id)
+        i = row * self.slots + col
+        p = self._cents(price)
+        if self._price[i] == self.MISSING or p == self.MISSING:
+            self._open[i] = self._high[i] = self._low[i] = p   # First sample in this bar
+        else:
+            if p > self._high[i]:
+                self._high[i] = p
+            if p < self._low[i]:
+                self._low[i] = p
+        self._price[i] = p
+        self._bid[i] = self._cents(bid)
+        self._ask[i] = self._cents(ask)
+        self._vol[i] = float(vol or 0)
+        self._row_seen[row] = bucket
+
+    def _allocate(self, market_id, bucket):
+        """A row for a new series, or None if every row was already written this bucket."""
+        if self._free:
+            row = self._free.pop()
+        else:
+            # Recycle the row that was written least recently, unless that was this bucket
+            oldest, row = next(iter(self._rows.items()))
+            if self._row_seen[row] >= bucket:
+                return None
+            del self._rows[oldest]
+            start = row * self.slots
+            self._price[start:start + self.slots] = bytearray([self.MISSING]) * self.slots
+        self._rows[market_id] = row
+        return row
+
+    def _clear_column(self, col):
+        self._price[col::self.slots] = bytearray([self.MISSING]) * self.series
+
+    @classmethod
+    def _cents(cls, v):
+        if not isinstance(v, (int, float)):
+            return cls.MISSING
+        return min(max(int(round(v)), 0), 100)
+
+
+# ═══════════════════════════════════════════════════════════════
+# POLL SCHEDULING — per-source intervals, jitter, backoff
+# ═══════════════════════════════════════════════════════════════
+
+class PollSchedule:
+    """When one upstream source is next due.
+
+    The interval starts at `base`, shrinks toward `min_interval` while the
+    source's data is moving (straight to it when something urgent is in the
+    feed) and relaxes toward `max_interval` while polls find nothing new.
+    Errors back off exponentially up to `max_backoff`, never sooner than a
+    Retry-After. Every delay gets ±JITTER so sources don't poll in lockstep.
+    """
+
+    JITTER = 0.1
+    SPEEDUP = 0.5    # interval multiplier after a poll that saw prices moving
+    SLOWDOWN = 1.5   # multiplier after a poll that found nothing new
+
+    def __init__(self, name, base, min_interval=None, max_interval=None, max_backoff=POLL_MAX_BACKOFF):
+        self.name = name
+        self.base = base
+        self.min_interval = base if min_interval is None else min_interval
+        self.max_interval = base if max_interval is None else max_interval
+        self.max_backoff = max_backoff
+        self.interval = base
+        self.failures = 0
+        self.next_due = 0.0   # time.monotonic(); 0 → due now
+
+    def due(self, now=None):
+        return (time.monotonic() if now is None else now) >= self.next_due
+
+    def backing_off(self, now=None):
+        return self.failures > 0 and not self.due(now)
+
+    def succeeded(self, changed=True, moving=False, urgent=False):
+        self.failures = 0
+        if urgent:
+            self.interval = self.min_interval
+        elif moving:
+            self.interval = max(self.min_interval, self.interval * self.SPEEDUP)
+        elif not changed:
+            self.interval = min(self.max_interval, self.interval * self.SLOWDOWN)
+        self._schedule(self.interval)
+
+    def failed(self, retry_after=None):
+        self.failures += 1
+        delay = min(self.max_backoff, self.base * 2 ** self.failures)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        self._schedule(delay)
+
+    def defer(self, seconds):
+        """Push the next poll out at least `seconds` (e.g. host-wide rate limiting)."""
+        self.next_due = max(self.next_due, time.monotonic() + seconds)
+
+    def stats(self):
+        return {'interval': round(self.interval, 2), 'failures': self.failures,
+                'dueIn': round(max(self.next_due - time.monotonic(), 0.0), 2)}
+
+    def _schedule(self, delay):
+        self.next_due = time.monotonic() + delay * random.uniform(1 - self.JITTER, 1 + self.JITTER)
+
+
+class ConditionalCache:
+    """Validators + last body per URL so repeat polls can send If-None-Match /
+    If-Modified-Since and reuse the previous result on 304."""
+
+    MAX_URLS = 256
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._entries = collections.OrderedDict()   # url -> (etag, last_modified, value)
+
+    def lookup(self, url):
+        """(validator headers, cached value) for `url`, read together so validators are
+        only sent when there is a value to reuse on 304; ({}, None) if nothing is cached."""
+        with self.lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return {}, None
+            self._entries.move_to_end(url)
+        etag, modified, value = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+        return headers, value
+
+    def store(self, url, resp, value):
+        etag, modified = resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+        if not (etag or modified):
+            return
+        with self.lock:
+            self._entries[url] = (etag, modified, value)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.MAX_URLS:
+                self._entries.popitem(last=False)
+
+
+upstream_not_modified = metrics.counter(
+    'mercury_upstream_not_modified_total', 'Conditional upstream requests answered 304', ('feed',))
+
+
 # ═══════════════════════════════════════════════════════════════
 # MARKET DATA CACHE — single source of truth for all clients
 # ═══════════════════════════════════════════════════════════════
 
+market_fetch_seconds = metrics.histogram(
+    'mercury_market_fetch_seconds', 'Upstream fetch time per market source', POLL_BUCKETS, ('source',))
+market_fetch_errors = metrics.counter(
+    'mercury_market_fetch_errors_total', 'Failed market source fetches', ('source',))
+market_source_records = metrics.gauge(
+    'mercury_market_source_records', 'Records returned by each source in the last poll', ('source',))
+market_merge_seconds = metrics.histogram(
+    'mercury_market_merge_seconds', 'Cross-venue merge + key assignment + index build time')
+market_poll_seconds = metrics.histogram(
+    'mercury_market_poll_seconds', 'Full market poll cycle time', POLL_BUCKETS)
+
+
 class MarketCache:
     """Background-threaded cache that polls Polymarket + Kalshi APIs."""
 
+    FUZZY_MATCH = True   # Pair near-identical titles across venues (see MarketMatcher)
+
+    # source -> upstream host
+    SOURCES = {
+        'poly_events': 'gamma-api.polymarket.com',
+        'poly_markets': 'gamma-api.polymarket.com',
+        'kalshi_events': 'api.elections.kalshi.com',
+        'kalshi_markets': 'api.elections.kalshi.com',
+    }
+    MOVE_FRACTION = 0.01   # share of a source's records repricing that counts as "moving"
+    EXPIRY_WINDOW = 3600   # top markets closing within this many seconds keep a source at min interval
+    URGENT_TOP_N = 50      # ...checked among this many highest-volume records
+    THROTTLE_DEFAULT = 30  # seconds to hold off a host after a 429 without Retry-After
+
     def __init__(self):
         self.lock = threading.Lock()
+        self._matcher = MarketMatcher()
+        self._schedules = {name: PollSchedule(name, POLL_INTERVAL, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL)
+                           for name in self.SOURCES}
+        self._source_data = {}        # source -> last successfully parsed records
+        self._conditional = ConditionalCache()
+        self._throttled = {}          # host -> seconds to hold off (set by 429s during a round)
+        self._page_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=FETCH_WORKERS, thread_name_prefix='page-fetch')
         self._markets = []          # Combined market list
         self._last_update = 0       # Unix timestamp of last successful fetch
         self._status = 'starting'   # 'live', 'stale', 'error', 'starting'
@@ -48,66 +1634,353 @@ class MarketCache:
         self._kalshi_count = 0
         self._error = None
         self._thread = None
+        # Seeded from wall-clock ms so versions stay monotonic across restarts
+        self._version = 0
+        self._versions = collections.deque(maxlen=DELTA_HISTORY)  # (version, markets)
+        self._delta_cache = {}      # since -> EncodedSnapshot, for current version
+        self._index = MarketIndex([])
+        self._spreads = SpreadIndex()
+        self.history = PriceHistoryStore()
+        self._query_cache = collections.OrderedDict()   # query shape -> EncodedSnapshot
+        self._columnar = None       # (version, EncodedSnapshot) for ?format=columnar
+        self._snapshot = EncodedSnapshot(self.get_data())
+        self._stream_lock = threading.Lock()   # orders stream subscribe vs. publish
+        self._streamed_version = None
+        self.publisher = None       # SharedSnapshots, when serving from worker processes
+
+    SNAPSHOT_FILE = 'markets.json.gz'
+    SHARED_NAME = 'markets'
+
+    def start(self):
+        self._load_snapshot()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._thread.start()
+
+    def get_data(self):
+        with self.lock:
+            return {
+                'markets': self._markets,
+                'version': self._version,
+                'status': self._status,
+                'lastUpdate': self._last_update,
+                'polyCount': self._poly_count,
+                'kalshiCount': self._kalshi_count,
+                'error': self._error,
+            }
+
+    def get_snapshot(self):
+        """Latest pre-encoded /api/markets payload (EncodedSnapshot)."""
+        return self._snapshot
+
+    def get_columnar(self):
+        """The current snapshot in the columnar wire format, encoded once per version."""
+        data = self.get_data()
+        version = data['version']
+        cached = self._columnar
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        snap = EncodedSnapshot(_columnar_payload(data), mtime=data['lastUpdate'] / 1000 or None)
+        with self.lock:
+            # Only keep it if no new version was published while we were encoding
+            if self._version == version:
+                self._columnar = (version, snap)
+        return snap
+
+    def get_delta(self, since):
+        """Encoded changes from version `since` to now, or None if it fell out of the ring."""
+        with self.lock:
+            cached = self._delta_cache.get(since)
+            if cached is not None:
+                return cached
+            version = self._version
+            base = next((mk for v, mk in self._versions if v == since), None)
+            markets = self._markets
+            meta = {
+                'status': self._status,
+                'lastUpdate': self._last_update,
+                'polyCount': self._poly_count,
+                'kalshiCount': self._kalshi_count,
+                'error': self._error,
+            }
+        if base is None:
+            return None
+        delta = {'delta': True, 'since': since, 'version': version, **meta}
+        delta.update(_diff_records(base, markets))
+        snap = EncodedSnapshot(delta)
+        with self.lock:
+            # Only memoize if no new version was published while we were diffing
+            if self._version == version:
+                self._delta_cache[since] = snap
+        return snap
+
+    QUERY_CACHE_SIZE = 128   # encoded query results kept per snapshot version
+
+    def query(self, params):
+        """Encoded filter/sort/page/projection result for /api/markets query params.
+
+        Raises ValueError for malformed parameters.
+        """
+        def one(name, default=None):
+            return params.get(name, [default])[0]
+
+        sort = one('sort', 'chartScore')
+        if sort not in MarketIndex.SORTS:
+            raise ValueError(f"sort must be one of {', '.join(MarketIndex.SORTS)}")
+        min_vol = one('minVol')
+        min_vol = float(min_vol) if min_vol not in (None, '') else None
+        offset = max(int(one('offset', 0)), 0)
+        limit = one('limit')
+        limit = max(int(limit), 0) if limit not in (None, '') else None
+        both_only = one('hasBothVenues', '').lower() in ('1', 'true', 'yes')
+        fields = tuple(f for f in (one('fields') or '').split(',') if f)
+        shape = (sort, one('tf') or None, one('source') or None, both_only, min_vol, offset, limit, fields)
+
+        with self.lock:
+            cached = self._query_cache.get(shape)
+            if cached is not None:
+                self._query_cache.move_to_end(shape)
+                return cached
+            index, version = self._index, self._version
+            meta = {
+                'version': self._version,
+                'status': self._status,
+                'lastUpdate': self._last_update,
+                'polyCount': self._poly_count,
+                'kalshiCount': self._kalshi_count,
+                'error': self._error,
+            }
+        total, page = index.query(sort, shape[1], shape[2], both_only, min_vol, offset, limit)
+        if fields:
+            keep = fields + ('_key',)
+            page = [{f: m[f] for f in keep if f in m} for m in page]
+        snap = EncodedSnapshot({'markets': page, **meta, 'total': total, 'offset': offset, 'limit': limit})
+        with self.lock:
+            if self._version == version:
+                self._query_cache[shape] = snap
+                while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        return snap
+
+    def spreads(self, params):
+        """Encoded /api/spreads result: widest executable cross-venue spreads first.
+
+        Raises ValueError for malformed parameters.
+        """
+        def number(name):
+            value = params.get(name, [''])[0]
+            return float(value) if value != '' else None
+
+        direction = params.get('direction', [''])[0] or None
+        if direction is not None and direction not in SpreadIndex.DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(SpreadIndex.DIRECTIONS)}")
+        limit = params.get('limit', [''])[0]
+        limit = min(max(int(limit), 0), SPREADS_MAX_LIMIT) if limit != '' else SPREADS_DEFAULT_LIMIT
+        shape = ('spreads', number('minEdge'), number('minVol'), direction, limit)
+
+        with self.lock:
+            cached = self._query_cache.get(shape)
+            if cached is not None:
+                self._query_cache.move_to_end(shape)
+                return cached
+            spreads, version = self._spreads, self._version
+            meta = {'version': version, 'status': self._status, 'lastUpdate': self._last_update}
+        rows = spreads.query(shape[1], shape[2], direction, limit)
+        snap = EncodedSnapshot({'spreads': rows, **meta, 'indexed': len(spreads),
+                                'positive': spreads.positive(), 'limit': limit})
+        with self.lock:
+            if self._version == version:
+                self._query_cache[shape] = snap
+                while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+        return snap
+
+    def subscribe_stream(self, sock, last_event_id=None):
+        """Attach an SSE socket: resume from Last-Event-ID via delta, else full snapshot."""
+        with self._stream_lock:
+            with self.lock:
+                snap, version = self._snapshot, self._version
+            delta = None
+            if last_event_id is not None:
+                try:
+                    delta = self.get_delta(int(last_event_id))
+                except ValueError:
+                    pass
+            if delta is not None:
+                initial = _sse_frame('delta', delta.body, version)
+            else:
+                initial = _sse_frame('snapshot', snap.body, version)
+            sse_broadcaster.subscribe('markets', sock, b'retry: 5000\n\n' + initial)
+
+    def _publish(self):
+        """Re-encode the current state once, outside the lock, for all readers."""
+        snap = EncodedSnapshot(self.get_data())
+        # Stream lock keeps new subscribers from seeing a snapshot before its broadcast
+        with self._stream_lock:
+            with self.lock:
+                self._snapshot = snap
+                self._delta_cache = {}
+                self._query_cache.clear()
+                version = self._version
+            self._broadcast(snap, version)
+        if self.publisher is not None:
+            self.publisher.publish(self.SHARED_NAME, snap)
+
+    def follow(self, snap):
+        """Adopt a snapshot published by the poller process (worker processes only).
+
+        Queries and ?since= deltas are then answered from this replica, while the
+        full payload keeps being served straight from the shared mapping.
+        """
+        data = json.loads(bytes(snap.body))
+        markets = data.get('markets') or []
+        index = MarketIndex(markets)
+        with self.lock:
+            self._markets = markets
+            self._index = index
+            self._version = data.get('version') or 0
+            if markets and (not self._versions or self._versions[-1][0] != self._version):
+                self._versions.append((self._version, markets))
+            self._last_update = data.get('lastUpdate') or 0
+            self._poly_count = data.get('polyCount', 0)
+            self._kalshi_count = data.get('kalshiCount', 0)
+            self._status = data.get('status', 'starting')
+            self._error = data.get('error')
+            self._snapshot = snap
+            self._delta_cache = {}
+            self._query_cache.clear()
 
-    def start(self):
-        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
-        self._thread.start()
+    def _broadcast(self, snap, version):
+        """Push the change since the last streamed version to SSE subscribers."""
+        prev = self._streamed_version
+        delta = self.get_delta(prev) if prev is not None else None
+        if delta is not None:
+            frame = _sse_frame('delta', delta.body, version)
+        else:
+            frame = _sse_frame('snapshot', snap.body, version)
+        self._streamed_version = version
+        sse_broadcaster.publish('markets', frame)
 
-    def get_data(self):
+    def _save_snapshot(self):
+        """Persist the current snapshot (its gzip body is already encoded)."""
+        try:
+            _write_atomic(os.path.join(SNAPSHOT_DIR, self.SNAPSHOT_FILE), self._snapshot.gzip)
+        except OSError as e:
+            sys.stderr.write(f"\033[33m[cache]\033[0m snapshot write failed: {e}\n")
+
+    def _load_snapshot(self):
+        """Serve the last persisted snapshot (marked stale) until the first fetch lands."""
+        data = _read_snapshot(os.path.join(SNAPSHOT_DIR, self.SNAPSHOT_FILE))
+        if not data or not data.get('markets'):
+            return
+        markets = data['markets']
         with self.lock:
-            return {
-                'markets': self._markets,
-                'status': self._status,
-                'lastUpdate': self._last_update,
-                'polyCount': self._poly_count,
-                'kalshiCount': self._kalshi_count,
-                'error': self._error,
-            }
+            if self._markets:
+                return
+            self._markets = markets
+            self._index = MarketIndex(markets)
+            self._spreads = SpreadIndex().updated(markets)
+            self._version = data.get('version') or 0
+            self._versions.append((self._version, markets))
+            self._last_update = data.get('lastUpdate') or 0
+            self._poly_count = data.get('polyCount', 0)
+            self._kalshi_count = data.get('kalshiCount', 0)
+            self._status = 'stale'
+            self._error = 'Warm start from snapshot — refreshing'
+        self._publish()
+        age = time.time() - self._last_update / 1000
+        sys.stderr.write(f"\033[32m[cache]\033[0m warm start: {len(markets)} markets "
+                         f"from snapshot ({age:.0f}s old)\n")
 
     def _poll_loop(self):
         while True:
-            try:
-                self._fetch_all()
-            except Exception as e:
-                with self.lock:
-                    self._status = 'error' if not self._markets else 'stale'
-                    self._error = str(e)
-                sys.stderr.write(f"\033[31m[cache] Error: {e}\033[0m\n")
-            time.sleep(POLL_INTERVAL)
+            now = time.monotonic()
+            due = [name for name, sched in self._schedules.items() if sched.due(now)]
+            if due:
+                try:
+                    self._fetch_all(due)
+                except Exception as e:
+                    with self.lock:
+                        self._status = 'error' if not self._markets else 'stale'
+                        self._error = str(e)
+                    self._publish()
+                    sys.stderr.write(f"\033[31m[cache] Error: {e}\033[0m\n")
+            if self._markets and self.history.due():
+                # Quiet sources can back off past a history bucket; sample the unchanged snapshot
+                self.history.record(self._markets)
+            next_due = min(sched.next_due for sched in self._schedules.values())
+            time.sleep(min(max(next_due - time.monotonic(), 0.5), POLL_MAX_BACKOFF, HISTORY_RESOLUTION / 2))
+
+    def schedule_stats(self):
+        return {name: sched.stats() for name, sched in self._schedules.items()}
 
-    def _fetch_all(self):
+    def _fetch_all(self, sources=None):
+        """Refetch `sources` (default: all), then re-merge with the other sources' last data.
+
+        Each source's schedule is advanced from what its poll saw; if nothing
+        fetched this round differs from before, the merge + publish is skipped.
+        """
         t0 = time.time()
+        deadline = t0 + FETCH_BUDGET
+        sources = list(sources or self.SOURCES)
 
-        # Fetch all 4 sources in parallel using threads
+        # Fetch due sources in parallel using threads; each pages within the budget
         results = {}
         errors = {}
 
-        def fetch_source(name, fn):
+        def fetch_source(name):
+            started = time.perf_counter()
             try:
-                results[name] = fn()
+                results[name] = getattr(self, '_fetch_' + name)(deadline)
             except Exception as e:
-                errors[name] = str(e)
-                results[name] = []
-
-        threads = [
-            threading.Thread(target=fetch_source, args=('poly_events', lambda: self._fetch_poly_events())),
-            threading.Thread(target=fetch_source, args=('poly_markets', lambda: self._fetch_poly_markets())),
-            threading.Thread(target=fetch_source, args=('kalshi_events', lambda: self._fetch_kalshi_events())),
-            threading.Thread(target=fetch_source, args=('kalshi_markets', lambda: self._fetch_kalshi_markets())),
-        ]
+                errors[name] = e
+                market_fetch_errors.inc(name)
+            market_fetch_seconds.observe(time.perf_counter() - started, name)
+
+        threads = [threading.Thread(target=fetch_source, args=(name,)) for name in sources]
         for t in threads:
             t.start()
         for t in threads:
-            t.join(timeout=20)
+            t.join(timeout=max(deadline - time.time(), 0) + 2)
+
+        changed_any = False
+        for name in sources:
+            sched = self._schedules[name]
+            if name not in results:
+                err = errors.get(name) or TimeoutError('exceeded fetch budget')
+                errors[name] = err
+                sched.failed(getattr(err, 'retry_after', None))
+                continue
+            new, old = results[name], self._source_data.get(name)
+            changed, moving, urgent = self._source_activity(old, new)
+            sched.succeeded(changed, moving, urgent)
+            self._source_data[name] = self._carry_over(old, new) if changed else old
+            market_source_records.set(name, value=len(new))
+            changed_any = changed_any or changed
+        with self.lock:
+            throttled, self._throttled = self._throttled, {}
+        for host, hold in throttled.items():
+            for name, source_host in self.SOURCES.items():
+                if source_host == host:
+                    self._schedules[name].defer(hold)
 
-        poly_events = results.get('poly_events', [])
-        poly_markets = results.get('poly_markets', [])
-        kalshi_events = results.get('kalshi_events', [])
-        kalshi_markets = results.get('kalshi_markets', [])
+        if not changed_any and self._markets:
+            if errors:
+                sys.stderr.write(f"\033[33m[cache]\033[0m {', '.join(sources)} failed: "
+                                 f"{ {k: str(v) for k, v in errors.items()} }\n")
+            return   # Nothing new upstream — current snapshot stays as is
 
-        combined = self._merge_markets(poly_events, poly_markets, kalshi_events, kalshi_markets)
+        poly_events = self._source_data.get('poly_events', [])
+        poly_markets = self._source_data.get('poly_markets', [])
+        kalshi_events = self._source_data.get('kalshi_events', [])
+        kalshi_markets = self._source_data.get('kalshi_markets', [])
+
+        with market_merge_seconds.time():
+            combined = _assign_keys(self._merge_markets(poly_events, poly_markets, kalshi_events, kalshi_markets))
+            index = MarketIndex(combined) if combined else None
+            spreads = self._spreads.updated(combined) if combined else None
 
         elapsed = time.time() - t0
+        market_poll_seconds.observe(elapsed)
         poly_total = len(poly_events) + len(poly_markets)
         kalshi_total = len(kalshi_events) + len(kalshi_markets)
 
@@ -115,7 +1988,11 @@ class MarketCache:
         with self.lock:
             if len(combined) > 0:
                 self._markets = combined
+                self._index = index
+                self._spreads = spreads
                 self._last_update = int(time.time() * 1000)
+                self._version = max(self._version + 1, self._last_update)
+                self._versions.append((self._version, combined))
                 self._poly_count = poly_total
                 self._kalshi_count = kalshi_total
                 self._status = 'live'
@@ -127,88 +2004,220 @@ class MarketCache:
             else:
                 self._status = 'error'
                 self._error = 'No data available'
+        self._publish()
+        if combined:
+            self.history.record(combined)
+            self._save_snapshot()
 
-        err_str = f" (errors: {errors})" if errors else ""
+        err_str = f" (errors: { {k: str(v) for k, v in errors.items()} })" if errors else ""
+        pool = upstream_pool.stats()
         sys.stderr.write(
             f"\033[32m[cache]\033[0m {len(combined)} markets "
             f"(poly={poly_total}, kalshi={kalshi_total}) "
-            f"in {elapsed:.1f}s{err_str}\n"
+            f"in {elapsed:.1f}s [{', '.join(sources)}], pool reuse {pool['reuseRate']:.0%} "
+            f"wait max {pool['waitMsMax']:.0f}ms{err_str}\n"
         )
 
+    # ─── Pagination ────────────────────────────────────────────
+
+    def _fetch_offset_pages(self, url_for_offset, page_size, depth, deadline):
+        """Fetch `depth` offset pages concurrently on the page pool.
+
+        Returns raw page lists in order, truncated at the first page that is
+        short/empty or didn't arrive within the budget. Pages that arrived
+        before a later one failed or timed out are still used.
+        """
+        futures = [
+            self._page_pool.submit(self._fetch_json, url_for_offset(i * page_size),
+                                   max(min(15, deadline - time.time()), 1))
+            for i in range(max(depth, 1))
+        ]
+        concurrent.futures.wait(futures, timeout=max(deadline - time.time(), 0))
+        pages, error = [], None
+        for i, fut in enumerate(futures):
+            if not fut.done():
+                error = f'page {i + 1} exceeded fetch budget'
+                break
+            if fut.exception() is not None:
+                error = str(fut.exception())
+                break
+            items = fut.result()
+            if not items:
+                break
+            pages.append(items)
+            if len(items) < page_size:
+                break   # Last page
+        for fut in futures:
+            fut.cancel()
+        if error:
+            if not pages:
+                raise RuntimeError(error)
+            sys.stderr.write(f"\033[33m[cache]\033[0m partial pages ({len(pages)}/{depth}): {error}\n")
+        return pages
+
+    def _fetch_cursor_pages(self, url_for_cursor, list_key, depth, deadline):
+        """Follow a cursor-paginated endpoint page by page until depth, exhaustion or budget."""
+        pages, cursor = [], None
+        for _ in range(max(depth, 1)):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                data = self._fetch_json(url_for_cursor(cursor), timeout=max(min(15, remaining), 1))
+            except Exception:
+                if not pages:
+                    raise
+                break   # Keep what already arrived
+            items = data.get(list_key, []) if isinstance(data, dict) else []
+            if not items:
+                break
+            pages.append(items)
+            cursor = data.get('cursor')
+            if not cursor:
+                break
+        return pages
+
+    @staticmethod
+    def _dedup(records):
+        """Drop repeats across pages (offset pages can overlap when rankings shift)."""
+        out, seen = [], set()
+        for r in records:
+            k = r.uid
+            if k is not None:
+                if k in seen:
+                    continue
+                seen.add(k)
+            out.append(r)
+        return out
+
     # ─── Polymarket ────────────────────────────────────────────
 
     def _fetch_json(self, url, timeout=15):
-        req = urllib.request.Request(url, headers={
-            'User-Agent': 'Mozilla/5.0 Mercury/1.0',
-            'Accept': 'application/json',
-        })
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read())
-
-    def _fetch_poly_events(self):
+        """GET + decode, conditional on the validators from this URL's last 200."""
+        def get(conditional):
+            try:
+                return upstream_pool.get(url, headers={
+                    'User-Agent': 'Mozilla/5.0 Mercury/1.0',
+                    'Accept': 'application/json',
+                    **conditional,
+                }, timeout=timeout)
+            except UpstreamError as e:
+                if e.status == 429:
+                    host = urllib.parse.urlsplit(url).hostname
+                    with self.lock:   # page-pool threads report 429s concurrently
+                        self._throttled[host] = max(self._throttled.get(host, 0),
+                                                    e.retry_after or self.THROTTLE_DEFAULT)
+                raise
+
+        conditional, cached = self._conditional.lookup(url)
+        resp = get(conditional)
+        if resp.status == 304:
+            if cached is not None:
+                upstream_not_modified.inc('markets')
+                return cached
+            resp = get({})   # Nothing to reuse — ask again for the full body
+        data = json.loads(resp.body)
+        self._conditional.store(url, resp, data)
+        return data
+
+    @staticmethod
+    def _carry_over(old, new):
+        """Reuse last round's record objects for records that came back unchanged.
+
+        Unchanged markets then stay shared with earlier snapshot versions (one
+        copy in the delta ring) and diff by identity.
+        """
+        if not old:
+            return new
+        prev = {r.uid: r for r in old}
+        out = []
+        for r in new:
+            p = prev.get(r.uid)
+            out.append(p if p is not None and p == r else r)
+        return out
+
+    def _source_activity(self, old, new):
+        """(changed, moving, urgent) for a source's fresh records vs. its previous ones."""
+        if old is None:
+            changed, moving = True, False
+        else:
+            prev = {r.uid: r.price for r in old}
+            repriced = sum(1 for r in new if prev.get(r.uid, -1) != r.price)
+            changed = repriced > 0 or new != old   # 304s re-parse to equal records
+            moving = repriced >= max(1, len(new) * self.MOVE_FRACTION)
+        now = time.time()
+        top = sorted(new, key=operator.attrgetter('_volNum'), reverse=True)[:self.URGENT_TOP_N]
+        urgent = any(0 < r.end_ts - now < self.EXPIRY_WINDOW for r in top)
+        return changed, moving, urgent
+
+    def _fetch_poly_events(self, deadline=None):
+        deadline = deadline or time.time() + FETCH_BUDGET
+        pages = self._fetch_offset_pages(
+            lambda offset: f'https://gamma-api.polymarket.com/events?limit=100&active=true&closed=false&order=volume24hr&ascending=false&offset={offset}',
+            100, PAGE_DEPTH['poly_events'], deadline)
         events = []
-        for page in range(1, 2):  # Single page — top 100 events by volume
-            url = f'https://gamma-api.polymarket.com/events?limit=100&active=true&closed=false&order=volume24hr&ascending=false&offset={100*(page-1)}'
-            data = self._fetch_json(url)
-            if not data:
-                break
-            for ev in data:
-                markets_list = ev.get('markets', [])
-                if not markets_list:
-                    continue
-                active_markets = [m for m in markets_list if m.get('active') and not m.get('closed')]
-                if not active_markets:
-                    continue
-                # Aggregate volume
-                total_vol = sum(float(m.get('volume24hr', 0) or 0) for m in active_markets)
-                # Best price from first market
-                first = active_markets[0]
-                price = round(float(first.get('outcomePrices', '["0.5"]').strip('[]').split(',')[0] or 0.5) * 100)
-                # Build sub-markets
-                subs = []
-                for m in active_markets[:30]:
-                    outcomes = m.get('outcomePrices', '[]')
-                    try:
-                        op = json.loads(outcomes)
-                    except:
-                        op = [0.5]
-                    mp = round(float(op[0]) * 100) if op else 50
-                    subs.append({
-                        'name': m.get('groupItemTitle') or m.get('question', ''),
-                        'price': mp,
-                        'vol': self._fmt_vol(float(m.get('volume24hr', 0) or 0)),
-                        '_volNum': float(m.get('volume24hr', 0) or 0),
-                        'bestBid': round(float(m.get('bestBid', 0) or 0) * 100),
-                        'bestAsk': round(float(m.get('bestAsk', 0) or 0) * 100),
-                        'source': 'polymarket',
-                        'conditionId': m.get('conditionId'),
-                        'clobTokenId': (m.get('clobTokenIds', '[]').strip('[]').split(',')[0].strip(' "') if m.get('clobTokenIds') else None),
-                    })
-                is_event = len(active_markets) > 1
-                first_clob = (first.get('clobTokenIds', '[]').strip('[]').split(',')[0].strip(' "') if first.get('clobTokenIds') else None)
-                events.append({
-                    'name': ev.get('title', ''),
-                    'price': price,
-                    'volume24h': total_vol,
-                    'endDate': ev.get('endDate'),
-                    'slug': ev.get('slug'),
-                    'id': ev.get('id'),
-                    'bestBid': round(float(first.get('bestBid', 0) or 0) * 100),
-                    'bestAsk': round(float(first.get('bestAsk', 0) or 0) * 100),
-                    'liquidity': float(first.get('liquidity', 0) or 0),
-                    'conditionId': first.get('conditionId'),
-                    'clobTokenId': first_clob,
-                    'isEvent': is_event,
-                    'subCount': len(active_markets),
-                    'subMarkets': subs,
-                    'source': 'polymarket',
-                })
-            break  # Single page
+        for data in pages:
+            events.extend(self._parse_poly_events(data))
+        return self._dedup(events)
+
+    def _parse_poly_events(self, data):
+        events = []
+        for ev in (data or []):
+            markets_list = ev.get('markets', [])
+            if not markets_list:
+                continue
+            active_markets = [m for m in markets_list if m.get('active') and not m.get('closed')]
+            if not active_markets:
+                continue
+            # Aggregate volume
+            total_vol = sum(float(m.get('volume24hr', 0) or 0) for m in active_markets)
+            # Best price from first market
+            first = active_markets[0]
+            price = round(float(first.get('outcomePrices', '["0.5"]').strip('[]').split(',')[0] or 0.5) * 100)
+            # Build sub-markets
+            subs = []
+            for m in active_markets[:30]:
+                outcomes = m.get('outcomePrices', '[]')
+                try:
+                    op = json.loads(outcomes)
+                except:
+                    op = [0.5]
+                mp = round(float(op[0]) * 100) if op else 50
+                subs.append(self._sub_market(
+                    'polymarket', m.get('groupItemTitle') or m.get('question', ''), mp,
+                    float(m.get('volume24hr', 0) or 0),
+                    round(float(m.get('bestBid', 0) or 0) * 100),
+                    round(float(m.get('bestAsk', 0) or 0) * 100),
+                    condition_id=m.get('conditionId'),
+                    clob_token_id=(m.get('clobTokenIds', '[]').strip('[]').split(',')[0].strip(' "') if m.get('clobTokenIds') else None),
+                ))
+            is_event = len(active_markets) > 1
+            first_clob = (first.get('clobTokenIds', '[]').strip('[]').split(',')[0].strip(' "') if first.get('clobTokenIds') else None)
+            events.append(self._market(
+                'polymarket', ev.get('id'), ev.get('title', ''), price, total_vol, ev.get('endDate'),
+                round(float(first.get('bestBid', 0) or 0) * 100),
+                round(float(first.get('bestAsk', 0) or 0) * 100),
+                float(first.get('liquidity', 0) or 0),
+                is_event=is_event,
+                sub_count=len(active_markets),
+                subs=_assign_keys(subs, fresh=True),
+                slug=ev.get('slug'),
+                condition_id=first.get('conditionId'),
+                clob_token_id=first_clob,
+            ))
         return events
 
-    def _fetch_poly_markets(self):
-        url = 'https://gamma-api.polymarket.com/markets?limit=200&active=true&closed=false&order=volume24hr&ascending=false'
-        data = self._fetch_json(url)
+    def _fetch_poly_markets(self, deadline=None):
+        deadline = deadline or time.time() + FETCH_BUDGET
+        pages = self._fetch_offset_pages(
+            lambda offset: f'https://gamma-api.polymarket.com/markets?limit=200&active=true&closed=false&order=volume24hr&ascending=false&offset={offset}',
+            200, PAGE_DEPTH['poly_markets'], deadline)
+        markets = []
+        for data in pages:
+            markets.extend(self._parse_poly_markets(data))
+        return self._dedup(markets)
+
+    def _parse_poly_markets(self, data):
         markets = []
         for m in (data or []):
             if not m.get('active') or m.get('closed'):
@@ -220,129 +2229,127 @@ class MarketCache:
                 op = [0.5]
             price = round(float(op[0]) * 100) if op else 50
             clob = (m.get('clobTokenIds', '[]').strip('[]').split(',')[0].strip(' "') if m.get('clobTokenIds') else None)
-            markets.append({
-                'name': m.get('question', ''),
-                'price': price,
-                'volume24h': float(m.get('volume24hr', 0) or 0),
-                'endDate': m.get('endDate'),
-                'slug': m.get('slug'),
-                'id': m.get('id'),
-                'bestBid': round(float(m.get('bestBid', 0) or 0) * 100),
-                'bestAsk': round(float(m.get('bestAsk', 0) or 0) * 100),
-                'liquidity': float(m.get('liquidity', 0) or 0),
-                'conditionId': m.get('conditionId'),
-                'clobTokenId': clob,
-                'source': 'polymarket',
-            })
+            markets.append(self._market(
+                'polymarket', m.get('id'), m.get('question', ''), price,
+                float(m.get('volume24hr', 0) or 0), m.get('endDate'),
+                round(float(m.get('bestBid', 0) or 0) * 100),
+                round(float(m.get('bestAsk', 0) or 0) * 100),
+                float(m.get('liquidity', 0) or 0),
+                slug=m.get('slug'),
+                condition_id=m.get('conditionId'),
+                clob_token_id=clob,
+            ))
         return markets
 
     # ─── Kalshi ────────────────────────────────────────────────
 
-    def _fetch_kalshi_events(self):
+    def _fetch_kalshi_events(self, deadline=None):
+        deadline = deadline or time.time() + FETCH_BUDGET
+        base = 'https://api.elections.kalshi.com/trade-api/v2/events?limit=100&with_nested_markets=true&status=open'
+        pages = self._fetch_cursor_pages(
+            lambda cursor: base + (f'&cursor={urllib.parse.quote(cursor)}' if cursor else ''),
+            'events', PAGE_DEPTH['kalshi_events'], deadline)
         events = []
-        for page in range(1, 2):  # Single page — top 100 events
-            url = f'https://api.elections.kalshi.com/trade-api/v2/events?limit=100&with_nested_markets=true&status=open&offset={100*(page-1)}'
-            data = self._fetch_json(url)
-            event_list = data.get('events', []) if isinstance(data, dict) else []
-            if not event_list:
-                break
-            for ev in event_list:
-                markets_list = ev.get('markets', [])
-                active_markets = [m for m in markets_list if m.get('status') == 'active']
-                if not active_markets:
-                    continue
-                total_vol = sum(m.get('volume_24h', 0) or 0 for m in active_markets)
-                first = active_markets[0]
-                price = round((first.get('yes_price', 0.5) or 0.5) * 100) if isinstance(first.get('yes_price'), (int, float)) else round(float(first.get('last_price', 50) or 50))
-                subs = []
-                for m in active_markets[:30]:
-                    mp = round((m.get('yes_price', 0.5) or 0.5) * 100) if isinstance(m.get('yes_price'), (int, float)) else 50
-                    subs.append({
-                        'name': m.get('title') or m.get('subtitle', ''),
-                        'ticker': m.get('ticker'),
-                        'price': mp,
-                        'vol': self._fmt_vol(m.get('volume_24h', 0) or 0),
-                        '_volNum': m.get('volume_24h', 0) or 0,
-                        'yesBid': round((m.get('yes_bid', 0) or 0) * 100) if isinstance(m.get('yes_bid'), float) else m.get('yes_bid', 0),
-                        'yesAsk': round((m.get('yes_ask', 0) or 0) * 100) if isinstance(m.get('yes_ask'), float) else m.get('yes_ask', 0),
-                        'source': 'kalshi',
-                    })
-                is_event = len(active_markets) > 1
-                events.append({
-                    'name': ev.get('title', ''),
-                    'price': price,
-                    'volume24h': total_vol,
-                    'closeTime': ev.get('close_date') or ev.get('expected_expiration_time'),
-                    'eventTicker': ev.get('event_ticker'),
-                    'yesBid': round((first.get('yes_bid', 0) or 0) * 100) if isinstance(first.get('yes_bid'), float) else first.get('yes_bid', 0),
-                    'yesAsk': round((first.get('yes_ask', 0) or 0) * 100) if isinstance(first.get('yes_ask'), float) else first.get('yes_ask', 0),
-                    'liquidity': first.get('liquidity', 0) or 0,
-                    'isEvent': is_event,
-                    'subCount': len(active_markets),
-                    'subMarkets': subs,
-                    'source': 'kalshi',
-                })
-            break  # Single page
+        for event_list in pages:
+            events.extend(self._parse_kalshi_events(event_list))
+        return self._dedup(events)
+
+    def _parse_kalshi_events(self, event_list):
+        events = []
+        for ev in event_list:
+            markets_list = ev.get('markets', [])
+            active_markets = [m for m in markets_list if m.get('status') == 'active']
+            if not active_markets:
+                continue
+            total_vol = sum(m.get('volume_24h', 0) or 0 for m in active_markets)
+            first = active_markets[0]
+            price = round((first.get('yes_price', 0.5) or 0.5) * 100) if isinstance(first.get('yes_price'), (int, float)) else round(float(first.get('last_price', 50) or 50))
+            subs = []
+            for m in active_markets[:30]:
+                mp = round((m.get('yes_price', 0.5) or 0.5) * 100) if isinstance(m.get('yes_price'), (int, float)) else 50
+                subs.append(self._sub_market(
+                    'kalshi', m.get('title') or m.get('subtitle', ''), mp, m.get('volume_24h', 0) or 0,
+                    round((m.get('yes_bid', 0) or 0) * 100) if isinstance(m.get('yes_bid'), float) else m.get('yes_bid', 0),
+                    round((m.get('yes_ask', 0) or 0) * 100) if isinstance(m.get('yes_ask'), float) else m.get('yes_ask', 0),
+                    ticker=m.get('ticker'),
+                ))
+            is_event = len(active_markets) > 1
+            events.append(self._market(
+                'kalshi', ev.get('event_ticker'), ev.get('title', ''), price, total_vol,
+                ev.get('close_date') or ev.get('expected_expiration_time'),
+                round((first.get('yes_bid', 0) or 0) * 100) if isinstance(first.get('yes_bid'), float) else first.get('yes_bid', 0),
+                round((first.get('yes_ask', 0) or 0) * 100) if isinstance(first.get('yes_ask'), float) else first.get('yes_ask', 0),
+                first.get('liquidity', 0) or 0,
+                is_event=is_event,
+                sub_count=len(active_markets),
+                subs=_assign_keys(subs, fresh=True),
+                kalshi_ticker=subs[0].ticker or ev.get('event_ticker'),
+            ))
         return events
 
-    def _fetch_kalshi_markets(self):
-        url = 'https://api.elections.kalshi.com/trade-api/v2/markets?limit=200&status=open'
-        data = self._fetch_json(url)
-        markets_list = data.get('markets', []) if isinstance(data, dict) else []
+    def _fetch_kalshi_markets(self, deadline=None):
+        deadline = deadline or time.time() + FETCH_BUDGET
+        base = 'https://api.elections.kalshi.com/trade-api/v2/markets?limit=200&status=open'
+        pages = self._fetch_cursor_pages(
+            lambda cursor: base + (f'&cursor={urllib.parse.quote(cursor)}' if cursor else ''),
+            'markets', PAGE_DEPTH['kalshi_markets'], deadline)
+        markets = []
+        for markets_list in pages:
+            markets.extend(self._parse_kalshi_markets(markets_list))
+        return self._dedup(markets)
+
+    def _parse_kalshi_markets(self, markets_list):
         markets = []
         for m in markets_list:
             if m.get('status') not in ('active', 'open'):
                 continue
             price = round((m.get('yes_price', 0.5) or 0.5) * 100) if isinstance(m.get('yes_price'), (int, float)) else 50
-            markets.append({
-                'name': m.get('title') or m.get('subtitle', ''),
-                'price': price,
-                'volume24h': m.get('volume_24h', 0) or 0,
-                'closeTime': m.get('close_time') or m.get('expected_expiration_time'),
-                'ticker': m.get('ticker'),
-                'yesBid': round((m.get('yes_bid', 0) or 0) * 100) if isinstance(m.get('yes_bid'), float) else m.get('yes_bid', 0),
-                'yesAsk': round((m.get('yes_ask', 0) or 0) * 100) if isinstance(m.get('yes_ask'), float) else m.get('yes_ask', 0),
-                'liquidity': m.get('liquidity', 0) or 0,
-                'source': 'kalshi',
-            })
+            markets.append(self._market(
+                'kalshi', m.get('ticker'), m.get('title') or m.get('subtitle', ''), price,
+                m.get('volume_24h', 0) or 0,
+                m.get('close_time') or m.get('expected_expiration_time'),
+                round((m.get('yes_bid', 0) or 0) * 100) if isinstance(m.get('yes_bid'), float) else m.get('yes_bid', 0),
+                round((m.get('yes_ask', 0) or 0) * 100) if isinstance(m.get('yes_ask'), float) else m.get('yes_ask', 0),
+                m.get('liquidity', 0) or 0,
+                kalshi_ticker=m.get('ticker'),
+            ))
         return markets
 
+    def _market(self, source, uid, name, price, volume, end_date, bid, ask, liquidity, **extra):
+        """Build a Market with every derived field (short name, tf, score, key) filled in."""
+        norm = self._normalize(name)
+        end_ts = _parse_end_date(end_date)
+        # Volume labels ("$12K") repeat across thousands of records — keep one copy of each
+        return Market(source, uid, name, norm, self._short_name(name), price, volume,
+                      sys.intern(self._fmt_vol(volume)), end_date, end_ts, _timeframe(end_ts), bid, ask,
+                      liquidity, self._chart_score(price, volume), _norm_key(norm), **extra)
+
+    def _sub_market(self, source, name, price, volume, bid, ask, **extra):
+        norm = self._normalize(name)
+        return SubMarket(source, name, norm, price, volume, sys.intern(self._fmt_vol(volume)), bid, ask,
+                         _norm_key(norm), **extra)
+
     # ─── Merge + Dedup ─────────────────────────────────────────
 
+    # Every byte except a-z0-9, for _normalize's delete-table
+    _NON_ALNUM = bytes(b for b in range(128) if not (97 <= b <= 122 or 48 <= b <= 57))
+
     def _normalize(self, name):
+        """Lowercased name with everything but a-z0-9 removed."""
         if not name:
             return ''
-        return re.sub(r'[^a-z0-9]', '', name.lower())
+        return name.lower().encode('ascii', 'ignore').translate(None, self._NON_ALNUM).decode()
 
     def _short_name(self, name):
         if not name:
             return ''
-        name = re.sub(r'\?$', '', name.strip())
+        name = name.strip().removesuffix('?')
         words = name.split()[:5]
         short = ''.join(w[:4].upper() for w in words if len(w) > 2)
         return short[:12] if short else name[:12].upper()
 
     def _classify_tf(self, date_str):
-        if not date_str:
-            return '1M'
-        try:
-            from datetime import datetime
-            if 'T' in str(date_str):
-                dt = datetime.fromisoformat(str(date_str).replace('Z', '+00:00'))
-            else:
-                dt = datetime.fromisoformat(str(date_str))
-            diff = (dt.timestamp() - time.time()) / 3600
-            if diff < 0.5:
-                return '15M'
-            if diff < 3:
-                return '1H'
-            if diff < 168:
-                return '1W'
-            if diff < 720:
-                return '1M'
-            return '1Y'
-        except:
-            return '1M'
+        return _timeframe(_parse_end_date(date_str))
 
     def _fmt_vol(self, v):
         if v >= 1e6:
@@ -359,156 +2366,162 @@ class MarketCache:
         return volume * price_weight
 
     def _merge_markets(self, poly_events, poly_markets, kalshi_events, kalshi_markets):
+        """Combine the parsed sources into one list sorted by chart score.
+
+        Parsed records are never modified: what a record picks up from Kalshi
+        (prices, sub-markets) is collected per record and applied to a copy at
+        the end, so every record nothing merged into is passed through as is.
+        """
         combined = []
         seen = set()
+        # Hash indexes so cross-venue matching is O(1) per record instead of a
+        # scan of `combined` (names are normalized once, when parsed)
+        by_norm = {}      # normalized name -> first combined record with that name
+        sub_index = {}    # id(record) -> {normalized sub-market name -> position in its sub list}
+        overlay = {}      # id(record) -> {field: value} picked up from Kalshi records
+        owned = set()     # ids of sub-market copies made by this merge (safe to modify)
+
+        def add(rec, norm):
+            combined.append(rec)
+            by_norm.setdefault(norm, rec)
+
+        def field(rec, name):
+            ov = overlay.get(id(rec))
+            return ov[name] if ov and name in ov else getattr(rec, name)
+
+        def index_subs(rec):
+            idx = sub_index.get(id(rec))
+            if idx is None:
+                idx = {}
+                for i, sm in enumerate(field(rec, 'subMarkets') or ()):
+                    idx.setdefault(sm.norm, i)
+                sub_index[id(rec)] = idx
+            return idx
+
+        def take_kalshi_side(existing, confidence, k):
+            ov = overlay.setdefault(id(existing), {})
+            if existing.source == 'polymarket':
+                ov['matchConfidence'] = confidence
+            ov['kalshiPrice'] = k.price
+            ov['kalshiBid'] = k.kalshiBid
+            ov['kalshiAsk'] = k.kalshiAsk
+            ov['_kalshiTicker'] = k._kalshiTicker
+            return ov
 
         # Polymarket events
         for ev in poly_events:
-            norm = self._normalize(ev['name'])
-            seen.add(norm)
-            for sm in (ev.get('subMarkets') or []):
-                seen.add(self._normalize(sm['name']))
-            combined.append({
-                'name': ev['name'],
-                'short': self._short_name(ev['name']),
-                'price': ev['price'],
-                'vol': self._fmt_vol(ev['volume24h']),
-                '_volNum': ev['volume24h'],
-                'polyPrice': ev['price'],
-                'kalshiPrice': None,
-                'polyBid': ev.get('bestBid'),
-                'polyAsk': ev.get('bestAsk'),
-                'tf': self._classify_tf(ev.get('endDate')),
-                '_endDate': ev.get('endDate'),
-                'source': 'polymarket',
-                'slug': ev.get('slug'),
-                '_polyId': ev.get('id'),
-                '_conditionId': ev.get('conditionId'),
-                '_clobTokenId': ev.get('clobTokenId'),
-                'liquidity': ev.get('liquidity', 0),
-                'isEvent': ev.get('isEvent', False),
-                'subCount': ev.get('subCount', 0),
-                'subMarkets': ev.get('subMarkets'),
-            })
+            seen.add(ev.norm)
+            seen.update(index_subs(ev))
+            add(ev, ev.norm)
 
         # Individual Polymarket markets
         for m in poly_markets:
-            norm = self._normalize(m['name'])
-            if norm in seen:
+            if m.norm in seen:
                 continue
-            seen.add(norm)
-            combined.append({
-                'name': m['name'],
-                'short': self._short_name(m['name']),
-                'price': m['price'],
-                'vol': self._fmt_vol(m['volume24h']),
-                '_volNum': m['volume24h'],
-                'polyPrice': m['price'],
-                'kalshiPrice': None,
-                'polyBid': m.get('bestBid'),
-                'polyAsk': m.get('bestAsk'),
-                'tf': self._classify_tf(m.get('endDate')),
-                '_endDate': m.get('endDate'),
-                'source': 'polymarket',
-                'slug': m.get('slug'),
-                '_polyId': m.get('id'),
-                '_conditionId': m.get('conditionId'),
-                '_clobTokenId': m.get('clobTokenId'),
-                'liquidity': m.get('liquidity', 0),
-                'isEvent': False,
-                'subCount': 0,
-                'subMarkets': None,
-            })
+            seen.add(m.norm)
+            add(m, m.norm)
+
+        # Titles that don't normalize identically fall back to the fuzzy matcher
+        if self.FUZZY_MATCH:
+            self._matcher.begin_poll(combined)
+
+        def find_match(rec):
+            """Combined record this Kalshi record merges into → (record or None, confidence)."""
+            existing = by_norm.get(rec.norm)
+            if existing:
+                return existing, 1.0
+            if not self.FUZZY_MATCH:
+                return None, 0.0
+            existing, score = self._matcher.match(rec.uid or rec.name, rec.name)
+            # Only pair with a Polymarket record that doesn't have a Kalshi side yet
+            if existing is None or field(existing, 'kalshiPrice') is not None:
+                return None, 0.0
+            by_norm.setdefault(rec.norm, existing)
+            return existing, score
 
         # Kalshi events — merge or add
         for ev in kalshi_events:
-            norm = self._normalize(ev['name'])
-            existing = next((c for c in combined if self._normalize(c['name']) == norm), None)
+            existing, confidence = find_match(ev)
             if existing:
-                existing['kalshiPrice'] = ev['price']
-                existing['kalshiBid'] = ev.get('yesBid')
-                existing['kalshiAsk'] = ev.get('yesAsk')
-                existing['_kalshiTicker'] = (ev.get('subMarkets', [{}])[0].get('ticker') or ev.get('eventTicker'))
-                # Merge sub-markets
-                if ev.get('isEvent') and ev.get('subMarkets'):
-                    if not existing.get('isEvent'):
-                        existing['isEvent'] = True
-                        existing['subMarkets'] = existing.get('subMarkets') or []
-                    for ksm in ev['subMarkets']:
-                        kn = self._normalize(ksm['name'])
-                        esub = next((s for s in (existing['subMarkets'] or []) if self._normalize(s['name']) == kn), None)
-                        if esub:
-                            esub['kalshiPrice'] = ksm['price']
-                        else:
-                            existing['subMarkets'] = existing.get('subMarkets') or []
-                            existing['subMarkets'].append(ksm)
-                    existing['subCount'] = len(existing['subMarkets'] or [])
+                ov = take_kalshi_side(existing, confidence, ev)
+                # Merge sub-markets into this merge's own copy of the list
+                if ev.isEvent and ev.subMarkets:
+                    ov['isEvent'] = True
+                    subs = index_subs(existing)
+                    merged = ov.get('subMarkets')
+                    if merged is None:
+                        merged = ov['subMarkets'] = list(existing.subMarkets or ())
+                    for ksm in ev.subMarkets:
+                        pos = subs.get(ksm.norm)
+                        if pos is None:
+                            subs[ksm.norm] = len(merged)
+                            merged.append(ksm)
+                            continue
+                        esub = merged[pos]
+                        if id(esub) not in owned:
+                            esub = merged[pos] = esub.copy()
+                            owned.add(id(esub))
+                        esub.kalshiPrice = ksm.price
+                        if esub.source == 'polymarket':
+                            # Kalshi book, off the wire for Polymarket subs; read by SpreadIndex
+                            esub.yesBid, esub.yesAsk = ksm.yesBid, ksm.yesAsk
+                    ov['subCount'] = len(merged)
             else:
-                for sm in (ev.get('subMarkets') or []):
-                    seen.add(self._normalize(sm['name']))
-                seen.add(norm)
-                combined.append({
-                    'name': ev['name'],
-                    'short': self._short_name(ev['name']),
-                    'price': ev['price'],
-                    'vol': self._fmt_vol(ev['volume24h']),
-                    '_volNum': ev['volume24h'],
-                    'polyPrice': None,
-                    'kalshiPrice': ev['price'],
-                    'kalshiBid': ev.get('yesBid'),
-                    'kalshiAsk': ev.get('yesAsk'),
-                    'tf': self._classify_tf(ev.get('closeTime')),
-                    '_endDate': ev.get('closeTime'),
-                    'source': 'kalshi',
-                    '_kalshiTicker': (ev.get('subMarkets', [{}])[0].get('ticker') or ev.get('eventTicker')),
-                    'liquidity': ev.get('liquidity', 0),
-                    'isEvent': ev.get('isEvent', False),
-                    'subCount': ev.get('subCount', 0),
-                    'subMarkets': ev.get('subMarkets'),
-                })
+                seen.update(index_subs(ev))
+                seen.add(ev.norm)
+                add(ev, ev.norm)
 
         # Remaining individual Kalshi markets
         for m in kalshi_markets:
-            norm = self._normalize(m['name'])
-            existing = next((c for c in combined if self._normalize(c['name']) == norm), None)
+            existing, confidence = find_match(m)
             if existing:
-                if existing.get('kalshiPrice') is None:
-                    existing['kalshiPrice'] = m['price']
-                    existing['kalshiBid'] = m.get('yesBid')
-                    existing['kalshiAsk'] = m.get('yesAsk')
-                    existing['_kalshiTicker'] = m.get('ticker')
-            elif norm not in seen:
-                seen.add(norm)
-                combined.append({
-                    'name': m['name'],
-                    'short': self._short_name(m['name']),
-                    'price': m['price'],
-                    'vol': self._fmt_vol(m['volume24h']),
-                    '_volNum': m['volume24h'],
-                    'polyPrice': None,
-                    'kalshiPrice': m['price'],
-                    'kalshiBid': m.get('yesBid'),
-                    'kalshiAsk': m.get('yesAsk'),
-                    'tf': self._classify_tf(m.get('closeTime')),
-                    '_endDate': m.get('closeTime'),
-                    'source': 'kalshi',
-                    '_kalshiTicker': m.get('ticker'),
-                    'liquidity': m.get('liquidity', 0),
-                    'isEvent': False,
-                    'subCount': 0,
-                    'subMarkets': None,
-                })
+                if field(existing, 'kalshiPrice') is None:
+                    take_kalshi_side(existing, confidence, m)
+            elif m.norm not in seen:
+                seen.add(m.norm)
+                add(m, m.norm)
+        if self.FUZZY_MATCH:
+            self._matcher.end_poll()
+
+        # Copy only the records that picked something up (or crossed a timeframe
+        # boundary since they were parsed); the rest are shared as parsed
+        now = time.time()
+        for i, rec in enumerate(combined):
+            ov = overlay.get(id(rec))
+            tf = _timeframe(rec.end_ts, now)
+            if ov is None and tf == rec.tf:
+                continue
+            rec = combined[i] = rec.replace(tf=tf)
+            for name, value in (ov or {}).items():
+                setattr(rec, name, value)
+            if ov and 'subMarkets' in ov:
+                _assign_keys(rec.subMarkets)
 
-        # Add chart quality score and sort by it (mid-range prices + high volume = top)
-        for m in combined:
-            m['_chartScore'] = self._chart_score(m.get('price', 50), m.get('_volNum', 0))
-        combined.sort(key=lambda x: x.get('_chartScore', 0), reverse=True)
+        # Sort by chart quality score (mid-range prices + high volume = top)
+        combined.sort(key=operator.attrgetter('_chartScore'), reverse=True)
         return combined
 
 
 # Singleton cache instance
 market_cache = MarketCache()
 
+metrics.collect('mercury_markets', 'Markets in the live snapshot',
+                lambda: len(market_cache._markets))
+metrics.collect('mercury_market_snapshot_age_seconds', 'Seconds since the market snapshot last changed',
+                lambda: round(time.time() - market_cache._last_update / 1000, 3) if market_cache._last_update else -1)
+metrics.collect('mercury_market_snapshot_bytes', 'Encoded /api/markets payload size',
+                lambda: {enc: len(body) for enc, body in (('identity', market_cache._snapshot.body),
+                                                          ('gzip', market_cache._snapshot.gzip))},
+                labels=('encoding',))
+metrics.collect('mercury_poll_interval_seconds', 'Current adaptive poll interval per market source',
+                lambda: {k: v['interval'] for k, v in market_cache.schedule_stats().items()}, labels=('source',))
+metrics.collect('mercury_poll_consecutive_failures', 'Consecutive failed polls per market source (backoff level)',
+                lambda: {k: v['failures'] for k, v in market_cache.schedule_stats().items()}, labels=('source',))
+metrics.collect('mercury_spreads_positive', 'Cross-venue quotes with a positive executable edge',
+                lambda: market_cache._spreads.positive())
+metrics.collect('mercury_history_series', 'Series tracked by the price history store',
+                lambda: len(market_cache.history._rows))
+
 
 # ═══════════════════════════════════════════════════════════════
 # TRENDING KEYWORDS CACHE — detects keyword spikes from news
@@ -532,69 +2545,278 @@ _STOP_WORDS = frozenset(
 )
 
 
+class KeywordHistory:
+    """Per-keyword count rings in one flat array('i'), rows × slots.
+
+    Every tracked keyword gets one reading per cycle (its count, or 0), so all
+    rows share one column cursor; a row's length is how many cycles it has been
+    alive, capped at `slots`. Integer running sums and sums of squares per row
+    make the mean/variance of the prior readings O(1), and rows of dead
+    keywords go on a free list for reuse.
+    """
+
+    def __init__(self, slots, dead_after=6, capacity=1024):
+        self.slots = slots
+        self.dead_after = dead_after   # drop a keyword after this many zero readings in a row
+        self._cycle = 0                # readings taken; the latest is in column (cycle - 1) % slots
+        self._rows = {}                # keyword -> row
+        self._free = []
+        self._values = array.array('i')
+        self._born = array.array('q')  # cycle index of each row's first reading
+        self._sum = array.array('q')
+        self._sumsq = array.array('q')
+        self._zeros = array.array('q')  # trailing zero readings
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, keyword):
+        return keyword in self._rows
+
+    def record(self, counts):
+        """Take one reading for every tracked keyword plus any new ones in `counts`."""
+        slots = self.slots
+        col = self._cycle % slots
+        for kw in counts:
+            if kw not in self._rows:
+                self._alloc(kw)
+        self._cycle += 1
+        values, sums, sumsq, zeros, born = self._values, self._sum, self._sumsq, self._zeros, self._born
+        dead = []
+        for kw, row in self._rows.items():
+            v = counts.get(kw, 0)
+            i = row * slots + col
+            if self._cycle - born[row] > slots:   # Ring full — this overwrites the oldest reading
+                old = values[i]
+                sums[row] -= old
+                sumsq[row] -= old * old
+            values[i] = v
+            sums[row] += v
+            sumsq[row] += v * v
+            if v:
+                zeros[row] = 0
+            else:
+                zeros[row] += 1
+                if zeros[row] >= self.dead_after:
+                    dead.append(kw)
+        for kw in dead:
+            self._free.append(self._rows.pop(kw))
+
+    def stats(self, keyword):
+        """(latest, previous, prior readings, prior mean, prior variance) — O(1).
+
+        "Prior" is every reading in the ring except the latest; previous is the
+        latest when there is no prior reading.
+        """
+        row = self._rows[keyword]
+        n = min(self._cycle - self._born[row], self.slots)
+        col = (self._cycle - 1) % self.slots
+        latest = self._values[row * self.slots + col]
+        if n < 2:
+            return latest, latest, 0, 0.0, 0.0
+        prev = self._values[row * self.slots + (col - 1) % self.slots]
+        n -= 1
+        total = self._sum[row] - latest
+        total_sq = self._sumsq[row] - latest * latest
+        return latest, prev, n, total / n, (n * total_sq - total * total) / (n * n)
+
+    def series(self, keyword):
+        """Readings for `keyword`, oldest first."""
+        row = self._rows[keyword]
+        n = min(self._cycle - self._born[row], self.slots)
+        base = row * self.slots
+        return [self._values[base + c % self.slots] for c in range(self._cycle - n, self._cycle)]
+
+    def max_readings(self):
+        return max((min(self._cycle - self._born[r], self.slots) for r in self._rows.values()), default=0)
+
+    def export(self):
+        """{keyword: [readings, oldest first]} — the snapshot format."""
+        return {kw: self.series(kw) for kw in self._rows}
+
+    def load(self, history):
+        """Replace contents from {keyword: [readings, oldest first]}; latest readings line up."""
+        self._rows.clear()
+        self._free = list(range(len(self._born) - 1, -1, -1))
+        self._cycle = max((min(len(v), self.slots) for v in history.values()), default=0)
+        for kw, readings in history.items():
+            readings = [int(x) for x in list(readings)[-self.slots:]]
+            if not readings:
+                continue
+            row = self._alloc(kw, born=self._cycle - len(readings))
+            base = row * self.slots
+            for c, v in zip(range(self._cycle - len(readings), self._cycle), readings):
+                self._values[base + c % self.slots] = v
+            self._sum[row] = sum(readings)
+            self._sumsq[row] = sum(v * v for v in readings)
+            trailing = 0
+            for v in reversed(readings):
+                if v:
+                    break
+                trailing += 1
+            self._zeros[row] = trailing
+
+    def _alloc(self, keyword, born=None):
+        if not self._free:
+            self._grow(len(self._born) * 2)
+        row = self._free.pop()
+        self._rows[keyword] = row
+        self._born[row] = self._cycle if born is None else born
+        self._sum[row] = self._sumsq[row] = self._zeros[row] = 0
+        return row
+
+    def _grow(self, capacity):
+        extra = capacity - len(self._born)
+        if extra <= 0:
+            return
+        start = len(self._born)
+        self._values.extend(array.array('i', bytes(4 * extra * self.slots)))
+        for arr in (self._born, self._sum, self._sumsq, self._zeros):
+            arr.extend(array.array('q', bytes(8 * extra)))
+        # Pop order hands out low rows first
+        self._free.extend(range(start + extra - 1, start - 1, -1))
+
+
+trending_fetch_seconds = metrics.histogram(
+    'mercury_trending_fetch_seconds', 'News fetch + keyword analysis cycle time', POLL_BUCKETS)
+trending_fetch_errors = metrics.counter(
+    'mercury_trending_fetch_errors_total', 'Failed RSS feed fetches during trending polls')
+trending_headlines = metrics.gauge(
+    'mercury_trending_headlines', 'Headlines analyzed in the last trending poll')
+
+
 class TrendingCache:
     """Background-threaded cache that extracts trending keywords from news."""
 
     POLL_INTERVAL = 300   # 5 minutes
     HISTORY_LEN = 288     # Keep ~24 hours of readings
     MIN_HISTORY = 6       # Need 30 min of data before spike detection
+    DEAD_AFTER = 6        # Forget a keyword after this many empty readings in a row
+    FEED_MAX_BACKOFF = 3600   # A failing RSS query is retried at most this far apart
+    FEED_MAX_AGE = 3600       # ...and its last headlines keep counting for this long
 
     def __init__(self):
         self.lock = threading.Lock()
         self._keywords = []        # Current top keywords
-        self._history = {}         # keyword -> [count_t0, count_t1, ...]
+        self._history = KeywordHistory(self.HISTORY_LEN, self.DEAD_AFTER)
         self._last_update = 0
+        self._status = 'starting'  # 'live', 'stale' (warm start), 'starting'
         self._thread = None
+        self._feed_schedules = {}  # query -> PollSchedule (backoff only; cadence is POLL_INTERVAL)
+        self._feed_cache = {}      # query -> (titles, fetched_at)
+        self._conditional = ConditionalCache()
+        self._snapshot = EncodedSnapshot(self.get_data())
+        self._stream_lock = threading.Lock()
+        self.publisher = None      # SharedSnapshots, when serving from worker processes
+
+    SNAPSHOT_FILE = 'trending.json.gz'
+    SHARED_NAME = 'trending'
 
     def start(self):
+        self._load_snapshot()
         self._thread = threading.Thread(target=self._poll_loop, daemon=True)
         self._thread.start()
 
     def get_data(self):
         with self.lock:
-            readings = max((len(h) for h in self._history.values()), default=0)
+            readings = self._history.max_readings()
             return {
                 'keywords': self._keywords,
+                'status': self._status,
                 'lastUpdate': self._last_update,
                 'readings': readings,
                 'minReadings': self.MIN_HISTORY,
             }
 
+    def get_snapshot(self):
+        """Latest pre-encoded /api/trending payload (EncodedSnapshot)."""
+        return self._snapshot
+
+    def subscribe_stream(self, sock, last_event_id=None):
+        """Attach an SSE socket; skip the initial snapshot if the client is current."""
+        with self._stream_lock:
+            with self.lock:
+                snap, event_id = self._snapshot, self._last_update
+            initial = b'' if last_event_id == str(event_id) else _sse_frame('snapshot', snap.body, event_id)
+            sse_broadcaster.subscribe('trending', sock, b'retry: 5000\n\n' + initial)
+
+    def _publish(self):
+        snap = EncodedSnapshot(self.get_data())
+        with self._stream_lock:
+            with self.lock:
+                self._snapshot = snap
+                event_id = self._last_update
+            sse_broadcaster.publish('trending', _sse_frame('snapshot', snap.body, event_id))
+        if self.publisher is not None:
+            self.publisher.publish(self.SHARED_NAME, snap)
+
+    def follow(self, snap):
+        """Adopt a snapshot published by the poller process (worker processes only)."""
+        data = json.loads(bytes(snap.body))
+        with self.lock:
+            self._keywords = data.get('keywords') or []
+            self._last_update = data.get('lastUpdate') or 0
+            self._status = data.get('status', 'starting')
+            self._snapshot = snap
+
+    def _save_snapshot(self):
+        """Persist keyword history so spike detection survives restarts."""
+        with self.lock:
+            state = {
+                'history': self._history.export(),
+                'keywords': self._keywords,
+                'lastUpdate': self._last_update,
+            }
+            body = json.dumps(state, separators=(',', ':')).encode()
+        try:
+            _write_atomic(os.path.join(SNAPSHOT_DIR, self.SNAPSHOT_FILE), gzip.compress(body, mtime=0))
+        except OSError as e:
+            sys.stderr.write(f"\033[33m[trending]\033[0m snapshot write failed: {e}\n")
+
+    def _load_snapshot(self):
+        data = _read_snapshot(os.path.join(SNAPSHOT_DIR, self.SNAPSHOT_FILE))
+        if not data or not isinstance(data.get('history'), dict):
+            return
+        with self.lock:
+            self._history.load(data['history'])
+            self._keywords = data.get('keywords') or []
+            self._last_update = data.get('lastUpdate') or 0
+            self._status = 'stale'
+        self._publish()
+        sys.stderr.write(f"\033[35m[trending]\033[0m warm start: {len(self._history)} keywords of history\n")
+
     def _poll_loop(self):
         while True:
             try:
-                self._fetch_and_analyze()
+                with trending_fetch_seconds.time():
+                    self._fetch_and_analyze()
             except Exception as e:
                 sys.stderr.write(f"\033[31m[trending] Error: {e}\033[0m\n")
-            time.sleep(self.POLL_INTERVAL)
+            time.sleep(self.POLL_INTERVAL * random.uniform(1 - PollSchedule.JITTER, 1 + PollSchedule.JITTER))
 
     def _fetch_news_headlines(self, query=None):
-        """Fetch headlines from Google News RSS."""
-        if query:
-            rss_url = (
-                f'https://news.google.com/rss/search?q={urllib.parse.quote(query)}'
-                f'&hl=en-US&gl=US&ceid=US:en'
-            )
+        """Fetch headlines from Google News RSS (articles also prime /proxy/news)."""
+        rss_url = _news_rss_url(query)
+
+        def get(conditional):
+            return upstream_pool.get(rss_url, headers={
+                'User-Agent': 'Mozilla/5.0 Mercury/1.0',
+                'Accept': 'application/xml',
+                **conditional,
+            }, timeout=10)
+
+        conditional, articles = self._conditional.lookup(rss_url)
+        resp = get(conditional)
+        if resp.status == 304 and articles is not None:
+            upstream_not_modified.inc('news')
         else:
-            # Top stories — unbiased baseline, not filtered by search query
-            rss_url = 'https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en'
-        req = urllib.request.Request(rss_url, headers={
-            'User-Agent': 'Mozilla/5.0 Mercury/1.0',
-            'Accept': 'application/xml',
-        })
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            xml_data = resp.read()
-        root = ET.fromstring(xml_data)
-        channel = root.find('channel')
-        titles = []
-        for item in (channel.findall('item') if channel is not None else []):
-            title = item.findtext('title', '')
-            title = html.unescape(re.sub(r'<[^>]+>', '', title))
-            if title:
-                titles.append(title)
-            if len(titles) >= 30:
-                break
-        return titles
+            if resp.status == 304:
+                resp = get({})   # Nothing to reuse — ask again for the full body
+            articles = _parse_rss_items(resp.body)
+            self._conditional.store(rss_url, resp, articles)
+        proxy_cache.put(rss_url, _encode_articles(articles))
+        return [a['title'] for a in articles if a['title']]
 
     def _extract_keywords(self, headlines):
         """Extract meaningful keyword counts from headlines."""
@@ -655,11 +2877,26 @@ class TrendingCache:
         errors = {}
 
         def fetch_q(q):
+            # Each query backs off on its own; while it does, its last headlines stand in
+            sched = self._feed_schedules.get(q)
+            if sched is None:
+                sched = self._feed_schedules[q] = PollSchedule(
+                    q or 'top', self.POLL_INTERVAL, max_backoff=self.FEED_MAX_BACKOFF)
+            cached = self._feed_cache.get(q)
+            fallback = cached[0] if cached and time.time() - cached[1] < self.FEED_MAX_AGE else []
+            if sched.backing_off():
+                all_headlines.extend(fallback)
+                return
             try:
                 titles = self._fetch_news_headlines(q)
+                sched.succeeded()
+                self._feed_cache[q] = (titles, time.time())
                 all_headlines.extend(titles)
             except Exception as e:
-                errors[q[:20]] = str(e)
+                errors[q[:20] if q else 'top'] = str(e)
+                trending_fetch_errors.inc()
+                sched.failed(getattr(e, 'retry_after', None))
+                all_headlines.extend(fallback)
 
         threads = [threading.Thread(target=fetch_q, args=(q,)) for q in queries]
         for t in threads:
@@ -667,44 +2904,26 @@ class TrendingCache:
         for t in threads:
             t.join(timeout=12)
 
+        trending_headlines.set(value=len(all_headlines))
         if not all_headlines:
             return
 
         keyword_counts = self._extract_keywords(all_headlines)
 
         with self.lock:
-            # Update history
-            for kw, count in keyword_counts.items():
-                if kw not in self._history:
-                    self._history[kw] = []
-                self._history[kw].append(count)
-                if len(self._history[kw]) > self.HISTORY_LEN:
-                    self._history[kw] = self._history[kw][-self.HISTORY_LEN:]
-
-            # Decay: remove keywords not seen this round
-            for kw in list(self._history.keys()):
-                if kw not in keyword_counts:
-                    self._history[kw].append(0)
-                    if len(self._history[kw]) > self.HISTORY_LEN:
-                        self._history[kw] = self._history[kw][-self.HISTORY_LEN:]
-                    # Remove if dead for 6+ readings
-                    if all(c == 0 for c in self._history[kw][-6:]):
-                        del self._history[kw]
+            # One reading per tracked keyword (0 when unseen); dead keywords free their rows
+            self._history.record(keyword_counts)
 
             # Build results with spike detection
             results = []
             for kw, count in sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)[:50]:
-                hist = self._history.get(kw, [count])
-                prior = hist[:-1] if len(hist) > 1 else []
+                count, prev_count, n_prior, avg, variance = self._history.stats(kw)
 
                 # Change from previous reading
-                prev_count = prior[-1] if prior else count
                 change = count - prev_count
 
-                if len(prior) >= self.MIN_HISTORY:
-                    avg = sum(prior) / len(prior)
+                if n_prior >= self.MIN_HISTORY:
                     # Standard deviation for statistical significance
-                    variance = sum((x - avg) ** 2 for x in prior) / len(prior)
                     stddev = variance ** 0.5
                     spike_pct = ((count - avg) / max(avg, 1)) * 100
                     # Only flag as spike if beyond 1.5 std devs AND > 75%
@@ -730,6 +2949,9 @@ class TrendingCache:
 
             self._keywords = results
             self._last_update = int(time.time() * 1000)
+            self._status = 'live'
+        self._publish()
+        self._save_snapshot()
 
         err_str = f" (errors: {errors})" if errors else ""
         sys.stderr.write(
@@ -740,42 +2962,593 @@ class TrendingCache:
 
 trending_cache = TrendingCache()
 
+metrics.collect('mercury_trending_keywords', 'Keywords in the live trending snapshot',
+                lambda: len(trending_cache._keywords))
+metrics.collect('mercury_trending_history_keywords', 'Keywords with spike-detection history',
+                lambda: len(trending_cache._history))
+metrics.collect('mercury_trending_snapshot_age_seconds', 'Seconds since trending last updated',
+                lambda: round(time.time() - trending_cache._last_update / 1000, 3) if trending_cache._last_update else -1)
+
 
 # ═══════════════════════════════════════════════════════════════
 # PROXY RESPONSE CACHE — shared across all users
-# Caches chart history / candlestick responses for 60s
+# Byte-bounded LRU for chart history / candlestick responses with
+# per-route TTLs, stale-while-revalidate and miss coalescing
+# ═══════════════════════════════════════════════════════════════
+
+class _ProxyEntry:
+    __slots__ = ('status', 'body', 'stored_at', 'ttl', 'negative')
+
+    def __init__(self, status, body, ttl, negative=False):
+        self.status = status
+        self.body = body
+        self.stored_at = time.time()
+        self.ttl = ttl
+        self.negative = negative
+
+
+class _Flight:
+    """One in-flight upstream load that concurrent misses wait on."""
+    __slots__ = ('done', 'result')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+proxy_upstream_seconds = metrics.histogram(
+    'mercury_proxy_upstream_seconds', 'Upstream load time for proxy cache misses and refreshes')
+
+
+class ProxyCache:
+    """LRU cache for proxy responses — avoids repeated external API calls."""
+    TTL = 60                 # seconds, for routes without a specific TTL
+    ROUTE_TTLS = (           # (url substring, ttl) — first match wins
+        ('clob.polymarket.com/prices-history', 60),
+        ('/candlesticks', 120),
+        ('clob.polymarket.com/book', 5),
+        ('/orderbook', 5),
+        ('news.google.com/rss', 120),   # parsed /proxy/news article lists
+    )
+    # Serve expired entries a few TTLs longer while one refresh runs — an order book
+    # goes stale in seconds, chart history and news only after minutes
+    STALE_FACTOR = 5
+    STALE_MAX = 300
+    NEGATIVE_TTL = 10        # remember upstream failures briefly
+    MAX_BYTES = int(os.environ.get('PROXY_CACHE_MB', 64)) * 1024 * 1024
+    MAX_ITEM = 500_000       # don't cache single responses larger than this
+    # Coalesced callers outwait the leader's whole budget (queue for a slot + the load itself)
+    WAIT_TIMEOUT = PROXY_QUEUE_TIMEOUT + PROXY_UPSTREAM_TIMEOUT + 2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._store = collections.OrderedDict()   # url -> _ProxyEntry, LRU order
+        self._bytes = 0
+        self._inflight = {}                       # url -> _Flight
+        self._refreshing = set()                  # urls with a background refresh running
+        self._refresher = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix='proxy-refresh')
+        self._upstream_slots = threading.BoundedSemaphore(PROXY_MAX_IN_FLIGHT)
+        self.counters = {'hits': 0, 'staleHits': 0, 'misses': 0, 'coalesced': 0,
+                         'negativeHits': 0, 'evictions': 0, 'refreshes': 0, 'shed': 0}
+
+    def ttl_for(self, url):
+        for fragment, ttl in self.ROUTE_TTLS:
+            if fragment in url:
+                return ttl
+        return self.TTL
+
+    def get(self, url):
+        """Fresh cached body for `url`, or None."""
+        with self.lock:
+            entry = self._store.get(url)
+            if entry and not entry.negative and time.time() - entry.stored_at < entry.ttl:
+                self._store.move_to_end(url)
+                return entry.body
+            return None
+
+    def put(self, url, data, status=200, ttl=None, negative=False):
+        if len(data) > self.MAX_ITEM:
+            return
+        entry = _ProxyEntry(status, data, ttl if ttl is not None else self.ttl_for(url), negative)
+        with self.lock:
+            old = self._store.pop(url, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._store[url] = entry
+            self._bytes += len(data)
+            while self._bytes > self.MAX_BYTES and self._store:
+                _, evicted = self._store.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.counters['evictions'] += 1
+
+    def fetch(self, url, loader):
+        """Cached (status, body, state) for `url`, loading via loader(url) → (status, body).
+
+        state is 'hit', 'stale', 'negative', 'coalesced', 'miss', 'error' or 'shed'
+        (too many upstream calls already in flight → 503, not cached).
+        """
+        now = time.time()
+        with self.lock:
+            entry = self._store.get(url)
+            if entry is not None:
+                age = now - entry.stored_at
+                if age < entry.ttl:
+                    self._store.move_to_end(url)
+                    key = 'negativeHits' if entry.negative else 'hits'
+                    self.counters[key] += 1
+                    return entry.status, entry.body, ('negative' if entry.negative else 'hit')
+                if not entry.negative and age < entry.ttl + min(entry.ttl * self.STALE_FACTOR, self.STALE_MAX):
+                    self._store.move_to_end(url)
+                    self.counters['staleHits'] += 1
+                    if url not in self._refreshing and url not in self._inflight:
+                        self._refreshing.add(url)
+                        self.counters['refreshes'] += 1
+                        self._refresher.submit(self._refresh, url, loader)
+                    return entry.status, entry.body, 'stale'
+            flight = self._inflight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[url] = _Flight()
+                self.counters['misses'] += 1
+            else:
+                self.counters['coalesced'] += 1
+
+        if not leader:
+            if flight.done.wait(self.WAIT_TIMEOUT) and flight.result is not None:
+                status, body, state = flight.result
+                return status, body, 'coalesced' if state == 'miss' else state
+            return 504, json.dumps({'error': 'upstream load timed out'}).encode(), 'error'
+
+        try:
+            flight.result = self._load(url, loader)
+        finally:
+            with self.lock:
+                self._inflight.pop(url, None)
+            flight.done.set()
+        return flight.result
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self._store), bytes=self._bytes,
+                        inflight=len(self._inflight))
+
+    def _load(self, url, loader):
+        if not self._upstream_slots.acquire(timeout=PROXY_QUEUE_TIMEOUT):
+            with self.lock:
+                self.counters['shed'] += 1
+            return 503, json.dumps({'error': 'too many upstream requests in flight'}).encode(), 'shed'
+        try:
+            with proxy_upstream_seconds.time():
+                status, body = loader(url)
+        except Exception as e:
+            body = json.dumps({'error': str(e)}).encode()
+            self.put(url, body, status=502, ttl=self.NEGATIVE_TTL, negative=True)
+            return 502, body, 'error'
+        finally:
+            self._upstream_slots.release()
+        if status == 200:
+            self.put(url, body)
+        return status, body, 'miss'
+
+    def _refresh(self, url, loader):
+        """Background revalidation; on failure the stale entry keeps being served."""
+        # Never queue behind foreground loads — a busy upstream just means serving stale longer
+        if not self._upstream_slots.acquire(blocking=False):
+            with self.lock:
+                self._refreshing.discard(url)
+            return
+        try:
+            with proxy_upstream_seconds.time():
+                status, body = loader(url)
+            if status == 200:
+                self.put(url, body)
+        except Exception as e:
+            sys.stderr.write(f"\033[33m[proxy]\033[0m refresh failed for {url}: {e}\n")
+        finally:
+            self._upstream_slots.release()
+            with self.lock:
+                self._refreshing.discard(url)
+
+proxy_cache = ProxyCache()
+
+metrics.collect('mercury_proxy_cache_events_total', 'Proxy cache lookups and maintenance by outcome',
+                lambda: {k: v for k, v in proxy_cache.stats().items()
+                         if k in proxy_cache.counters}, kind='counter', labels=('event',))
+metrics.collect('mercury_proxy_cache_bytes', 'Bytes held by the proxy cache', lambda: proxy_cache._bytes)
+metrics.collect('mercury_proxy_cache_entries', 'Entries held by the proxy cache', lambda: len(proxy_cache._store))
+metrics.collect('mercury_upstream_requests_total', 'Upstream pool requests, new connections, reuses and errors',
+                lambda: {k: v for k, v in upstream_pool.stats().items()
+                         if k in ('requests', 'connects', 'reused', 'errors')}, kind='counter', labels=('event',))
+metrics.collect('mercury_upstream_connections', 'Upstream pool connections by state',
+                lambda: {k: v for k, v in upstream_pool.stats().items() if k in ('open', 'idle')},
+                labels=('state',))
+
+
+# ═══════════════════════════════════════════════════════════════
+# NEWS — Google News RSS → article lists, cached per normalized query
+# Parsed incrementally and stored in the shared proxy cache, so repeat
+# and concurrent queries cost one upstream fetch; TrendingCache primes
+# the entries for the queries it already polls.
+# ═══════════════════════════════════════════════════════════════
+
+NEWS_MAX_ITEMS = 30
+NEWS_DEFAULT_QUERY = 'prediction market polymarket kalshi'
+NEWS_PARSE_CHUNK = 4 * 1024
+
+
+def _news_rss_url(query=None):
+    """Upstream RSS URL (also the cache key) for a query; None → top stories."""
+    query = ' '.join((query or '').lower().split())
+    if not query:
+        # Top stories — unbiased baseline, not filtered by search query
+        return 'https://news.google.com/rss?hl=en-US&gl=US&ceid=US:en'
+    return f'https://news.google.com/rss/search?q={urllib.parse.quote(query)}&hl=en-US&gl=US&ceid=US:en'
+
+
+def _parse_rss_items(body, limit=NEWS_MAX_ITEMS):
+    """Article dicts from RSS bytes, parsed incrementally; stops after `limit` items."""
+    parser = ET.XMLPullParser(events=('end',))
+    items = []
+    for offset in range(0, len(body), NEWS_PARSE_CHUNK):
+        parser.feed(body[offset:offset + NEWS_PARSE_CHUNK])
+        for _, el in parser.read_events():
+            if el.tag != 'item':
+                continue
+            source_el = el.find('source')
+            items.append({
+                'title': html.unescape(re.sub(r'<[^>]+>', '', el.findtext('title', ''))),
+                'link': el.findtext('link', ''),
+                'pubDate': el.findtext('pubDate', ''),
+                'source': source_el.text if source_el is not None else '',
+            })
+            el.clear()
+            if len(items) >= limit:
+                return items
+    return items
+
+
+def _encode_articles(items):
+    return json.dumps({'articles': items}).encode()
+
+
+def _load_news_url(url):
+    """ProxyCache loader for news keys → (status, encoded article list)."""
+    body = upstream_pool.get(url, headers={
+        'User-Agent': 'Mozilla/5.0 Mercury/1.0',
+        'Accept': 'application/xml',
+    }, timeout=PROXY_UPSTREAM_TIMEOUT).body
+    return 200, _encode_articles(_parse_rss_items(body))
+
+
+# ═══════════════════════════════════════════════════════════════
+# PUSH STREAMS — Server-Sent Events for markets + trending
+# One selector thread writes to every subscriber; handler threads
+# only negotiate the request and then hand the socket over.
+# ═══════════════════════════════════════════════════════════════
+
+def _sse_frame(event, data, event_id=None):
+    """Build one SSE message. `data` is single-line JSON bytes."""
+    head = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{head}event: {event}\ndata: '.encode() + data + b'\n\n'
+
+
+class _Subscriber:
+    __slots__ = ('sock', 'topic', 'pending', 'pending_bytes', 'stalled_since')
+
+    def __init__(self, sock, topic):
+        self.sock = sock
+        self.topic = topic
+        self.pending = collections.deque()   # memoryviews not yet written
+        self.pending_bytes = 0
+        self.stalled_since = None
+
+
+class SSEBroadcaster:
+    """Fans frames out to many idle SSE sockets from a single thread."""
+
+    HEARTBEAT = 15                    # seconds between ': ping' comments
+    MAX_PENDING = 2 * 1024 * 1024     # evict subscribers buffering more than this
+    STALL_TIMEOUT = 60                # evict subscribers that make no progress this long
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._inbox = collections.deque()    # ('sub', sock, topic, frame) | ('pub', topic, frame)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._subs = {}                      # sock -> _Subscriber
+        self._counts = {}                    # topic -> subscriber count
+        self._evicted = 0
+        self._thread = None
+
+    def start(self):
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def subscribe(self, topic, sock, initial=b''):
+        """Take ownership of `sock` (response headers already sent)."""
+        self.start()
+        self._inbox.append(('sub', sock, topic, initial))
+        self._wake()
+
+    def publish(self, topic, frame):
+        self._inbox.append(('pub', topic, frame))
+        self._wake()
+
+    def stats(self):
+        return {'subscribers': dict(self._counts), 'evicted': self._evicted}
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Wake pipe already full — loop is about to run anyway
+
+    def _run(self):
+        last_beat = time.time()
+        while True:
+            for key, mask in self._selector.select(timeout=1.0):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                sub = key.data
+                if mask & selectors.EVENT_READ:
+                    try:
+                        if not sub.sock.recv(4096):
+                            self._drop(sub)
+                            continue
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        self._drop(sub)
+                        continue
+                if mask & selectors.EVENT_WRITE:
+                    self._flush(sub)
+
+            while self._inbox:
+                msg = self._inbox.popleft()
+                if msg[0] == 'sub':
+                    _, sock, topic, initial = msg
+                    self._add(sock, topic, initial)
+                else:
+                    _, topic, frame = msg
+                    for sub in [s for s in self._subs.values() if s.topic == topic]:
+                        self._send(sub, frame)
+
+            now = time.time()
+            if now - last_beat >= self.HEARTBEAT:
+                last_beat = now
+                for sub in list(self._subs.values()):
+                    self._send(sub, b': ping\n\n')
+            for sub in list(self._subs.values()):
+                if sub.stalled_since and now - sub.stalled_since > self.STALL_TIMEOUT:
+                    self._evict(sub)
+
+    def _add(self, sock, topic, initial):
+        sock.setblocking(False)
+        sub = _Subscriber(sock, topic)
+        self._subs[sock] = sub
+        self._counts[topic] = self._counts.get(topic, 0) + 1
+        self._selector.register(sock, selectors.EVENT_READ, sub)
+        if initial:
+            self._send(sub, initial)
+
+    def _send(self, sub, frame):
+        if sub.sock not in self._subs:
+            return
+        sub.pending.append(memoryview(frame))
+        sub.pending_bytes += len(frame)
+        if sub.pending_bytes > self.MAX_PENDING:
+            return self._evict(sub)
+        self._flush(sub)
+
+    def _flush(self, sub):
+        progressed = False
+        while sub.pending:
+            buf = sub.pending[0]
+            try:
+                n = sub.sock.send(buf)
+            except BlockingIOError:
+                break
+            except OSError:
+                return self._drop(sub)
+            progressed = True
+            sub.pending_bytes -= n
+            if n < len(buf):
+                sub.pending[0] = buf[n:]
+                break
+            sub.pending.popleft()
+        if not sub.pending:
+            sub.stalled_since = None
+        elif progressed or sub.stalled_since is None:
+            sub.stalled_since = time.time()
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if sub.pending else 0)
+        if self._selector.get_key(sub.sock).events != events:
+            self._selector.modify(sub.sock, events, sub)
+
+    def _evict(self, sub):
+        self._evicted += 1
+        sys.stderr.write(f"\033[33m[sse]\033[0m evicted slow {sub.topic} subscriber "
+                         f"({sub.pending_bytes} bytes pending)\n")
+        self._drop(sub)
+
+    def _drop(self, sub):
+        if self._subs.pop(sub.sock, None) is None:
+            return
+        self._counts[sub.topic] -= 1
+        sub.pending.clear()
+        try:
+            self._selector.unregister(sub.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            sub.sock.close()
+        except OSError:
+            pass
+
+
+sse_broadcaster = SSEBroadcaster()
+
+metrics.collect('mercury_sse_subscribers', 'Connected SSE subscribers per topic',
+                lambda: sse_broadcaster.stats()['subscribers'], labels=('topic',))
+metrics.collect('mercury_sse_evicted_total', 'SSE subscribers dropped for stalling or backlog',
+                lambda: sse_broadcaster.stats()['evicted'], kind='counter')
+
+
 # ═══════════════════════════════════════════════════════════════
+# STATIC ASSET CACHE — files under STATIC_DIR kept pre-compressed in memory
+# Revalidated against mtime/size at most once a second; large identity
+# responses go out with sendfile straight from the page cache
+# ═══════════════════════════════════════════════════════════════
+
+STATIC_EXTENSIONS = frozenset((
+    '.html', '.js', '.css', '.svg', '.json', '.txt', '.xml', '.webmanifest', '.map',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico', '.woff', '.woff2',
+))
+STATIC_COMPRESSIBLE = frozenset(('.html', '.js', '.css', '.svg', '.json', '.txt', '.xml', '.webmanifest', '.map'))
+STATIC_SKIP_DIRS = frozenset(('__pycache__', 'bench', 'node_modules', 'supabase'))
+STATIC_MAX_FILE = 4 * 1024 * 1024      # larger files are left to SimpleHTTPRequestHandler
+STATIC_SENDFILE_MIN = 64 * 1024        # identity bodies this big are sent from disk, not memory
+STATIC_RECHECK = 1.0                   # seconds between mtime checks per file
+
+# Content-hashed names (app.3f9a1c2e.js) or ?v=<hex hash> may be cached forever
+_HASHED_ASSET_RE = re.compile(r'\.[0-9a-f]{8,}\.\w+(\?|$)|[?&]v=[0-9a-f]{8,}(&|$)')
+
+static_requests = metrics.counter(
+    'mercury_static_requests_total', 'Static responses by how they were served', ('mode',))
+
+
+class StaticAsset(EncodedSnapshot):
+    """One file's bytes, compressed variants and strong validators."""
+
+    __slots__ = ('path', 'content_type', 'size', 'stat_key', 'checked_at')
+
+    def __init__(self, path, data, st):
+        ext = os.path.splitext(path)[1].lower()
+        self.path = path
+        self.content_type = (http.server.SimpleHTTPRequestHandler.extensions_map.get(ext)
+                             or mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.size = len(data)
+        self.stat_key = (st.st_mtime_ns, st.st_size)
+        self.checked_at = time.monotonic()
+        self.body = data if len(data) < STATIC_SENDFILE_MIN else None   # None → sendfile
+        self.gzip = self.br = None
+        if ext in STATIC_COMPRESSIBLE and len(data) > 1024:
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            self.gzip = gz if len(gz) < len(data) * 0.9 else None
+            if brotli and self.gzip is not None:
+                self.br = brotli.compress(data, quality=11)
+        self.etag = '"' + hashlib.blake2b(data, digest_size=12).hexdigest() + '"'
+        self.mtime = int(st.st_mtime)
+        self.last_modified = email.utils.formatdate(self.mtime, usegmt=True)
+
+    def memory_bytes(self):
+        return len(self.body or b'') + len(self.gzip or b'') + len(self.br or b'')
+
+
+class StaticCache:
+    """Path → StaticAsset for servable files under STATIC_DIR."""
+
+    def __init__(self, root=STATIC_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        self._assets = {}   # absolute path -> StaticAsset
+
+    def load_all(self):
+        """Pre-load every servable file (compression happens here, not per request)."""
+        t0 = time.time()
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in STATIC_SKIP_DIRS]
+            for name in filenames:
+                self.lookup(os.path.join(dirpath, name))
+        stats = self.stats()
+        sys.stderr.write(f"\033[32m[static]\033[0m {stats['files']} files, {stats['bytes'] // 1024}KB "
+                         f"in memory ({time.time() - t0:.1f}s)\n")
 
-class ProxyCache:
-    """Simple TTL cache for proxy responses — avoids repeated external API calls."""
-    TTL = 60  # seconds
+    def lookup(self, path):
+        """Current StaticAsset for filesystem `path`, or None if it isn't a cacheable file."""
+        if os.path.splitext(path)[1].lower() not in STATIC_EXTENSIONS:
+            return None
+        asset = self._assets.get(path)
+        now = time.monotonic()
+        if asset is not None and now - asset.checked_at < STATIC_RECHECK:
+            return asset
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode) or st.st_size > STATIC_MAX_FILE:
+            with self.lock:
+                self._assets.pop(path, None)
+            return None
+        if asset is not None and asset.stat_key == (st.st_mtime_ns, st.st_size):
+            asset.checked_at = now
+            return asset
+        return self._load(path)
 
-    def __init__(self):
-        self.lock = threading.Lock()
-        self._store = {}  # url -> (data_bytes, timestamp)
+    def open(self, asset):
+        """File object for sending `asset` from disk, or None if it changed underneath us."""
+        try:
+            f = open(asset.path, 'rb')
+        except OSError:
+            return None
+        st = os.fstat(f.fileno())
+        if (st.st_mtime_ns, st.st_size) != asset.stat_key:
+            f.close()
+            return None
+        return f
 
-    def get(self, url):
+    def stats(self):
         with self.lock:
-            entry = self._store.get(url)
-            if entry and time.time() - entry[1] < self.TTL:
-                return entry[0]
-            return None
+            assets = list(self._assets.values())
+        return {'files': len(assets), 'bytes': sum(a.memory_bytes() for a in assets)}
 
-    def put(self, url, data):
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except OSError:
+            return None
+        asset = StaticAsset(path, data, st)
         with self.lock:
-            self._store[url] = (data, time.time())
-            # Evict old entries if cache grows too large
-            if len(self._store) > 200:
-                cutoff = time.time() - self.TTL
-                self._store = {k: v for k, v in self._store.items() if v[1] > cutoff}
+            self._assets[path] = asset
+        return asset
 
-proxy_cache = ProxyCache()
+
+static_cache = StaticCache()
+
+metrics.collect('mercury_static_files', 'Static files held by the asset cache', lambda: static_cache.stats()['files'])
+metrics.collect('mercury_static_cache_bytes', 'Bytes held by the asset cache (identity + compressed)',
+                lambda: static_cache.stats()['bytes'])
 
 
 # ═══════════════════════════════════════════════════════════════
 # HTTP HANDLER
 # ═══════════════════════════════════════════════════════════════
 
+# Max series per /api/history request, max points per downsampled series
+HISTORY_MAX_IDS = 200
+HISTORY_MAX_POINTS = 1000
+
+# Candle resolutions served by /api/ohlc (seconds)
+OHLC_RESOLUTIONS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600}
+
+# Max proxy paths per /api/batch request
+BATCH_MAX_PATHS = 50
+
+# /api/markets parameters that switch to the server-side query mode
+MARKET_QUERY_PARAMS = frozenset(('tf', 'source', 'minVol', 'hasBothVenues', 'sort', 'limit', 'offset', 'fields'))
+
 PROXY_ROUTES = {
     '/proxy/polymarket/': 'https://gamma-api.polymarket.com/',
     '/proxy/polymarket-clob/': 'https://clob.polymarket.com/',
@@ -783,138 +3556,435 @@ PROXY_ROUTES = {
 }
 
 
+http_request_seconds = metrics.histogram(
+    'mercury_http_request_seconds', 'Handler time per route', LATENCY_BUCKETS, ('route',))
+http_requests = metrics.counter(
+    'mercury_http_requests_total', 'Requests handled per route and status', ('route', 'status'))
+http_response_bytes = metrics.histogram(
+    'mercury_http_response_bytes', 'Bytes written per response', SIZE_BUCKETS, ('route',))
+http_in_flight = metrics.gauge(
+    'mercury_http_in_flight', 'Requests currently being handled')
+batch_paths = metrics.counter(
+    'mercury_batch_paths_total', 'Proxy paths resolved through /api/batch by cache outcome', ('state',))
+
+
+# Routes MercuryHandler dispatches itself; each gets its own metrics label
+API_ROUTES = frozenset(('/api/markets', '/api/spreads', '/api/history', '/api/ohlc', '/api/trending',
+                        '/api/markets/stream', '/api/trending/stream', '/api/batch', '/metrics'))
+PROXY_LABELS = frozenset(prefix[7:-1] for prefix in PROXY_ROUTES) | {'news'}
+
+
+def _metrics_route(path):
+    """Low-cardinality route label for a request path (a fixed set, whatever clients send)."""
+    route = path.partition('?')[0]
+    if route in API_ROUTES:
+        return route
+    if route.startswith('/api/'):
+        return '/api/other'
+    if route.startswith('/proxy/'):
+        name = route[7:].partition('/')[0]
+        return '/proxy/' + name if name in PROXY_LABELS else '/proxy/other'
+    return 'static'
+
+
+class _CountingWriter:
+    """wfile wrapper that tallies bytes written for the response-size histogram."""
+    __slots__ = ('raw', 'written')
+
+    def __init__(self, raw):
+        self.raw, self.written = raw, 0
+
+    def write(self, data):
+        self.written += len(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+def _load_proxy_url(url):
+    """Upstream loader for ProxyCache.fetch → (status, body)."""
+    resp = upstream_pool.get(url, headers={
+        'User-Agent': 'Mozilla/5.0 Mercury/1.0',
+        'Accept': 'application/json',
+    }, timeout=PROXY_UPSTREAM_TIMEOUT)
+    return resp.status, resp.body
+
+
+def _proxy_target(path):
+    """Upstream URL for a /proxy/... path, or None if no proxy route matches."""
+    for prefix, target_base in PROXY_ROUTES.items():
+        if path.startswith(prefix):
+            return target_base + path[len(prefix):]
+    return None
+
+
+def _batch_line(index, path, status, body, state):
+    """One NDJSON line of an /api/batch response; valid upstream JSON is embedded as is."""
+    head = {'i': index, 'path': path, 'status': status, 'cache': state}
+    body = body.strip()
+    if status < 400:
+        try:
+            json.loads(body)   # a truncated body must not break the line (and the client's parse)
+        except ValueError:
+            head['error'] = 'upstream returned a non-JSON body'
+            return json.dumps(head).encode() + b'\n'
+        # Raw newlines can only be whitespace between JSON tokens
+        return json.dumps(head)[:-1].encode() + b', "body": ' + body.replace(b'\n', b' ').replace(b'\r', b' ') + b'}\n'
+    try:
+        head['error'] = json.loads(body)['error']
+    except (ValueError, KeyError, TypeError):
+        head['error'] = f'HTTP {status}'
+    return json.dumps(head).encode() + b'\n'
+
+
+# Shared by every /api/batch request, so concurrent batches can't multiply upstream fan-out
+batch_pool = concurrent.futures.ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+
 class MercuryHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=STATIC_DIR, **kwargs)
 
+    def setup(self):
+        super().setup()
+        self.wfile = _CountingWriter(self.wfile)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
     def do_GET(self):
-        # ── Cached market data endpoint ──
-        if self.path == '/api/markets':
-            return self._serve_markets()
+        label = _metrics_route(self.path)
+        self._status = 0
+        self.wfile.written = 0
+        http_in_flight.inc(n=1)
+        started = time.perf_counter()
+        try:
+            return self._route_GET()
+        finally:
+            http_in_flight.inc(n=-1)
+            http_request_seconds.observe(time.perf_counter() - started, label)
+            http_requests.inc(label, self._status)
+            http_response_bytes.observe(self.wfile.written, label)
+
+    def _route_GET(self):
+        route, _, query = self.path.partition('?')
+        params = urllib.parse.parse_qs(query)
+
+        # ── Cached market data endpoint (full, ?since=<version> delta, or filtered query) ──
+        if route == '/api/markets':
+            return self._serve_markets(params)
+
+        # ── Widest executable cross-venue spreads, from the spread index ──
+        if route == '/api/spreads':
+            return self._serve_spreads(params)
+
+        # ── Server-side price history for many markets at once ──
+        if route == '/api/history':
+            return self._serve_history(params)
+
+        # ── Server-side OHLC candles rolled up from the history store ──
+        if route == '/api/ohlc':
+            return self._serve_ohlc(params)
+
+        # ── Prometheus metrics ──
+        if route == '/metrics':
+            return self._serve_metrics()
 
         # ── Trending keywords endpoint ──
-        if self.path == '/api/trending':
+        if route == '/api/trending':
             return self._serve_trending()
 
+        # ── Server-Sent Events push streams ──
+        if route == '/api/markets/stream':
+            return self._serve_stream(market_cache, params)
+        if route == '/api/trending/stream':
+            return self._serve_stream(trending_cache, params)
+
+        # ── Many proxy calls in one request, streamed back as they finish ──
+        if route == '/api/batch':
+            return self._serve_batch(params)
+
         # ── News RSS proxy ──
         if self.path.startswith('/proxy/news'):
             return self._proxy_news()
 
         # ── Passthrough proxy (for chart history, candlesticks, etc.) ──
-        for prefix, target_base in PROXY_ROUTES.items():
-            if self.path.startswith(prefix):
-                remote_path = self.path[len(prefix):]
-                target_url = target_base + remote_path
-                return self._proxy(target_url)
+        target_url = _proxy_target(self.path)
+        if target_url is not None:
+            return self._proxy(target_url)
 
         # ── Static files ──
-        return super().do_GET()
+        return self._serve_static(route)
+
+    def _serve_markets(self, params):
+        fmt = params.get('format', ['json'])[0]
+        if fmt not in ('json', 'columnar'):
+            return self._send_error(400, 'format must be json or columnar')
+        if MARKET_QUERY_PARAMS.intersection(params):
+            if fmt == 'columnar':
+                return self._send_error(400, 'format=columnar is only available for the full snapshot')
+            try:
+                return self._send_snapshot(market_cache.query(params), max_age=5)
+            except ValueError as e:
+                return self._send_error(400, str(e))
+        since = params.get('since', [None])[0]
+        if since is not None:
+            try:
+                delta = market_cache.get_delta(int(since))
+            except ValueError:
+                delta = None
+            if delta is not None:
+                return self._send_snapshot(delta, max_age=5)
+            # Too far behind (or unknown version) — fall through to a full snapshot
+        if fmt == 'columnar':
+            return self._send_snapshot(market_cache.get_columnar(), max_age=5)
+        self._send_snapshot(market_cache.get_snapshot(), max_age=5)
+
+    def _serve_spreads(self, params):
+        try:
+            return self._send_snapshot(market_cache.spreads(params), max_age=5)
+        except ValueError as e:
+            return self._send_error(400, str(e))
+
+    def _serve_history(self, params):
+        ids = [i for i in ','.join(params.get('ids', [])).split(',') if i][:HISTORY_MAX_IDS]
+        try:
+            since = float(params.get('from', [0])[0] or 0)
+            res = int(params.get('res', [HISTORY_RESOLUTION])[0] or HISTORY_RESOLUTION)
+        except ValueError:
+            return self._send_error(400, 'from and res must be numbers')
+        if since > 1e12:
+            since /= 1000   # Accept JS millisecond timestamps
+        points = params.get('points', [None])[0]
+        points = min(int(points), HISTORY_MAX_POINTS) if points and points.isdigit() else None
+        series = market_cache.history.query(ids, since=since or None, res=res, points=points)
+        body = json.dumps({'resolution': market_cache.history.step_for(res), 'series': series}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', f'max-age={POLL_INTERVAL}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
-    def _serve_markets(self):
-        data = market_cache.get_data()
-        body = json.dumps(data).encode()
+    def _serve_ohlc(self, params):
+        market_id = params.get('id', [''])[0]
+        res_name = params.get('res', ['5m'])[0]
+        if res_name not in OHLC_RESOLUTIONS:
+            return self._send_error(400, f"res must be one of {', '.join(OHLC_RESOLUTIONS)}")
+        try:
+            since = float(params.get('from', [0])[0] or 0)
+            limit = int(params.get('limit', [300])[0] or 300)
+        except ValueError:
+            return self._send_error(400, 'from and limit must be numbers')
+        if limit < 1:
+            return self._send_error(400, 'limit must be at least 1')
+        if since > 1e12:
+            since /= 1000
+        bars = market_cache.history.ohlc(market_id, OHLC_RESOLUTIONS[res_name],
+                                         since=since or None, limit=min(limit, HISTORY_SLOTS))
+        if bars is None:
+            return self._send_error(404, 'no history for id')
+        body = json.dumps({'id': market_id, 'res': res_name, 'bars': bars}).encode()
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'max-age=5')
+        self.send_header('Cache-Control', f'max-age={POLL_INTERVAL}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_metrics(self):
+        body = metrics.render()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
     def _serve_trending(self):
-        data = trending_cache.get_data()
-        body = json.dumps(data).encode()
+        self._send_snapshot(trending_cache.get_snapshot(), max_age=30)
+
+    def _serve_stream(self, cache, params):
+        """Send SSE headers, then hand the socket to the shared broadcaster thread."""
+        last_id = self.headers.get('Last-Event-ID') or params.get('lastEventId', [None])[0]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Accel-Buffering', 'no')  # nginx: don't buffer the stream
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        self._attach_stream(cache, last_id)
+
+    def _attach_stream(self, cache, last_id):
+        self.server.detach(self.connection)
+        cache.subscribe_stream(self.connection, last_id)
+
+    def _serve_static(self, route):
+        """Serve from the static asset cache; anything it doesn't hold goes to SimpleHTTPRequestHandler."""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not route.endswith('/'):
+                return super().do_GET()   # Trailing-slash redirect
+            path = os.path.join(path, 'index.html')
+        asset = static_cache.lookup(path)
+        if asset is None:
+            return super().do_GET()
+        if _HASHED_ASSET_RE.search(self.path):
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = 'no-cache'   # Always revalidate; the strong ETag makes that a 304
+        if asset.is_current(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')):
+            static_requests.inc('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', asset.etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        encoding, body = asset.variant(self.headers.get('Accept-Encoding'))
+        f = static_cache.open(asset) if body is None else None
+        if body is None and f is None:
+            return super().do_GET()   # Changed since it was cached — let the next lookup reload it
         self.send_response(200)
+        self.send_header('Content-Type', asset.content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(asset.size if body is None else len(body)))
+        self.send_header('ETag', asset.etag)
+        self.send_header('Last-Modified', asset.last_modified)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        if body is not None:
+            static_requests.inc(encoding or 'identity')
+            self.wfile.write(body)
+            return
+        static_requests.inc('sendfile')
+        with f:
+            self.wfile.written += self.connection.sendfile(f)
+
+    def _send_error(self, status, message):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(status)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'max-age=30')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
-    def _proxy(self, url):
-        # Check server-side proxy cache first (shared across all users)
-        cached = proxy_cache.get(url)
-        if cached:
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
+    def _send_snapshot(self, snap, max_age):
+        """Send a pre-encoded snapshot, honoring conditional requests + Accept-Encoding."""
+        if snap.is_current(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')):
+            self.send_response(304)
+            self.send_header('ETag', snap.etag)
+            self.send_header('Last-Modified', snap.last_modified)
             self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Cache-Control', 'max-age=15')
+            self.send_header('Cache-Control', f'max-age={max_age}')
+            self.send_header('Vary', 'Accept-Encoding')
             self.end_headers()
-            self.wfile.write(cached)
             return
+        encoding, body = snap.variant(self.headers.get('Accept-Encoding'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', snap.etag)
+        self.send_header('Last-Modified', snap.last_modified)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
+        self.send_header('Cache-Control', f'max-age={max_age}')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _proxy(self, url):
+        # Served from the shared proxy cache; concurrent misses share one upstream call
+        status, data, state = proxy_cache.fetch(url, _load_proxy_url)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if status < 400:
+            self.send_header('Cache-Control', 'max-age=15')
+        elif state == 'shed':
+            self.send_header('Retry-After', '1')
+        self.send_header('X-Cache', state)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _serve_batch(self, params):
+        """Resolve ?path=/proxy/...&path=... through the proxy cache, one NDJSON line
+        per path ({i, path, status, cache, body | error}) in completion order."""
+        paths = params.get('path', [])
+        if not paths:
+            return self._send_error(400, 'path is required')
+        if len(paths) > BATCH_MAX_PATHS:
+            return self._send_error(400, f'at most {BATCH_MAX_PATHS} paths per batch')
+
+        def resolve(index, path):
+            url = _proxy_target(path)
+            if url is None:
+                return _batch_line(index, path, 400, b'{"error": "not a proxy path"}', 'invalid')
+            status, data, state = proxy_cache.fetch(url, _load_proxy_url)
+            batch_paths.inc(state)
+            return _batch_line(index, path, status, data, state)
+
+        futures = [batch_pool.submit(resolve, i, path) for i, path in enumerate(paths)]
+        chunked = self.protocol_version >= 'HTTP/1.1' and self.request_version >= 'HTTP/1.1'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Accel-Buffering', 'no')  # nginx: pass lines through as they come
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True   # HTTP/1.0: the body ends when the connection does
+        self.end_headers()
         try:
-            req = urllib.request.Request(url, headers={
-                'User-Agent': 'Mozilla/5.0 Mercury/1.0',
-                'Accept': 'application/json',
-            })
-            with urllib.request.urlopen(req, timeout=8) as resp:
-                data = resp.read()
-                # Cache successful responses (chart history, candlesticks)
-                if resp.status == 200 and len(data) < 500_000:
-                    proxy_cache.put(url, data)
-                self.send_response(resp.status)
-                self.send_header('Content-Type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Cache-Control', 'max-age=15')
-                self.end_headers()
-                self.wfile.write(data)
-        except Exception as e:
-            self.send_response(502)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': str(e)}).encode())
+            for future in concurrent.futures.as_completed(futures):
+                line = future.result()
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line) if chunked else line)
+                self.wfile.flush()
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            # Client went away; drop what hasn't started (started loads still fill the cache)
+            for future in futures:
+                future.cancel()
+            self.close_connection = True
 
     def _proxy_news(self):
-        try:
-            qs = urllib.parse.urlparse(self.path).query
-            params = urllib.parse.parse_qs(qs)
-            query = params.get('q', ['prediction market polymarket kalshi'])[0]
-            rss_url = (
-                f'https://news.google.com/rss/search?q={urllib.parse.quote(query)}'
-                f'&hl=en-US&gl=US&ceid=US:en'
-            )
-            req = urllib.request.Request(rss_url, headers={
-                'User-Agent': 'Mozilla/5.0 Mercury/1.0',
-                'Accept': 'application/xml',
-            })
-            with urllib.request.urlopen(req, timeout=8) as resp:
-                xml_data = resp.read()
-            root = ET.fromstring(xml_data)
-            channel = root.find('channel')
-            items = []
-            for item in (channel.findall('item') if channel is not None else []):
-                title = item.findtext('title', '')
-                link = item.findtext('link', '')
-                pub_date = item.findtext('pubDate', '')
-                source_el = item.find('source')
-                source = source_el.text if source_el is not None else ''
-                title = html.unescape(re.sub(r'<[^>]+>', '', title))
-                items.append({
-                    'title': title,
-                    'link': link,
-                    'pubDate': pub_date,
-                    'source': source,
-                })
-                if len(items) >= 30:
-                    break
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
+        # Parsed article lists live in the proxy cache keyed by normalized query
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        query = params.get('q', [NEWS_DEFAULT_QUERY])[0]
+        status, data, state = proxy_cache.fetch(_news_rss_url(query), _load_news_url)
+        if status >= 400:
+            data = json.dumps({'error': json.loads(data).get('error', f'HTTP {status}'), 'articles': []}).encode()
+        self.send_response(200 if status < 400 else 503 if state == 'shed' else 502)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if status < 400:
             self.send_header('Cache-Control', 'max-age=120')
-            self.end_headers()
-            self.wfile.write(json.dumps({'articles': items}).encode())
-        except Exception as e:
-            self.send_response(502)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({'error': str(e), 'articles': []}).encode())
+        elif state == 'shed':
+            self.send_header('Retry-After', '1')
+        self.send_header('X-Cache', state)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
 
     def do_OPTIONS(self):
         self.send_response(204)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, If-None-Match, If-Modified-Since')
         self.end_headers()
 
     def log_message(self, format, *args):
@@ -925,21 +3995,587 @@ class MercuryHandler(http.server.SimpleHTTPRequestHandler):
 
 class ThreadedHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
     daemon_threads = True
+    request_queue_size = 128  # Listen backlog — SSE reconnect storms arrive in bursts
+
+    def __init__(self, *args, **kwargs):
+        self._detached = set()
+        self._detached_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def detach(self, request):
+        """Keep `request` open after its handler returns (now owned by a streamer)."""
+        with self._detached_lock:
+            self._detached.add(request)
+
+    def shutdown_request(self, request):
+        with self._detached_lock:
+            if request in self._detached:
+                self._detached.discard(request)
+                return
+        super().shutdown_request(request)
+
+
+# ═══════════════════════════════════════════════════════════════
+# POOLED SERVER ENGINE — HTTP/1.1 keep-alive on a bounded worker pool
+# One selector thread owns the listener + idle connections; a connection
+# only holds a worker while a request on it is being handled
+# ═══════════════════════════════════════════════════════════════
+
+engine_queued = metrics.gauge(
+    'mercury_engine_queued_requests', 'Requests waiting for a pooled-engine worker')
+engine_connections = metrics.gauge(
+    'mercury_engine_connections', 'Client connections held by the pooled engine')
+engine_shed = metrics.counter(
+    'mercury_engine_shed_total', 'Requests answered 503 by the pooled engine', ('reason',))
+
+_SHED_BODY = json.dumps({'error': 'server busy, retry shortly'}).encode()
+_SHED_RESPONSE = (
+    b'HTTP/1.1 503 Service Unavailable\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Retry-After: 1\r\n'
+    b'Connection: close\r\n'
+    b'Content-Length: ' + str(len(_SHED_BODY)).encode() + b'\r\n\r\n' + _SHED_BODY
+)
+
+
+def _keepalive_handler(handler_class):
+    """Subclass `handler_class` so the engine drives it one request at a time."""
+
+    class KeepAliveHandler(handler_class):
+        protocol_version = 'HTTP/1.1'
+        timeout = KEEPALIVE_TIMEOUT   # a client stalling mid-request frees its worker
+
+        def handle(self):
+            pass   # BaseRequestHandler.__init__ only sets the connection up
+
+        def finish(self):
+            pass   # ...and the engine tears it down via close_files()
+
+        def close_files(self):
+            super().finish()
+
+    return KeepAliveHandler
+
+
+class _Connection:
+    __slots__ = ('sock', 'addr', 'handler', 'idle_since')
+
+    def __init__(self, sock, addr):
+        self.sock, self.addr, self.handler = sock, addr, None
+        self.idle_since = time.monotonic()
+
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """Alternative to ThreadedHTTPServer with bounded threads and backpressure.
+
+    Readable connections are queued for ENGINE_WORKERS threads; past
+    ENGINE_QUEUE waiting requests (or ENGINE_QUEUE_TIMEOUT spent waiting) the
+    request is answered 503 + Retry-After instead of growing without bound.
+    Handlers run unchanged; SSE sockets are detached exactly as before.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, server_address, RequestHandlerClass, bind_and_activate=True,
+                 workers=ENGINE_WORKERS, max_queued=ENGINE_QUEUE):
+        super().__init__(server_address, _keepalive_handler(RequestHandlerClass), bind_and_activate)
+        self.workers, self.max_queued = workers, max_queued
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._lock = threading.Lock()
+        self._parked = collections.deque()   # keep-alive connections handed back by workers
+        self._pending = 0                    # requests queued or running
+        self._connections = 0
+        self._detached = set()
+        self._stop = threading.Event()
+
+    def detach(self, request):
+        """Keep `request` open after its handler returns (now owned by a streamer)."""
+        with self._lock:
+            self._detached.add(request)
+
+    def serve_forever(self, poll_interval=0.5):
+        self.socket.setblocking(False)
+        self._sel.register(self.socket, selectors.EVENT_READ)
+        self._sel.register(self._wake_r, selectors.EVENT_READ)
+        next_sweep = time.monotonic() + 1
+        try:
+            while not self._stop.is_set():
+                for key, _ in self._sel.select(timeout=poll_interval):
+                    if key.fileobj is self.socket:
+                        self._accept()
+                    elif key.fileobj is self._wake_r:
+                        self._unpark()
+                    else:
+                        self._sel.unregister(key.fileobj)
+                        self._dispatch(key.data)
+                if time.monotonic() >= next_sweep:
+                    self._close_idle()
+                    next_sweep = time.monotonic() + 1
+        finally:
+            for key in list(self._sel.get_map().values()):
+                if isinstance(key.data, _Connection):
+                    self._close(key.data)
+            self._sel.close()
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake()
+
+    def server_close(self):
+        self.shutdown()
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _accept(self):
+        while True:
+            try:
+                sock, addr = self.socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                sys.stderr.write(f"\033[33m[engine]\033[0m accept failed: {e}\n")
+                return
+            sock.setblocking(True)
+            with self._lock:
+                full = self._connections >= ENGINE_MAX_CONNECTIONS
+                if not full:
+                    self._connections += 1
+            if full:
+                self._shed(sock, 'connections')
+                continue
+            engine_connections.inc(n=1)
+            conn = _Connection(sock, addr)
+            self._sel.register(sock, selectors.EVENT_READ, conn)
+
+    def _unpark(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._lock:
+            parked, self._parked = self._parked, collections.deque()
+        for conn in parked:
+            conn.idle_since = time.monotonic()
+            self._sel.register(conn.sock, selectors.EVENT_READ, conn)
+
+    def _dispatch(self, conn):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queued:
+                full = True
+            else:
+                full = False
+                self._pending += 1
+        if full:
+            self._release(conn)
+            self._shed(conn.sock, 'queue_full')
+            return
+        engine_queued.inc(n=1)
+        self._pool.submit(self._serve, conn, time.monotonic())
+
+    def _serve(self, conn, queued_at):
+        engine_queued.inc(n=-1)
+        park = False
+        try:
+            if time.monotonic() - queued_at > ENGINE_QUEUE_TIMEOUT:
+                self._release(conn, close_files=True)
+                self._shed(conn.sock, 'queue_timeout')
+                return
+            if conn.handler is None:
+                conn.handler = self.RequestHandlerClass(conn.sock, conn.addr, self)
+            handler = conn.handler
+            while True:
+                handler.handle_one_request()
+                if handler.close_connection or not self._has_buffered(handler):
+                    break
+                # A pipelined request is already buffered — no readiness event will come for it
+            park = not handler.close_connection
+        except Exception:
+            self.handle_error(conn.sock, conn.addr)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                detached = conn.sock in self._detached
+                self._detached.discard(conn.sock)
+                if park and not detached:
+                    self._parked.append(conn)
+        if park and not detached:
+            self._wake()
+        elif detached:
+            self._release(conn, close_files=True)
+        else:
+            self._close(conn)
+
+    @staticmethod
+    def _has_buffered(handler):
+        sock = handler.connection
+        try:
+            sock.setblocking(False)
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(handler.timeout)
+
+    def _close_idle(self):
+        deadline = time.monotonic() - KEEPALIVE_TIMEOUT
+        for key in list(self._sel.get_map().values()):
+            conn = key.data
+            if isinstance(conn, _Connection) and conn.idle_since < deadline:
+                self._sel.unregister(conn.sock)
+                self._close(conn)
+
+    def _release(self, conn, close_files=False):
+        """Stop tracking `conn` without closing its socket."""
+        with self._lock:
+            self._connections -= 1
+        engine_connections.inc(n=-1)
+        if close_files and conn.handler is not None:
+            try:
+                conn.handler.close_files()
+            except OSError:
+                pass
+
+    def _close(self, conn):
+        self._release(conn, close_files=True)
+        self.shutdown_request(conn.sock)
+
+    def _shed(self, sock, reason):
+        """Answer 503 without a worker: drain what the client sent, reply, close."""
+        engine_shed.inc(reason)
+        try:
+            sock.setblocking(False)
+            try:
+                sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                pass
+            sock.send(_SHED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(sock)
+
+
+def make_server(address, handler_class, reuse_port=False):
+    """HTTP server for SERVER_ENGINE ('threaded' or 'pool') bound to `address`."""
+    server_class = PooledHTTPServer if SERVER_ENGINE == 'pool' else ThreadedHTTPServer
+    server = server_class(address, handler_class, bind_and_activate=False)
+    server.allow_reuse_port = reuse_port
+    try:
+        server.server_bind()
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    return server
+
+# ═══════════════════════════════════════════════════════════════
+# MULTI-PROCESS SERVING — one poller process, N SO_REUSEPORT workers
+# Snapshots cross processes as memory-mapped files; workers never re-encode
+# ═══════════════════════════════════════════════════════════════
+
+class MappedSnapshot(EncodedSnapshot):
+    """EncodedSnapshot whose variants are memoryview slices of a read-only mmap.
+
+    File layout: 4-byte header length, JSON header, then body, gzip and br back to back.
+    """
+
+    __slots__ = ('ident', '_mmap')
+
+    def __init__(self, mm, ident):
+        (hlen,) = struct.unpack_from('<I', mm, 0)
+        header = json.loads(mm[4:4 + hlen])
+        view = memoryview(mm)
+        offset, parts = 4 + hlen, []
+        for size in header['sizes']:
+            parts.append(view[offset:offset + size])
+            offset += size
+        self.body, self.gzip, br = parts
+        self.br = br if header['br'] else None
+        self.etag = header['etag']
+        self.mtime = header['mtime']
+        self.last_modified = email.utils.formatdate(self.mtime, usegmt=True)
+        self.ident = ident
+        self._mmap = mm   # unmapped once the last response holding a slice lets go
+
+
+class SharedSnapshots:
+    """Snapshot exchange between the poller and the workers through SHARED_DIR.
+
+    The poller writes each snapshot to a fresh file and renames it into place;
+    workers map the newest file read-only. Older mappings stay valid for
+    responses still writing them, so no reader ever sees a partial snapshot.
+    """
+
+    def __init__(self, directory=SHARED_DIR):
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.snap')
+
+    def publish(self, name, snap):
+        header = json.dumps({
+            'etag': snap.etag,
+            'mtime': snap.mtime,
+            'br': snap.br is not None,
+            'sizes': [len(snap.body), len(snap.gzip), len(snap.br or b'')],
+        }).encode()
+        try:
+            _write_atomic(self.path(name), b''.join(
+                (struct.pack('<I', len(header)), header, snap.body, snap.gzip, snap.br or b'')))
+        except OSError as e:
+            sys.stderr.write(f"\033[33m[shared]\033[0m publish {name} failed: {e}\n")
+
+    def load(self, name, current=None):
+        """Map the newest `name` snapshot → MappedSnapshot, or None if missing or same as `current`."""
+        try:
+            with open(self.path(name), 'rb') as f:
+                st = os.fstat(f.fileno())
+                ident = (st.st_ino, st.st_mtime_ns)
+                if ident == getattr(current, 'ident', None):
+                    return None
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return MappedSnapshot(mm, ident)
+        except (ValueError, KeyError, struct.error) as e:
+            sys.stderr.write(f"\033[33m[shared]\033[0m unreadable {name} snapshot: {e}\n")
+            return None
+
+    def clear(self):
+        for name in (MarketCache.SHARED_NAME, TrendingCache.SHARED_NAME):
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+
+
+# Served by the poller process (its history store / scrape state), forwarded by workers
+POLLER_ROUTES = frozenset(('/api/history', '/api/ohlc', '/api/spreads'))
+
+
+class WorkerHandler(MercuryHandler):
+    """MercuryHandler for worker processes.
+
+    /api/markets and /api/trending come from the shared snapshots; history,
+    OHLC and spreads are forwarded to the poller; SSE sockets are passed to the poller,
+    which owns the broadcaster, so one publish still reaches every subscriber.
+    """
+
+    def _route_GET(self):
+        if self.path.partition('?')[0] in POLLER_ROUTES:
+            return self._forward_to_poller()
+        return super()._route_GET()
+
+    def _forward_to_poller(self):
+        try:
+            resp = self.server.poller_pool.request(self.server.poller_url + self.path, timeout=10)
+        except (OSError, http.client.HTTPException) as e:
+            return self._send_error(503, f'poller unavailable: {e}')
+        self.send_response(resp.status)
+        for name in ('Content-Type', 'Cache-Control'):
+            if resp.headers.get(name):
+                self.send_header(name, resp.headers[name])
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Content-Length', str(len(resp.body)))
+        self.end_headers()
+        self.wfile.write(resp.body)
+
+    def _serve_metrics(self):
+        # Cache/upstream/SSE state from the poller + this worker's own HTTP metrics
+        try:
+            state = self.server.poller_pool.request(self.server.poller_url + '/metrics', timeout=5).body
+        except (OSError, http.client.HTTPException):
+            state = b''
+        body = state + metrics.render(lambda name: name.startswith('mercury_http_'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _attach_stream(self, cache, last_id):
+        msg = json.dumps({'topic': cache.SHARED_NAME, 'lastEventId': last_id}).encode()
+        # No shutdown(): the poller now shares this connection; just drop our descriptor
+        self.server.detach(self.connection)
+        try:
+            socket.send_fds(self.server.stream_tx, [msg], [self.connection.fileno()])
+        except OSError as e:
+            sys.stderr.write(f"\033[33m[worker]\033[0m stream handoff failed: {e}\n")
+        self.connection.close()
+
+
+class PollerHandler(MercuryHandler):
+    """Handler for the poller's loopback listener (requests forwarded by workers)."""
+
+    def _serve_metrics(self):
+        body = metrics.render(lambda name: not name.startswith('mercury_http_'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass   # Already logged by the worker that forwarded it
+
+
+def _run_poller(internal_sock, stream_rx):
+    """Poller process: own the caches, publish snapshots, serve forwarded routes + SSE."""
+    shared = SharedSnapshots()
+    market_cache.publisher = trending_cache.publisher = shared
+    market_cache.start()
+    trending_cache.start()
+    sse_broadcaster.start()
+
+    def receive_streams():
+        caches = {MarketCache.SHARED_NAME: market_cache, TrendingCache.SHARED_NAME: trending_cache}
+        while True:
+            msg, fds, _, _ = socket.recv_fds(stream_rx, 4096, 1)
+            if not fds:
+                continue
+            sock = socket.socket(fileno=fds[0])
+            try:
+                req = json.loads(msg)
+                caches[req['topic']].subscribe_stream(sock, req.get('lastEventId'))
+            except (ValueError, KeyError, OSError) as e:
+                sys.stderr.write(f"\033[33m[poller]\033[0m bad stream handoff: {e}\n")
+                sock.close()
+
+    threading.Thread(target=receive_streams, daemon=True).start()
+    server = ThreadedHTTPServer(internal_sock.getsockname(), PollerHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = internal_sock
+    server.serve_forever()
+
+
+def _run_worker(index, host, port, poller_port, stream_tx):
+    """Worker process: follow shared snapshots and serve HTTP on the shared port."""
+    shared = SharedSnapshots()
+
+    def follow():
+        while True:
+            for cache in (market_cache, trending_cache):
+                snap = shared.load(cache.SHARED_NAME, cache.get_snapshot())
+                if snap is not None:
+                    try:
+                        cache.follow(snap)
+                    except ValueError as e:
+                        sys.stderr.write(f"\033[33m[worker {index}]\033[0m bad {cache.SHARED_NAME} snapshot: {e}\n")
+            time.sleep(SHARED_POLL_INTERVAL)
+
+    threading.Thread(target=follow, daemon=True).start()
+    server = make_server((host, port), WorkerHandler, reuse_port=True)   # the kernel spreads connections
+    server.poller_url = f'http://127.0.0.1:{poller_port}'
+    server.poller_pool = HTTPPool()
+    server.stream_tx = stream_tx
+    server.serve_forever()
+
+
+def serve_prefork(workers, host='0.0.0.0', port=PORT):
+    """Supervisor: fork the poller + `workers` workers, restart any that die.
+
+    Must run before any threads start (fork only copies the calling thread).
+    """
+    restart_delay = 1.0   # seconds — a child dying this soon after spawn is crash-looping
+    shared = SharedSnapshots()
+    shared.clear()
+    # Created before forking so a restarted poller inherits the same endpoints
+    internal_sock = socket.create_server(('127.0.0.1', 0))
+    stream_rx, stream_tx = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stream_tx.setblocking(False)   # Never stall a worker while the poller restarts
+    children = {}   # pid -> (role, spawned_at)
+    stopping = False
+
+    def spawn(role):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl+C is the supervisor's
+            code = 0
+            try:
+                if role == 'poller':
+                    _run_poller(internal_sock, stream_rx)
+                else:
+                    _run_worker(role, host, port, internal_sock.getsockname()[1], stream_tx)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (role, time.monotonic())
+
+    def stop(sig, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    spawn('poller')
+    for i in range(workers):
+        spawn(i)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    sys.stderr.write(f"\033[32m[supervisor]\033[0m poller + {workers} workers on :{port}\n")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        role, spawned = children.pop(pid, (None, 0))
+        if role is None or stopping:
+            continue
+        name = 'poller' if role == 'poller' else f'worker {role}'
+        sys.stderr.write(f"\033[31m[supervisor] {name} (pid {pid}) exited "
+                         f"with {os.waitstatus_to_exitcode(status)} — restarting\033[0m\n")
+        if time.monotonic() - spawned < restart_delay:
+            time.sleep(restart_delay)
+        if not stopping:
+            spawn(role)
+    shared.clear()
 
 
 if __name__ == '__main__':
     print(f"\n  Mercury Dev Server")
     print(f"  http://localhost:{PORT}")
-    print(f"  /api/markets  — cached market data (updates every {POLL_INTERVAL}s)")
+    print(f"  /api/markets  — cached market data (polled every {POLL_MIN_INTERVAL:g}–{POLL_MAX_INTERVAL:g}s, ?since=<version> for deltas)")
     print(f"  /api/trending — trending keyword spikes (updates every 5m)")
+    print(f"  /api/*/stream — SSE push for markets + trending")
+    print(f"  /api/history  — 24h per-market price history (?ids=&from=&res=&points=)")
+    print(f"  /api/ohlc     — 1m/5m/15m/30m/1h candles (?id=&res=&from=&limit=)")
     print(f"  /proxy/*      — passthrough for chart history")
+    print(f"  /metrics      — Prometheus metrics")
+    static_cache.load_all()   # Before forking, so workers share the pages copy-on-write
+    if SERVER_ENGINE == 'pool':
+        print(f"  HTTP/1.1 keep-alive engine: {ENGINE_WORKERS} workers, {ENGINE_QUEUE} queued before 503")
+    if WORKERS > 1 and hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT'):
+        print(f"  {WORKERS} worker processes + 1 poller (snapshots shared via {SHARED_DIR})")
+        print(f"  Press Ctrl+C to stop\n")
+        serve_prefork(WORKERS)
+        sys.exit(0)
     print(f"  Press Ctrl+C to stop\n")
 
     # Start background polling
     market_cache.start()
     trending_cache.start()
+    sse_broadcaster.start()
 
-    server = ThreadedHTTPServer(('0.0.0.0', PORT), MercuryHandler)
+    server = make_server(('0.0.0.0', PORT), MercuryHandler)
 
     def shutdown_handler(sig, frame):
         print("\nShutting down...")
@@ -0,0 +1,105 @@
+"""
+HTTPPool against a local stand-in upstream (http.server on 127.0.0.1).
+Run: python -m pytest tests/
+"""
+
+import gzip
+import http.server
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import HTTPPool  # noqa: E402
+
+
+class _Upstream(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        state = self.server.state
+        with state['lock']:
+            state['ports'].add(self.client_address[1])
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        try:
+            if self.path == '/slow':
+                time.sleep(0.2)
+            if self.path == '/redirect':
+                return self._send(302, b'', location='/ok')
+            if self.path == '/gzip':
+                return self._send(200, gzip.compress(b'{"packed": true}'), encoding='gzip')
+            self._send(200, b'{"ok": true}')
+            if self.path == '/drop':
+                # Close after answering, without saying so — the client keeps a dead socket
+                self.close_connection = True
+        finally:
+            with state['lock']:
+                state['active'] -= 1
+
+    def _send(self, status, body, location=None, encoding=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if location:
+            self.send_header('Location', location)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HTTPPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.upstream = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Upstream)
+        self.upstream.daemon_threads = True
+        self.upstream.state = {'lock': threading.Lock(), 'ports': set(), 'active': 0, 'peak': 0}
+        threading.Thread(target=self.upstream.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.upstream.server_address[1]}'
+        self.pool = HTTPPool(max_per_host=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.upstream.shutdown()
+        self.upstream.server_close()
+
+    def test_reuses_connection(self):
+        for _ in range(5):
+            self.assertEqual(self.pool.get(self.base + '/ok').body, b'{"ok": true}')
+        stats = self.pool.stats()
+        self.assertEqual((stats['requests'], stats['connects'], stats['reused']), (5, 1, 4))
+        self.assertEqual(len(self.upstream.state['ports']), 1)
+
+    def test_per_host_limit(self):
+        threads = [threading.Thread(target=self.pool.get, args=(self.base + '/slow',)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(self.upstream.state['peak'], 2)
+        self.assertLessEqual(len(self.upstream.state['ports']), 2)
+        self.assertEqual(self.pool.stats()['requests'], 6)
+
+    def test_follows_redirect(self):
+        resp = self.pool.get(self.base + '/redirect')
+        self.assertEqual((resp.status, resp.body), (200, b'{"ok": true}'))
+
+    def test_decodes_gzip(self):
+        self.assertEqual(self.pool.get(self.base + '/gzip').body, b'{"packed": true}')
+
+    def test_retries_stale_keepalive_socket(self):
+        self.pool.get(self.base + '/drop')
+        time.sleep(0.1)   # let the server finish closing its end
+        self.assertEqual(self.pool.get(self.base + '/ok').body, b'{"ok": true}')
+        stats = self.pool.stats()
+        self.assertEqual((stats['requests'], stats['connects'], stats['errors']), (2, 2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()